@@ -0,0 +1,86 @@
+"""Накопительные итоги по результатам тренировок."""
+from typing import Dict, Iterator, Tuple
+
+from homework import InfoMessage
+
+
+class Totals:
+    """Сумма результатов нескольких тренировок."""
+    __slots__ = ('count', 'duration', 'distance', 'calories')
+
+    def __init__(self,
+                 count: int = 0,  # количество тренировок
+                 duration: float = 0.0,  # суммарная продолжительность
+                 distance: float = 0.0,  # суммарная дистанция
+                 calories: float = 0.0,  # суммарные калории
+                 ) -> None:
+        self.count = count
+        self.duration = duration
+        self.distance = distance
+        self.calories = calories
+
+    def add(self, info: InfoMessage) -> None:
+        """Учесть результат тренировки."""
+        self.count += 1
+        self.duration += info.duration
+        self.distance += info.distance
+        self.calories += info.calories
+
+    def merge(self, other: 'Totals') -> None:
+        """Добавить итоги другой части данных."""
+        self.count += other.count
+        self.duration += other.duration
+        self.distance += other.distance
+        self.calories += other.calories
+
+    def get_mean_speed(self) -> float:
+        """Средняя скорость по всем тренировкам, км/ч."""
+        return self.distance / self.duration if self.duration else 0.0
+
+    def as_tuple(self) -> Tuple[int, float, float, float]:
+        return (self.count, self.duration, self.distance, self.calories)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Totals):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __repr__(self) -> str:
+        return 'Totals(%r, %r, %r, %r)' % self.as_tuple()
+
+
+class TotalsTable:
+    """Итоги по парам (пользователь, тип тренировки)."""
+
+    def __init__(self) -> None:
+        self.rows: Dict[Tuple[str, str], Totals] = {}
+
+    def add(self, user_id: str, info: InfoMessage) -> None:
+        """Учесть результат тренировки пользователя."""
+        key: Tuple[str, str] = (user_id, info.training_type)
+        totals: Totals = self.rows.get(key)
+        if totals is None:
+            totals = self.rows[key] = Totals()
+        totals.add(info)
+
+    def merge(self, other: 'TotalsTable') -> None:
+        """Добавить итоги, посчитанные по другой части данных."""
+        for key, totals in other.rows.items():
+            if key in self.rows:
+                self.rows[key].merge(totals)
+            else:
+                self.rows[key] = Totals(*totals.as_tuple())
+
+    def get(self, user_id: str, training_type: str) -> Totals:
+        return self.rows.get((user_id, training_type), Totals())
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Tuple[Tuple[str, str], Totals]]:
+        return iter(sorted(self.rows.items()))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TotalsTable):
+            return NotImplemented
+        return self.rows == other.rows
@@ -0,0 +1,186 @@
+"""Поиск аномальных тренировок по потоковой статистике.
+Для каждой пары (пользователь, тип тренировки) алгоритмом Уэлфорда
+поддерживаются среднее и дисперсия скорости и калорий в час (калории за
+тренировку растут с ее длительностью). Тренировка, отклоняющаяся от
+среднего больше чем на THRESHOLD стандартных отклонений или превышающая
+физический предел скорости, считается аномальной. Выброс, повторившийся
+ADMIT_AFTER раз подряд, считается новым уровнем пользователя и
+попадает в статистику. Состояние всех пользователей хранится в одном
+плоском массиве float64: шесть чисел на пару, без отдельного объекта
+на пользователя.
+"""
+import math
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+from homework import InfoMessage
+
+# поля состояния пары в плоском массиве; калории - в час, STREAK -
+# выбросов подряд
+COUNT, SPEED_MEAN, SPEED_M2, CALORIES_MEAN, CALORIES_M2, STREAK = range(6)
+STATE_SIZE: int = 6
+
+
+class AnomalyDetector:
+    """Потоковый детектор выбросов по скорости и калориям."""
+    THRESHOLD: float = 6.0  # допустимое отклонение, в сигмах
+    MIN_COUNT: int = 5  # тренировок до начала проверки по статистике
+    # наименьшее отклонение в долях среднего: одинаковые тренировки
+    # дают нулевую дисперсию, и любое отличие стало бы аномалией
+    MIN_RELATIVE_STD: float = 0.01
+    ADMIT_AFTER: int = 3  # выбросов подряд, после которых уровень новый
+    MAX_SPEED: Dict[str, float] = {  # физический предел скорости, км/ч
+        'Running': 45.0,
+        'SportsWalking': 20.0,
+        'Swimming': 10.0,
+    }
+
+    def __init__(self) -> None:
+        self.index: Dict[Tuple[str, str], int] = {}
+        self.state: array = array('d')
+        self.flagged: int = 0  # найдено аномалий
+
+    def _slot(self, user_id: str, training_type: str) -> int:
+        """Смещение состояния пары в массиве, новая пара - с нулями."""
+        key: Tuple[str, str] = (user_id, training_type)
+        offset = self.index.get(key)
+        if offset is None:
+            offset = self.index[key] = len(self.state)
+            self.state.extend((0.0,) * STATE_SIZE)
+        return offset
+
+    def _score(self, offset: int, speed: float, calories: float) -> float:
+        """Наибольшее отклонение скорости или калорий в час в сигмах."""
+        state: array = self.state
+        count: float = state[offset + COUNT]
+        if count < self.MIN_COUNT:
+            return 0.0
+        score: float = 0.0
+        for value, mean, m2 in ((speed, SPEED_MEAN, SPEED_M2),
+                                (calories, CALORIES_MEAN, CALORIES_M2)):
+            floor: float = self.MIN_RELATIVE_STD * state[offset + mean]
+            std: float = math.sqrt(max(state[offset + m2] / (count - 1),
+                                       floor * floor))
+            deviation: float = abs(value - state[offset + mean])
+            if std:
+                score = max(score, deviation / std)
+            elif deviation:
+                score = math.inf
+        return score
+
+    def score(self, user_id: str, info: InfoMessage) -> float:
+        """Отклонение тренировки от статистики пользователя, в сигмах.
+        Бесконечность - если превышен физический предел скорости.
+        """
+        limit: float = self.MAX_SPEED.get(info.training_type, math.inf)
+        if not info.speed <= limit:
+            return math.inf
+        offset = self.index.get((user_id, info.training_type))
+        if offset is None:
+            return 0.0
+        return self._score(offset, info.speed,
+                           info.calories / info.duration)
+
+    def _held_back(self, user_id: str, info: InfoMessage) -> bool:
+        """Не пускать выброс в статистику. Пропускается только
+        ADMIT_AFTER-й выброс подряд в пределах физических ограничений.
+        """
+        offset = self.index.get((user_id, info.training_type))
+        limit: float = self.MAX_SPEED.get(info.training_type, math.inf)
+        if offset is None or not info.speed <= limit:
+            return True
+        self.state[offset + STREAK] += 1
+        return self.state[offset + STREAK] < self.ADMIT_AFTER
+
+    def observe(self, user_id: str, info: InfoMessage) -> bool:
+        """Проверить тренировку и учесть ее в статистике.
+        Возвращает True для аномалии; аномалии в статистику не попадают,
+        пока не повторятся ADMIT_AFTER раз подряд.
+        """
+        if (self.score(user_id, info) > self.THRESHOLD
+                and self._held_back(user_id, info)):
+            self.flagged += 1
+            return True
+        offset: int = self._slot(user_id, info.training_type)
+        state: array = self.state
+        count: float = state[offset + COUNT] + 1
+        state[offset + COUNT] = count
+        state[offset + STREAK] = 0
+        rate: float = info.calories / info.duration
+        for value, mean, m2 in ((info.speed, SPEED_MEAN, SPEED_M2),
+                                (rate, CALORIES_MEAN, CALORIES_M2)):
+            delta: float = value - state[offset + mean]
+            state[offset + mean] += delta / count
+            state[offset + m2] += delta * (value - state[offset + mean])
+        return False
+
+    def score_batch(self,
+                    user_ids: Sequence[str],  # колонка пользователей
+                    training_types: Sequence[str],  # колонка типов
+                    speeds: Sequence[float],  # колонка скоростей
+                    calories: Sequence[float],  # колонка калорий
+                    durations: Sequence[float],  # колонка длительностей, ч
+                    ) -> array:
+        """Оценить колонки тренировок по текущей статистике.
+        Статистика не меняется, возвращается колонка отклонений в сигмах.
+        """
+        scores: array = array('d', bytes(8 * len(speeds)))
+        index: Dict[Tuple[str, str], int] = self.index
+        for row, key in enumerate(zip(user_ids, training_types)):
+            speed: float = speeds[row]
+            if not speed <= self.MAX_SPEED.get(key[1], math.inf):
+                scores[row] = math.inf
+                continue
+            offset = index.get(key)
+            if offset is not None:
+                scores[row] = self._score(offset, speed,
+                                          calories[row] / durations[row])
+        return scores
+
+    def fit_batch(self,
+                  user_ids: Sequence[str],  # колонка пользователей
+                  training_types: Sequence[str],  # колонка типов
+                  speeds: Sequence[float],  # колонка скоростей
+                  calories: Sequence[float],  # колонка калорий
+                  durations: Sequence[float],  # колонка длительностей, ч
+                  ) -> None:
+        """Учесть колонки тренировок в статистике без проверки.
+        Статистика пачки считается по группам и объединяется
+        с накопленной формулой Чана.
+        """
+        groups: Dict[Tuple[str, str], list] = {}
+        for row, key in enumerate(zip(user_ids, training_types)):
+            groups.setdefault(key, []).append(row)
+        rates: List[float] = [value / duration for value, duration
+                              in zip(calories, durations)]
+        state: array = self.state
+        for (user_id, training_type), rows in groups.items():
+            offset: int = self._slot(user_id, training_type)
+            count: int = len(rows)
+            total: float = state[offset + COUNT] + count
+            for column, mean, m2 in ((speeds, SPEED_MEAN, SPEED_M2),
+                                     (rates, CALORIES_MEAN, CALORIES_M2)):
+                values = [column[row] for row in rows]
+                batch_mean: float = math.fsum(values) / count
+                batch_m2: float = math.fsum(
+                    (value - batch_mean) ** 2 for value in values)
+                delta: float = batch_mean - state[offset + mean]
+                state[offset + m2] += (
+                    batch_m2
+                    + delta * delta * state[offset + COUNT] * count / total)
+                state[offset + mean] += delta * count / total
+            state[offset + COUNT] = total
+
+    def stats(self, user_id: str, training_type: str
+              ) -> Tuple[int, float, float, float, float]:
+        """Количество, среднее и дисперсия скорости и калорий в час."""
+        offset = self.index.get((user_id, training_type))
+        if offset is None:
+            return 0, 0.0, 0.0, 0.0, 0.0
+        state: array = self.state
+        count: int = int(state[offset + COUNT])
+        divisor: int = max(count - 1, 1)
+        return (count,
+                state[offset + SPEED_MEAN], state[offset + SPEED_M2] / divisor,
+                state[offset + CALORIES_MEAN],
+                state[offset + CALORIES_M2] / divisor)
@@ -0,0 +1,327 @@
+"""Архивное хранение пакетов и результатов тренировок.
+Данные хранятся по колонкам в сжатых блоках. Для каждого блока
+записывается min/max каждой колонки, что позволяет пропускать блоки,
+не подходящие под фильтр. Колонки блока сжимаются независимо, поэтому
+чтение одной колонки не распаковывает остальные.
+"""
+import json
+import lzma
+import math
+import os
+import struct
+import zlib
+from array import array
+from typing import (BinaryIO, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Set, Tuple)
+
+from homework import InfoMessage, read_package
+from packages import INPUT_FIELDS, OUTPUT_FIELDS, normalize_code, unpack
+
+MAGIC: bytes = b'WKARCH1\n'  # сигнатура файла архива
+FOOTER_SIZE = struct.Struct('<Q')  # длина оглавления в конце файла
+
+COLUMNS: Tuple[str, ...] = (
+    ('type', 'timestamp') + INPUT_FIELDS + OUTPUT_FIELDS)
+OPTIONAL_COLUMNS: Tuple[str, ...] = ('timestamp',)  # могут не передаваться
+
+CODECS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+
+def _encode(name: str, values: list, dictionary: List[str]
+            ) -> Tuple[str, bytes]:
+    """Закодировать колонку блока.
+    Тип тренировки - словарное кодирование, целые счетчики - дельты,
+    остальное - float64 (отсутствующие значения - NaN).
+    """
+    if name == 'type':
+        codes: array = array('B')
+        for value in values:
+            if value not in dictionary:
+                dictionary.append(value)
+            codes.append(dictionary.index(value))
+        return 'dict', codes.tobytes()
+    if all(isinstance(v, int) for v in values):
+        deltas: array = array('q')
+        previous: int = 0
+        for value in values:
+            deltas.append(value - previous)
+            previous = value
+        return 'delta', deltas.tobytes()
+    return 'float', array('d', values).tobytes()
+
+
+def _decode(encoding: str, raw: bytes, dictionary: List[str]) -> list:
+    """Раскодировать колонку блока."""
+    if encoding == 'dict':
+        return [dictionary[code] for code in raw]
+    if encoding == 'delta':
+        deltas: array = array('q')
+        deltas.frombytes(raw)
+        values: List[int] = []
+        current: int = 0
+        for delta in deltas:
+            current += delta
+            values.append(current)
+        return values
+    floats: array = array('d')
+    floats.frombytes(raw)
+    return floats.tolist()
+
+
+def _stats(name: str, values: list) -> dict:
+    """Статистика колонки блока для пропуска блоков при чтении."""
+    if name == 'type':
+        return {'values': sorted(set(values))}
+    present = [v for v in values if not math.isnan(v)]
+    if not present:
+        return {'min': None, 'max': None}
+    return {'min': min(present), 'max': max(present)}
+
+
+def _may_match(stats: dict, condition) -> bool:
+    """Может ли блок со статистикой stats удовлетворить условию."""
+    if 'values' in stats:
+        return bool(set(stats['values']) & set(condition))
+    low, high = condition
+    if stats['min'] is None:
+        return False
+    if low is not None and stats['max'] < low:
+        return False
+    if high is not None and stats['min'] > high:
+        return False
+    return True
+
+
+def matches(value, condition) -> bool:
+    """Удовлетворяет ли значение условию фильтра."""
+    if isinstance(value, str):
+        return value in condition
+    low, high = condition
+    if value != value:  # NaN не проходит никакой фильтр
+        return False
+    return ((low is None or value >= low)
+            and (high is None or value <= high))
+
+
+class ArchiveWriter:
+    """Запись архива пакетов и результатов тренировок."""
+    BLOCK_SIZE: int = 65536  # строк в блоке по умолчанию
+
+    def __init__(self,
+                 path: str,  # путь к файлу архива
+                 block_size: Optional[int] = None,  # строк в блоке
+                 codec: str = 'zlib',  # алгоритм сжатия: zlib или lzma
+                 ) -> None:
+        if codec not in CODECS:
+            raise ValueError(f'Неизвестный алгоритм сжатия: {codec!r}')
+        self.path = path
+        self.block_size = block_size or self.BLOCK_SIZE
+        self.codec = codec
+        self._compress = CODECS[codec][0]
+        self._file: BinaryIO = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._buffer: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._blocks: List[dict] = []
+        self._dictionary: List[str] = []
+        self.rows: int = 0
+
+    def append(self,
+               workout_type: str,  # код тренировки
+               data: list,  # данные пакета
+               info: Optional[InfoMessage] = None,  # готовый результат
+               timestamp: float = math.nan,  # время тренировки, Unix
+               ) -> None:
+        """Добавить пакет и результат его обработки в архив.
+        Если результат не передан, он вычисляется через read_package.
+        """
+        fields: Dict[str, float] = unpack(workout_type, data)
+        if info is None:
+            info = read_package(workout_type, data).show_training_info()
+        buffer: Dict[str, list] = self._buffer
+        buffer['type'].append(normalize_code(workout_type))
+        buffer['timestamp'].append(timestamp)
+        for name in INPUT_FIELDS:
+            value = fields.get(name, math.nan)
+            buffer[name].append(value if name == 'action' else float(value))
+        buffer['distance'].append(float(info.distance))
+        buffer['speed'].append(float(info.speed))
+        buffer['calories'].append(float(info.calories))
+        self.rows += 1
+        if len(buffer['type']) >= self.block_size:
+            self.flush()
+
+    def extend(self, packages: Iterable[Tuple[str, list]]) -> None:
+        """Добавить в архив несколько пакетов."""
+        for workout_type, data in packages:
+            self.append(workout_type, data)
+
+    def append_columns(self, columns: Dict[str, list]) -> None:
+        """Добавить в архив уже разложенные по колонкам строки.
+        Нужны все колонки архива одинаковой длины, кроме необязательных:
+        вместо них записываются NaN.
+        """
+        missing: Set[str] = set(COLUMNS) - set(columns)
+        required: Set[str] = missing - set(OPTIONAL_COLUMNS)
+        if required:
+            raise KeyError(f'Не хватает колонок: {sorted(required)}')
+        if missing:
+            columns = dict(columns)
+            for name in missing:
+                columns[name] = [math.nan] * len(columns['type'])
+        lengths: Set[int] = {len(columns[name]) for name in COLUMNS}
+        if len(lengths) != 1:
+            raise ValueError('Колонки должны быть одинаковой длины')
+        rows: int = lengths.pop()
+        start: int = 0
+        while start < rows:
+            free: int = self.block_size - len(self._buffer['type'])
+            stop: int = min(rows, start + free)
+            for name in COLUMNS:
+                self._buffer[name].extend(columns[name][start:stop])
+            self.rows += stop - start
+            start = stop
+            if len(self._buffer['type']) >= self.block_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Записать накопленные строки отдельным блоком."""
+        rows: int = len(self._buffer['type'])
+        if not rows:
+            return
+        block: dict = {'rows': rows, 'columns': {}}
+        for name in COLUMNS:
+            values: list = self._buffer[name]
+            encoding, raw = _encode(name, values, self._dictionary)
+            compressed: bytes = self._compress(raw)
+            meta: dict = {
+                'offset': self._file.tell(),
+                'length': len(compressed),
+                'encoding': encoding,
+            }
+            meta.update(_stats(name, values))
+            self._file.write(compressed)
+            block['columns'][name] = meta
+            values.clear()
+        self._blocks.append(block)
+
+    def close(self) -> None:
+        """Дописать последний блок и оглавление, закрыть файл."""
+        if self._file.closed:
+            return
+        self.flush()
+        footer: bytes = json.dumps({
+            'codec': self.codec,
+            'columns': list(COLUMNS),
+            'dictionary': self._dictionary,
+            'blocks': self._blocks,
+        }).encode()
+        self._file.write(footer)
+        self._file.write(FOOTER_SIZE.pack(len(footer)))
+        self._file.write(MAGIC)
+        self._file.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ArchiveReader:
+    """Чтение архива пакетов и результатов тренировок.
+    Условия фильтра задаются словарем: для колонки type - набор кодов,
+    для числовых колонок - пара (минимум, максимум) включительно,
+    None означает отсутствие границы.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: BinaryIO = open(path, 'rb')
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f'{path} не является архивом тренировок')
+        tail: int = FOOTER_SIZE.size + len(MAGIC)
+        self._file.seek(-tail, 2)
+        (length,) = FOOTER_SIZE.unpack(self._file.read(FOOTER_SIZE.size))
+        self._file.seek(-tail - length, 2)
+        footer: dict = json.loads(self._file.read(length))
+        self.codec: str = footer['codec']
+        self._decompress = CODECS[self.codec][1]
+        self._dictionary: List[str] = footer['dictionary']
+        self.blocks: List[dict] = footer['blocks']
+        # в архивах без списка колонок нет необязательных колонок
+        self.columns: Tuple[str, ...] = tuple(footer.get('columns', [
+            name for name in COLUMNS if name not in OPTIONAL_COLUMNS]))
+
+    def __len__(self) -> int:
+        return sum(block['rows'] for block in self.blocks)
+
+    def block_stats(self, index: int, name: str) -> dict:
+        """Статистика колонки name в блоке index."""
+        return self.blocks[index]['columns'][name]
+
+    def skip_block(self, index: int, where: Optional[dict]) -> bool:
+        """Можно ли пропустить блок, не читая его данные."""
+        if not where:
+            return False
+        columns: dict = self.blocks[index]['columns']
+        return not all(_may_match(columns[name], condition)
+                       for name, condition in where.items())
+
+    def read_block(self, index: int, columns: Sequence[str]
+                   ) -> Dict[str, list]:
+        """Прочитать из блока только перечисленные колонки."""
+        result: Dict[str, list] = {}
+        for name in columns:
+            if name not in self.columns:
+                raise KeyError(f'Колонка {name!r} отсутствует в архиве')
+            meta: dict = self.blocks[index]['columns'][name]
+            # pread не сдвигает позицию файла: блоки можно читать из потоков
+            raw: bytes = self._decompress(os.pread(
+                self._file.fileno(), meta['length'], meta['offset']))
+            result[name] = _decode(meta['encoding'], raw, self._dictionary)
+        return result
+
+    def iter_blocks(self,
+                    columns: Sequence[str],  # колонки результата
+                    where: Optional[dict] = None,  # условия фильтра
+                    blocks: Optional[Iterable[int]] = None,  # номера блоков
+                    ) -> Iterator[Dict[str, list]]:
+        """Перебрать блоки, отфильтровав строки по условию.
+        Распаковываются только колонки результата и колонки фильтра.
+        """
+        where = where or {}
+        needed: List[str] = list(dict.fromkeys([*columns, *where]))
+        if blocks is None:
+            blocks = range(len(self.blocks))
+        for index in blocks:
+            if self.skip_block(index, where):
+                continue
+            data: Dict[str, list] = self.read_block(index, needed)
+            if where:
+                keep: List[int] = [
+                    row for row in range(self.blocks[index]['rows'])
+                    if all(matches(data[name][row], condition)
+                           for name, condition in where.items())]
+                data = {name: [data[name][row] for row in keep]
+                        for name in needed}
+            yield {name: data[name] for name in columns}
+
+    def read_column(self, name: str, where: Optional[dict] = None) -> list:
+        """Прочитать одну колонку из всех подходящих блоков."""
+        values: list = []
+        for data in self.iter_blocks([name], where):
+            values.extend(data[name])
+        return values
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,160 @@
+"""Колоночное хранение результатов тренировок.
+InfoMessageBatch хранит пять полей InfoMessage отдельными типизированными
+колонками: тип тренировки - номером в словаре типов (один байт),
+числа - float64. Срезы не копируют данные, а объекты InfoMessage
+создаются только при обращении к отдельным строкам.
+"""
+import math
+from array import array
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Union)
+
+from homework import InfoMessage
+
+FIELDS: tuple = ('duration', 'distance', 'speed', 'calories')
+
+
+class InfoMessageBatch:
+    """Набор результатов тренировок по колонкам."""
+
+    def __init__(self,
+                 codes: memoryview,  # номера типов в словаре, байты
+                 dictionary: List[str],  # названия типов тренировок
+                 columns: Dict[str, memoryview],  # числовые колонки
+                 ) -> None:
+        self.codes = codes
+        self.dictionary = dictionary
+        self.columns = columns
+
+    @classmethod
+    def from_columns(cls,
+                     training_types: Iterable[str],  # колонка типов
+                     duration: Iterable[float],
+                     distance: Iterable[float],
+                     speed: Iterable[float],
+                     calories: Iterable[float],
+                     ) -> 'InfoMessageBatch':
+        """Собрать набор из колонок значений."""
+        dictionary: List[str] = []
+        lookup: Dict[str, int] = {}
+        codes: array = array('B')
+        for training_type in training_types:
+            code: Optional[int] = lookup.get(training_type)
+            if code is None:
+                code = lookup[training_type] = len(dictionary)
+                dictionary.append(training_type)
+            codes.append(code)
+        columns: Dict[str, memoryview] = {
+            name: memoryview(array('d', values))
+            for name, values in zip(FIELDS,
+                                    (duration, distance, speed, calories))}
+        if any(len(column) != len(codes) for column in columns.values()):
+            raise ValueError('Колонки должны быть одинаковой длины')
+        return cls(memoryview(codes), dictionary, columns)
+
+    @classmethod
+    def from_messages(cls, infos: Iterable[InfoMessage]
+                      ) -> 'InfoMessageBatch':
+        """Собрать набор из объектов InfoMessage."""
+        infos = list(infos)
+        return cls.from_columns(
+            [info.training_type for info in infos],
+            [info.duration for info in infos],
+            [info.distance for info in infos],
+            [info.speed for info in infos],
+            [info.calories for info in infos])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getattr__(self, name: str) -> memoryview:
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def training_types(self) -> List[str]:
+        """Колонка типов тренировок в виде строк."""
+        dictionary: List[str] = self.dictionary
+        return [dictionary[code] for code in self.codes]
+
+    def message(self, row: int) -> InfoMessage:
+        """Создать InfoMessage для одной строки."""
+        columns: Dict[str, memoryview] = self.columns
+        return InfoMessage(self.dictionary[self.codes[row]],
+                           *(columns[name][row] for name in FIELDS))
+
+    def __getitem__(self, item: Union[int, slice]
+                    ) -> Union[InfoMessage, 'InfoMessageBatch']:
+        """Строка - InfoMessage, срез - набор без копирования данных."""
+        if isinstance(item, slice):
+            return InfoMessageBatch(
+                self.codes[item], self.dictionary,
+                {name: column[item] for name, column in self.columns.items()})
+        return self.message(item)
+
+    def __iter__(self) -> Iterator[InfoMessage]:
+        for row in range(len(self)):
+            yield self.message(row)
+
+    def to_messages(self) -> List[InfoMessage]:
+        return list(self)
+
+    def take(self, rows: Sequence[int]) -> 'InfoMessageBatch':
+        """Новый набор из строк с номерами rows (с копированием)."""
+        codes: array = array('B', [self.codes[row] for row in rows])
+        columns: Dict[str, memoryview] = {
+            name: memoryview(array('d', [column[row] for row in rows]))
+            for name, column in self.columns.items()}
+        return InfoMessageBatch(memoryview(codes), self.dictionary, columns)
+
+    def filter(self, mask: Sequence[bool]) -> 'InfoMessageBatch':
+        """Строки, для которых mask истинна."""
+        return self.take([row for row, keep in enumerate(mask) if keep])
+
+    def where(self,
+              column: str,  # числовая колонка
+              predicate: Callable[[float], bool],  # условие на значение
+              ) -> 'InfoMessageBatch':
+        """Строки, значение колонки которых удовлетворяет условию."""
+        return self.filter([predicate(value)
+                            for value in self.columns[column]])
+
+    def of_type(self, *training_types: str) -> 'InfoMessageBatch':
+        """Строки указанных типов тренировок."""
+        wanted = {code for code, name in enumerate(self.dictionary)
+                  if name in training_types}
+        return self.filter([code in wanted for code in self.codes])
+
+    def sort(self, column: str, reverse: bool = False) -> 'InfoMessageBatch':
+        """Набор, отсортированный по колонке (тип - по названию)."""
+        if column == 'training_type':
+            keys: Sequence = self.training_types
+        else:
+            keys = self.columns[column]
+        order: List[int] = sorted(range(len(self)), key=keys.__getitem__,
+                                  reverse=reverse)
+        return self.take(order)
+
+    def sum(self, column: str) -> float:
+        return math.fsum(self.columns[column])
+
+    def mean(self, column: str) -> float:
+        return self.sum(column) / len(self) if len(self) else math.nan
+
+    def group_by_type(self, how: str = 'sum') -> Dict[str, Dict[str, float]]:
+        """Сумма (how='sum') или среднее (how='mean') колонок по типам."""
+        if how not in ('sum', 'mean'):
+            raise ValueError(f'Неизвестная агрегация: {how!r}')
+        groups: Dict[int, List[int]] = {}
+        for row, code in enumerate(self.codes):
+            groups.setdefault(code, []).append(row)
+        result: Dict[str, Dict[str, float]] = {}
+        for code, rows in sorted(groups.items()):
+            values: Dict[str, float] = {}
+            for name, column in self.columns.items():
+                total: float = math.fsum(column[row] for row in rows)
+                values[name] = total / len(rows) if how == 'mean' else total
+            result[self.dictionary[code]] = values
+        return result
@@ -0,0 +1,66 @@
+"""Моделирование смешанной нагрузки на планировщик микропачек.
+Фоновая загрузка истории ставит в очередь сразу много пакетов, а
+интерактивные устройства присылают по одному пакету с заданной частотой
+и ждут ответа. Для каждой настройки планировщика печатаются задержки
+интерактивных пакетов и пропускная способность фоновой загрузки.
+Запуск из корня проекта:
+python -m benchmarks.bench_scheduler --bulk 500000 --rate 200
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from scheduler import MicroBatchScheduler
+from workload import WorkloadGenerator
+
+CASES: Dict[str, dict] = {
+    'по одному пакету': {'min_batch': 1, 'max_batch': 1},
+    'постоянная пачка 8192': {'min_batch': 8192, 'max_batch': 8192,
+                              'max_wait': 0.01},
+    'адаптивная пачка': {},
+}
+
+
+def simulate(options: dict, bulk: list, interactive: list, rate: float
+             ) -> Dict[str, float]:
+    """Прогнать нагрузку через планировщик с настройками options."""
+    pause = random.Random(0)
+    with MicroBatchScheduler(**options) as planner:
+        started: float = time.perf_counter()
+        futures = planner.submit_many(bulk)
+        for workout_type, data in interactive:
+            planner.submit(workout_type, data, interactive=True).result()
+            time.sleep(pause.expovariate(rate))
+        futures[-1].result()
+        elapsed: float = time.perf_counter() - started
+        state: dict = planner.snapshot()
+    return {
+        'p50': state['interactive_p50'] * 1000,
+        'p99': state['interactive_p99'] * 1000,
+        'bulk_per_second': len(bulk) / elapsed,
+        'mean_batch': state['mean_batch'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bulk', type=int, default=200_000)
+    parser.add_argument('--interactive', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=200.0,
+                        help='интерактивных пакетов в секунду')
+    arguments = parser.parse_args()
+    generator: WorkloadGenerator = WorkloadGenerator(seed=0)
+    bulk: List[tuple] = list(generator.tuples(arguments.bulk))
+    interactive: List[tuple] = list(generator.tuples(arguments.interactive))
+    print(f'{"настройка":<24} {"p50, мс":>9} {"p99, мс":>9} '
+          f'{"фоновых/с":>11} {"пачка":>8}')
+    for name, options in CASES.items():
+        result = simulate(options, bulk, interactive, arguments.rate)
+        print(f'{name:<24} {result["p50"]:>9.2f} {result["p99"]:>9.2f} '
+              f'{result["bulk_per_second"]:>11.0f} '
+              f'{result["mean_batch"]:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
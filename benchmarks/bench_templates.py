@@ -0,0 +1,34 @@
+"""Сравнение скорости вывода сообщений: get_message и собранные шаблоны.
+Запуск из корня проекта:
+python -m benchmarks.bench_templates [количество сообщений]
+"""
+import sys
+import timeit
+
+from homework import read_package
+from templates import render_many
+from workload import WorkloadGenerator
+
+
+def main(count: int = 200_000) -> None:
+    generator: WorkloadGenerator = WorkloadGenerator(seed=0)
+    infos = [read_package(*package).show_training_info()
+             for package in generator.tuples(count)]
+    cases = {
+        'InfoMessage.get_message': lambda: [i.get_message() for i in infos],
+        'render_many ru/metric': lambda: render_many(infos),
+        'render_many en/metric': lambda: render_many(infos, 'en'),
+        'render_many de/imperial': lambda: render_many(infos, 'de',
+                                                       'imperial'),
+    }
+    baseline: float = 0.0
+    for name, case in cases.items():
+        seconds: float = min(timeit.repeat(case, number=1, repeat=3))
+        baseline = baseline or seconds
+        print(f'{name:<26} {seconds:8.3f} с  '
+              f'{count / seconds / 1e6:6.2f} млн/с  '
+              f'x{baseline / seconds:.2f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
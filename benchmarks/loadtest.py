@@ -0,0 +1,94 @@
+"""Нагрузочный тест HTTP-сервера тренировок.
+Отправляет пакеты из WorkloadGenerator пачками разного размера по
+постоянным соединениям и печатает задержки p50/p99 для каждого размера.
+Без --url поднимает локальный сервер.
+Запуск из корня проекта:
+python -m benchmarks.loadtest --sizes 1 100 1000 --requests 200
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from server import NDJSON, start_server
+from workload import WorkloadGenerator
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered: List[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def run_client(url: str, body: bytes, requests: int, ndjson: bool,
+               latencies: List[float], errors: List[int]) -> None:
+    """Один клиент: requests запросов по одному соединению."""
+    address = urlsplit(url)
+    connection = http.client.HTTPConnection(address.hostname, address.port)
+    headers: Dict[str, str] = {'Content-Type': 'application/json'}
+    if ndjson:
+        headers['Accept'] = NDJSON
+    for _ in range(requests):
+        started: float = time.perf_counter()
+        connection.request('POST', '/batch', body, headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+
+def load_test(url: str, size: int, requests: int, clients: int,
+              ndjson: bool = False) -> Dict[str, float]:
+    """Задержки запросов с пачками по size пакетов."""
+    generator: WorkloadGenerator = WorkloadGenerator(seed=size)
+    body: bytes = json.dumps(list(generator.tuples(size))).encode()
+    latencies: List[float] = []
+    errors: List[int] = []
+    threads = [threading.Thread(target=run_client,
+                                args=(url, body, requests // clients,
+                                      ndjson, latencies, errors))
+               for _ in range(clients)]
+    started: float = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed: float = time.perf_counter() - started
+    return {
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'mean': statistics.fmean(latencies) * 1000,
+        'packages_per_second': size * len(latencies) / elapsed,
+        'errors': len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1, 10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--ndjson', action='store_true')
+    arguments = parser.parse_args()
+    url: str = arguments.url
+    if url is None:
+        url = start_server(max_concurrent=arguments.clients).url
+    print(f'{"пачка":>7} {"p50, мс":>9} {"p99, мс":>9} {"пакетов/с":>11}'
+          f' {"ошибок":>7}')
+    for size in arguments.sizes:
+        result = load_test(url, size, arguments.requests, arguments.clients,
+                           arguments.ndjson)
+        print(f'{size:>7} {result["p50"]:>9.2f} {result["p99"]:>9.2f} '
+              f'{result["packages_per_second"]:>11.0f} '
+              f'{result["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
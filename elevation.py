@@ -0,0 +1,166 @@
+"""Учет рельефа для бега и спортивной ходьбы.
+Формулы Running и SportsWalking считают трассу ровной. По профилю высот
+трассы вычисляется эквивалентная по затратам ровная дистанция: каждый
+участок умножается на отношение затрат энергии на подъеме (полиномы
+Минетти для бега и ходьбы) к затратам на ровной поверхности. Тренировка
+пересчитывается стандартными формулами так, как если бы пользователь
+прошел эквивалентную дистанцию за то же время.
+"""
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from homework import InfoMessage, read_package
+from packages import normalize_code
+
+# коэффициенты полинома затрат энергии от уклона, от i^5 до i^0, Дж/кг/м
+COST_POLYNOMIALS: Dict[str, Tuple[float, ...]] = {
+    'RUN': (155.4, -30.4, -43.3, 46.3, 19.5, 3.6),
+    'WLK': (280.5, -58.7, -76.8, 51.9, 19.6, 2.5),
+}
+MAX_GRADE: float = 0.45  # уклон, на котором полиномы еще применимы
+
+
+def cost_factor(grade: float, workout_type: str = 'RUN') -> float:
+    """Во сколько раз затраты на уклоне grade больше, чем на ровном месте."""
+    polynomial: Tuple[float, ...] = COST_POLYNOMIALS[workout_type]
+    grade = max(-MAX_GRADE, min(MAX_GRADE, grade))
+    cost: float = 0.0
+    for coefficient in polynomial:
+        cost = cost * grade + coefficient
+    return cost / polynomial[-1]
+
+
+class Segment:
+    """Участок трассы фиксированной длины."""
+    __slots__ = ('start', 'horizontal', 'adjusted', 'climb', 'descent')
+
+    def __init__(self, start: float) -> None:
+        self.start = start  # начало участка, м от старта
+        self.horizontal: float = 0.0  # длина по горизонтали, м
+        self.adjusted: float = 0.0  # эквивалентная ровная длина, м
+        self.climb: float = 0.0  # набор высоты, м
+        self.descent: float = 0.0  # сброс высоты, м
+
+    @property
+    def grade(self) -> float:
+        """Средний уклон участка."""
+        if not self.horizontal:
+            return 0.0
+        return (self.climb - self.descent) / self.horizontal
+
+    def __repr__(self) -> str:
+        return (f'Segment(start={self.start}, horizontal={self.horizontal:.1f}'
+                f', adjusted={self.adjusted:.1f}, grade={self.grade:.3f})')
+
+
+class ElevationProfile:
+    """Профиль высот, принимаемый порциями.
+    Высоты сглаживаются скользящим средним по smoothing последним
+    точкам, поэтому результат не зависит от разбиения на порции.
+    """
+
+    def __init__(self,
+                 workout_type: str = 'RUN',  # RUN или WLK
+                 smoothing: int = 5,  # точек в скользящем среднем
+                 segment_length: float = 1000.0,  # длина участка, м
+                 ) -> None:
+        self.workout_type: str = normalize_code(workout_type)
+        if self.workout_type not in COST_POLYNOMIALS:
+            raise ValueError('Рельеф учитывается только для бега и ходьбы')
+        self.smoothing = smoothing
+        self.segment_length = segment_length
+        self.horizontal: float = 0.0
+        self.adjusted: float = 0.0
+        self.climb: float = 0.0
+        self.descent: float = 0.0
+        self.segments: Dict[int, Segment] = {}
+        self._window: Deque[float] = deque(maxlen=smoothing)
+        self._window_sum: float = 0.0
+        self._last: Optional[Tuple[float, float]] = None  # точка, высота
+
+    def _smooth(self, altitudes: Sequence[float]) -> List[float]:
+        """Скользящее среднее с учетом хвоста предыдущей порции."""
+        window: Deque[float] = self._window
+        result: List[float] = []
+        total: float = self._window_sum
+        for altitude in altitudes:
+            if len(window) == window.maxlen:
+                total -= window[0]
+            window.append(altitude)
+            total += altitude
+            result.append(total / len(window))
+        self._window_sum = total
+        return result
+
+    def feed(self,
+             distances: Sequence[float],  # пройдено от старта, м
+             altitudes: Sequence[float],  # высота, м
+             ) -> None:
+        """Учесть очередную порцию точек профиля."""
+        if len(distances) != len(altitudes):
+            raise ValueError('Колонки профиля должны быть одинаковой длины')
+        smoothed: List[float] = self._smooth(altitudes)
+        points: List[float] = list(distances)
+        if self._last is not None:
+            points.insert(0, self._last[0])
+            smoothed.insert(0, self._last[1])
+        if not points:
+            return
+        self._last = (points[-1], smoothed[-1])
+        steps: List[float] = [b - a for a, b in zip(points, points[1:])]
+        rises: List[float] = [b - a for a, b in zip(smoothed, smoothed[1:])]
+        factors: List[float] = [
+            cost_factor(rise / step, self.workout_type) if step > 0 else 1.0
+            for step, rise in zip(steps, rises)]
+        for start, step, rise, factor in zip(points, steps, rises, factors):
+            if step <= 0:
+                continue
+            length: float = math.hypot(step, rise) * factor
+            number: int = int(start // self.segment_length)
+            segment: Optional[Segment] = self.segments.get(number)
+            if segment is None:
+                segment = self.segments[number] = Segment(
+                    number * self.segment_length)
+            segment.horizontal += step
+            segment.adjusted += length
+            if rise > 0:
+                segment.climb += rise
+            else:
+                segment.descent -= rise
+        self.horizontal += math.fsum(s for s in steps if s > 0)
+        self.adjusted = math.fsum(s.adjusted for s in self.segments.values())
+        self.climb = math.fsum(s.climb for s in self.segments.values())
+        self.descent = math.fsum(s.descent for s in self.segments.values())
+
+    @property
+    def ratio(self) -> float:
+        """Отношение эквивалентной ровной дистанции к горизонтальной."""
+        return self.adjusted / self.horizontal if self.horizontal else 1.0
+
+    def breakdown(self) -> List[Segment]:
+        """Участки трассы по порядку."""
+        return [self.segments[number] for number in sorted(self.segments)]
+
+
+def grade_adjusted_info(workout_type: str,  # RUN или WLK
+                        data: list,  # данные пакета для read_package
+                        distances: Sequence[float],  # профиль: метры
+                        altitudes: Sequence[float],  # профиль: высоты
+                        smoothing: int = 5,  # точек в скользящем среднем
+                        chunk_size: int = 10000,  # точек в порции
+                        segment_length: float = 1000.0,  # длина участка
+                        ) -> Tuple[InfoMessage, List[Segment]]:
+    """Результат тренировки с учетом рельефа и разбивка по участкам.
+    Количество действий масштабируется на отношение эквивалентной
+    дистанции к горизонтальной, остальное считают классы тренировок.
+    """
+    profile: ElevationProfile = ElevationProfile(workout_type, smoothing,
+                                                 segment_length)
+    for start in range(0, len(distances), chunk_size):
+        profile.feed(distances[start:start + chunk_size],
+                     altitudes[start:start + chunk_size])
+    adjusted: list = [data[0] * profile.ratio, *data[1:]]
+    info: InfoMessage = read_package(workout_type, adjusted
+                                     ).show_training_info()
+    return info, profile.breakdown()
@@ -0,0 +1,278 @@
+"""Проверка совпадения путей расчета с эталонными классами.
+Случайные пакеты, среди которых есть крайние значения (очень короткие
+тренировки, огромное число шагов, один метр бассейна), считаются
+классами Running, SportsWalking и Swimming и каждым альтернативным
+путем расчета, включая пересчет блоков архива и расчет строк запроса.
+Для каждого пути записываются расхождения сверх допуска и время
+расчета, поэтому тесты ловят как ошибки, так и замедления.
+Отчет по всем путям:
+python equivalence.py [количество пакетов] [seed]
+"""
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import query
+import recompute
+from formulas import PERSONAL, compute, default_coefficients
+from homework import read_package
+from packages import (INPUT_FIELDS, OUTPUT_FIELDS, PACKAGE_FIELDS,
+                      normalize_code, unpack)
+from personal import CoefficientStore, PersonalCoefficients
+from scheduler import compute_batch
+from simulation import simulate
+
+TOLERANCE: float = 1e-12  # допустимая относительная погрешность
+# во сколько раз путь может быть медленнее эталона на той же пачке;
+# simulation строит сетку из одной точки на каждый пакет (разбор
+# параметров, itertools.product, массивы результатов) - около 12 раз
+# на 20000 пакетов; путь нужен для проверки чисел, а не скорости
+MAX_SLOWDOWN: Dict[str, float] = {
+    'formulas': 2.0,
+    'coefficient_columns': 2.0,
+    'personal': 3.0,
+    'micro_batch': 2.0,
+    'simulation': 15.0,
+    'recompute': 2.0,
+    'query': 2.0,
+}
+Result = Tuple[float, float, float]  # дистанция, скорость, калории
+
+# обычные и крайние значения полей пакета
+SAMPLERS: Dict[str, Tuple[Callable, Callable]] = {
+    'action': (lambda rng: rng.randint(100, 30000),
+               lambda rng: rng.choice([1, 10 ** rng.randint(7, 15)])),
+    'duration': (lambda rng: rng.uniform(0.1, 5.0),
+                 lambda rng: rng.choice([10 ** -rng.uniform(3, 9), 1000])),
+    'weight': (lambda rng: rng.uniform(30.0, 150.0),
+               lambda rng: rng.choice([1, 500])),
+    'height': (lambda rng: rng.uniform(100.0, 220.0),
+               lambda rng: rng.choice([1, 300])),
+    'length_pool': (lambda rng: rng.choice([25, 50]),
+                    lambda rng: rng.choice([1, 1000])),
+    'count_pool': (lambda rng: rng.randint(1, 100),
+                   lambda rng: rng.choice([0, 10 ** 6])),
+}
+
+
+def random_packages(count: int, seed: int = 0, edge_share: float = 0.2
+                    ) -> List[Tuple[str, list]]:
+    """Случайные пакеты; каждое поле с вероятностью edge_share крайнее."""
+    rng: random.Random = random.Random(seed)
+    codes: List[str] = sorted(PACKAGE_FIELDS)
+    packages: List[Tuple[str, list]] = []
+    for _ in range(count):
+        code: str = rng.choice(codes)
+        data: list = [SAMPLERS[field][rng.random() < edge_share](rng)
+                      for field in PACKAGE_FIELDS[code]]
+        packages.append((code, data))
+    return packages
+
+
+def _group(packages: Sequence[Tuple[str, list]]
+           ) -> Dict[str, Tuple[List[int], Dict[str, list]]]:
+    """Номера пакетов и колонки их полей по типам тренировок."""
+    groups: Dict[str, Tuple[List[int], Dict[str, list]]] = {}
+    for index, (workout_type, data) in enumerate(packages):
+        code: str = normalize_code(workout_type)
+        indexes, columns = groups.setdefault(
+            code, ([], {field: [] for field in PACKAGE_FIELDS[code]}))
+        indexes.append(index)
+        for field, value in unpack(code, data).items():
+            columns[field].append(value)
+    return groups
+
+
+def _columnar(packages: Sequence[Tuple[str, list]],
+              calculate: Callable[[str, List[int], Dict[str, list]], dict],
+              ) -> List[Result]:
+    results: List[Optional[Result]] = [None] * len(packages)
+    for code, (indexes, columns) in _group(packages).items():
+        computed: dict = calculate(code, indexes, columns)
+        for index, row in zip(indexes, zip(computed['distance'],
+                                           computed['speed'],
+                                           computed['calories'])):
+            results[index] = row
+    return results
+
+
+def run_reference(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """Эталон: объекты классов тренировок по одному."""
+    results: List[Result] = []
+    for workout_type, data in packages:
+        info = read_package(workout_type, data).show_training_info()
+        results.append((info.distance, info.speed, info.calories))
+    return results
+
+
+def run_formulas(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """formulas.compute по колонкам каждого типа."""
+    return _columnar(packages, lambda code, indexes, columns:
+                     compute(code, columns))
+
+
+def run_coefficient_columns(packages: Sequence[Tuple[str, list]]
+                            ) -> List[Result]:
+    """formulas.compute с персональными коэффициентами колонками."""
+    defaults: Dict[str, Dict[str, float]] = default_coefficients()
+
+    def calculate(code: str, indexes: List[int], columns: dict) -> dict:
+        for name in PERSONAL[code]:
+            columns[name] = [defaults[code][name]] * len(indexes)
+        return compute(code, columns)
+
+    return _columnar(packages, calculate)
+
+
+def run_personal(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """PersonalCoefficients: хранилище, кеш и присоединение колонок."""
+    with CoefficientStore() as store:
+        personal: PersonalCoefficients = PersonalCoefficients(store)
+        return _columnar(packages, lambda code, indexes, columns:
+                         personal.compute([f'user{index % 100}'
+                                           for index in indexes],
+                                          code, columns))
+
+
+def run_micro_batch(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """scheduler.compute_batch - расчет микропачки планировщика."""
+    return [(info.distance, info.speed, info.calories)
+            for info in compute_batch(packages)]
+
+
+def run_simulation(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """simulation.simulate: каждый пакет - сетка из одной точки."""
+    results: List[Result] = []
+    for workout_type, data in packages:
+        point = simulate(workout_type, **unpack(workout_type, data))
+        results.append((point.distance[0], point.speed[0],
+                        point.calories[0]))
+    return results
+
+
+def _block(packages: Sequence[Tuple[str, list]]) -> Dict[str, list]:
+    """Колонки пакетов в виде блока архива: поля, которых нет у типа
+    тренировки, и результаты заполнены NaN.
+    """
+    data: Dict[str, list] = {
+        name: [math.nan] * len(packages)
+        for name in (*INPUT_FIELDS, *OUTPUT_FIELDS)}
+    data['type'] = []
+    for row, (workout_type, values) in enumerate(packages):
+        code: str = normalize_code(workout_type)
+        data['type'].append(code)
+        for field, value in unpack(code, values).items():
+            data[field][row] = value
+    return data
+
+
+def _rows(columns: Dict[str, Sequence[float]]) -> List[Result]:
+    return list(zip(columns['distance'], columns['speed'],
+                    columns['calories']))
+
+
+def run_recompute(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """recompute.recompute_block: пересчет блока архива целиком."""
+    data: Dict[str, list] = _block(packages)
+    outputs: Dict[str, Tuple[str, ...]] = dict.fromkeys(
+        set(data['type']), OUTPUT_FIELDS)
+    return _rows(recompute.recompute_block(
+        data, outputs, default_coefficients(), OUTPUT_FIELDS))
+
+
+def run_query(packages: Sequence[Tuple[str, list]]) -> List[Result]:
+    """query.derive: результаты строк, прошедших фильтр запроса."""
+    return _rows(query.derive(_block(packages), OUTPUT_FIELDS,
+                              default_coefficients()))
+
+
+ENGINES: Dict[str, Callable[[Sequence[Tuple[str, list]]], List[Result]]] = {
+    'formulas': run_formulas,
+    'coefficient_columns': run_coefficient_columns,
+    'personal': run_personal,
+    'micro_batch': run_micro_batch,
+    'simulation': run_simulation,
+    'recompute': run_recompute,
+    'query': run_query,
+}
+
+
+def relative_error(expected: float, actual: float) -> float:
+    """Относительная погрешность; бесконечности и NaN - только точно."""
+    if expected == actual or (expected != expected and actual != actual):
+        return 0.0
+    if not (math.isfinite(expected) and math.isfinite(actual)):
+        return math.inf
+    return abs(actual - expected) / max(abs(expected), math.ulp(0.0))
+
+
+class EngineReport:
+    """Результат сравнения одного пути расчета с эталоном."""
+
+    def __init__(self, name: str, rows: int, seconds: float) -> None:
+        self.name = name
+        self.rows = rows
+        self.seconds = seconds  # лучшее время расчета всех пакетов
+        self.max_error: float = 0.0
+        # расхождения: номер пакета, пакет, эталон, результат пути
+        self.mismatches: List[Tuple[int, tuple, Result, Result]] = []
+
+    def slowdown(self, reference: 'EngineReport') -> float:
+        """Во сколько раз путь медленнее эталона."""
+        return self.seconds / reference.seconds
+
+    @property
+    def per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else math.inf
+
+    def __repr__(self) -> str:
+        return (f'EngineReport({self.name!r}, {self.per_second:.0f}/с, '
+                f'max_error={self.max_error:.3g}, '
+                f'mismatches={len(self.mismatches)})')
+
+
+def _timed(engine: Callable, packages: Sequence[Tuple[str, list]],
+           repeat: int) -> Tuple[List[Result], float]:
+    best: float = math.inf
+    results: List[Result] = []
+    for _ in range(repeat):
+        started: float = time.perf_counter()
+        results = engine(packages)
+        best = min(best, time.perf_counter() - started)
+    return results, best
+
+
+def compare(packages: Sequence[Tuple[str, list]],
+            engines: Optional[Sequence[str]] = None,  # по умолчанию все
+            tolerance: float = TOLERANCE,
+            repeat: int = 1,  # запусков для замера времени
+            ) -> Dict[str, EngineReport]:
+    """Сравнить пути расчета с эталоном, первым в отчете - эталон."""
+    expected, seconds = _timed(run_reference, packages, repeat)
+    reports: Dict[str, EngineReport] = {
+        'reference': EngineReport('reference', len(packages), seconds)}
+    for name in engines or ENGINES:
+        results, seconds = _timed(ENGINES[name], packages, repeat)
+        report: EngineReport = EngineReport(name, len(packages), seconds)
+        for index, (wanted, actual) in enumerate(zip(expected, results)):
+            error: float = max(relative_error(a, b)
+                               for a, b in zip(wanted, actual))
+            report.max_error = max(report.max_error, error)
+            if error > tolerance:
+                report.mismatches.append(
+                    (index, packages[index], wanted, actual))
+        reports[name] = report
+    return reports
+
+
+if __name__ == '__main__':
+    count, seed = (list(map(int, sys.argv[1:])) + [20000, 0])[:2]
+    reports = compare(random_packages(count, seed), repeat=3)
+    print(f'{"путь":<20} {"пакетов/с":>11} {"медленнее":>9} '
+          f'{"погрешность":>11} {"расхождений":>11}')
+    for report in reports.values():
+        print(f'{report.name:<20} {report.per_second:>11.0f} '
+              f'{report.slowdown(reports["reference"]):>8.2f}x '
+              f'{report.max_error:>11.2g} {len(report.mismatches):>11}')
@@ -0,0 +1,237 @@
+"""Версионированные формулы расчета тренировок по колонкам.
+Формулы повторяют методы классов из homework.py операция в операцию,
+поэтому результаты совпадают с эталонными до последнего бита.
+Коэффициенты формул берутся из констант классов и могут быть
+переопределены в новых версиях или колонками для каждой строки.
+"""
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from homework import Running, SportsWalking, Swimming
+from packages import OUTPUT_FIELDS, normalize_code
+
+TRAINING_CLASSES: Dict[str, type] = {
+    'WLK': SportsWalking,
+    'RUN': Running,
+    'SWM': Swimming,
+}
+
+# какие коэффициенты участвуют в расчете каждого результата
+DEPENDENCIES: Dict[str, Dict[str, Set[str]]] = {
+    'RUN': {
+        'distance': {'LEN_STEP', 'M_IN_KM'},
+        'speed': {'LEN_STEP', 'M_IN_KM'},
+        'calories': {'LEN_STEP', 'M_IN_KM', 'MIN_IN_H',
+                     'CALORIES_MEAN_SPEED_MULTIPLIER',
+                     'CALORIES_MEAN_SPEED_SHIFT'},
+    },
+    'WLK': {
+        'distance': {'LEN_STEP', 'M_IN_KM'},
+        'speed': {'LEN_STEP', 'M_IN_KM'},
+        'calories': {'LEN_STEP', 'M_IN_KM', 'MIN_IN_H',
+                     'CALORIES_WEIGHT_MULTIPLIER',
+                     'CALORIES_MEAN_SPEED_MULTIPLIER',
+                     'CALORIES_SPEED_HEIGHT_MULTIPLIER',
+                     'KMH_IN_MSEC', 'CM_IN_M'},
+    },
+    'SWM': {
+        'distance': {'LEN_STEP', 'M_IN_KM'},
+        'speed': {'M_IN_KM'},
+        'calories': {'M_IN_KM', 'CALORIES_MEAN_SPEED_SHIFT',
+                     'CALORIES_WEIGHT_MULTIPLIER'},
+    },
+}
+
+
+# коэффициенты, которые можно задать для каждого пользователя отдельно
+PERSONAL: Dict[str, Tuple[str, ...]] = {
+    'RUN': ('LEN_STEP', 'CALORIES_MEAN_SPEED_MULTIPLIER',
+            'CALORIES_MEAN_SPEED_SHIFT'),
+    'WLK': ('LEN_STEP', 'CALORIES_WEIGHT_MULTIPLIER',
+            'CALORIES_MEAN_SPEED_MULTIPLIER',
+            'CALORIES_SPEED_HEIGHT_MULTIPLIER'),
+    'SWM': ('LEN_STEP', 'CALORIES_MEAN_SPEED_SHIFT',
+            'CALORIES_WEIGHT_MULTIPLIER'),
+}
+
+
+def default_coefficients() -> Dict[str, Dict[str, float]]:
+    """Коэффициенты формул, заданные в классах тренировок."""
+    coefficients: Dict[str, Dict[str, float]] = {}
+    for code, outputs in DEPENDENCIES.items():
+        names: Set[str] = set().union(*outputs.values())
+        training: type = TRAINING_CLASSES[code]
+        coefficients[code] = {name: getattr(training, name)
+                              for name in sorted(names)}
+    return coefficients
+
+
+def _column(c: dict, columns: dict, name: str) -> Iterable[float]:
+    """Коэффициент по строкам: колонка, если задана, иначе общее значение."""
+    if name in columns:
+        return columns[name]
+    return repeat(c[name])
+
+
+def _running(c: dict, columns: dict, outputs: Iterable[str]) -> dict:
+    distance: List[float] = [
+        action * step / c['M_IN_KM']
+        for action, step in zip(columns['action'],
+                                _column(c, columns, 'LEN_STEP'))]
+    speed: List[float] = [d / t for d, t in
+                          zip(distance, columns['duration'])]
+    result: dict = {'distance': distance, 'speed': speed}
+    if 'calories' in outputs:
+        result['calories'] = [
+            ((multiplier * s + shift) * w
+             / c['M_IN_KM'] * t * c['MIN_IN_H'])
+            for s, w, t, multiplier, shift in zip(
+                speed, columns['weight'], columns['duration'],
+                _column(c, columns, 'CALORIES_MEAN_SPEED_MULTIPLIER'),
+                _column(c, columns, 'CALORIES_MEAN_SPEED_SHIFT'))]
+    return result
+
+
+def _walking(c: dict, columns: dict, outputs: Iterable[str]) -> dict:
+    distance: List[float] = [
+        action * step / c['M_IN_KM']
+        for action, step in zip(columns['action'],
+                                _column(c, columns, 'LEN_STEP'))]
+    speed: List[float] = [d / t for d, t in
+                          zip(distance, columns['duration'])]
+    result: dict = {'distance': distance, 'speed': speed}
+    if 'calories' in outputs:
+        result['calories'] = [
+            ((weight_multiplier * w)
+             + ((s * c['KMH_IN_MSEC'])
+                ** power
+                / (h / c['CM_IN_M']))
+             * height_multiplier
+             * w) * t * c['MIN_IN_H']
+            for s, w, h, t, weight_multiplier, power, height_multiplier
+            in zip(speed, columns['weight'], columns['height'],
+                   columns['duration'],
+                   _column(c, columns, 'CALORIES_WEIGHT_MULTIPLIER'),
+                   _column(c, columns, 'CALORIES_MEAN_SPEED_MULTIPLIER'),
+                   _column(c, columns, 'CALORIES_SPEED_HEIGHT_MULTIPLIER'))]
+    return result
+
+
+def _swimming(c: dict, columns: dict, outputs: Iterable[str]) -> dict:
+    result: dict = {}
+    if 'distance' in outputs:
+        result['distance'] = [
+            action * step / c['M_IN_KM']
+            for action, step in zip(columns['action'],
+                                    _column(c, columns, 'LEN_STEP'))]
+    speed: List[float] = [
+        length * count / c['M_IN_KM'] / t
+        for length, count, t in zip(columns['length_pool'],
+                                    columns['count_pool'],
+                                    columns['duration'])]
+    result['speed'] = speed
+    if 'calories' in outputs:
+        result['calories'] = [
+            (s + shift) * (multiplier * w * t)
+            for s, w, t, shift, multiplier in zip(
+                speed, columns['weight'], columns['duration'],
+                _column(c, columns, 'CALORIES_MEAN_SPEED_SHIFT'),
+                _column(c, columns, 'CALORIES_WEIGHT_MULTIPLIER'))]
+    return result
+
+
+FORMULAS = {'RUN': _running, 'WLK': _walking, 'SWM': _swimming}
+
+
+def compute(workout_type: str,  # код тренировки
+            columns: Dict[str, list],  # входные колонки пакетов
+            coefficients: Optional[Dict[str, float]] = None,
+            outputs: Iterable[str] = OUTPUT_FIELDS,  # нужные результаты
+            ) -> Dict[str, List[float]]:
+    """Рассчитать результаты для колонок пакетов одного типа тренировки.
+    Без coefficients используются константы классов. Персональные
+    коэффициенты (PERSONAL) можно передать колонками среди columns -
+    тогда для каждой строки берется свое значение.
+    """
+    code: str = normalize_code(workout_type)
+    if coefficients is None:
+        coefficients = default_coefficients()[code]
+    fixed: Set[str] = (set(columns) & set(coefficients)) - set(PERSONAL[code])
+    if fixed:
+        raise ValueError(f'Коэффициенты {sorted(fixed)} нельзя задавать '
+                         'по строкам')
+    outputs = tuple(outputs)
+    result: dict = FORMULAS[code](coefficients, columns, outputs)
+    return {name: result[name] for name in outputs}
+
+
+class FormulaVersion:
+    """Версия формул: набор коэффициентов для каждого типа тренировки."""
+
+    def __init__(self,
+                 version: str,  # название версии
+                 coefficients: Dict[str, Dict[str, float]],
+                 ) -> None:
+        self.version = version
+        self.coefficients = coefficients
+
+    def changed(self, other: 'FormulaVersion') -> Dict[str, Set[str]]:
+        """Коэффициенты, значения которых отличаются в версии other."""
+        changes: Dict[str, Set[str]] = {}
+        for code, values in self.coefficients.items():
+            names: Set[str] = {
+                name for name, value in values.items()
+                if other.coefficients[code][name] != value}
+            if names:
+                changes[code] = names
+        return changes
+
+    def affected_outputs(self, other: 'FormulaVersion'
+                         ) -> Dict[str, Tuple[str, ...]]:
+        """Результаты, которые нужно пересчитать при переходе к other."""
+        affected: Dict[str, Tuple[str, ...]] = {}
+        for code, names in self.changed(other).items():
+            outputs: Tuple[str, ...] = tuple(
+                output for output in OUTPUT_FIELDS
+                if DEPENDENCIES[code][output] & names)
+            if outputs:
+                affected[code] = outputs
+        return affected
+
+
+class FormulaRegistry:
+    """Реестр версий формул.
+    Первая версия baseline соответствует константам классов,
+    каждая следующая строится от последней с изменением коэффициентов.
+    """
+
+    def __init__(self) -> None:
+        self.versions: Dict[str, FormulaVersion] = {}
+        self.latest: FormulaVersion = self._add(
+            FormulaVersion('baseline', default_coefficients()))
+
+    def _add(self, formula: FormulaVersion) -> FormulaVersion:
+        if formula.version in self.versions:
+            raise ValueError(f'Версия {formula.version!r} уже существует')
+        self.versions[formula.version] = formula
+        self.latest = formula
+        return formula
+
+    def register(self, version: str, **changes: Dict[str, float]
+                 ) -> FormulaVersion:
+        """Добавить версию, изменив коэффициенты последней.
+        Пример: register('v2', RUN={'CALORIES_MEAN_SPEED_MULTIPLIER': 18.5})
+        """
+        coefficients: Dict[str, Dict[str, float]] = {
+            code: dict(values)
+            for code, values in self.latest.coefficients.items()}
+        for code, values in changes.items():
+            for name, value in values.items():
+                if name not in coefficients[code]:
+                    raise KeyError(
+                        f'У тренировки {code} нет коэффициента {name}')
+                coefficients[code][name] = value
+        return self._add(FormulaVersion(version, coefficients))
+
+    def __getitem__(self, version: str) -> FormulaVersion:
+        return self.versions[version]
@@ -170,13 +170,11 @@ class Swimming(Training):
         Вычисляет затраченные калории по формуле:
         (средняя_скорость + 1.1) * 2 * вес
         """
-        CALORIES_MEAN_SPEED_SHIFT: int = 1.1  # слагаемое скорости
-        CALORIES_WEIGHT_MULTIPLIER: int = 2  # множитель для расчета калорий
         speed: float = self.get_mean_speed()  # скорость
         weight: float = self.weight  # вес
         duration: float = self.duration
-        calories: float = speed + CALORIES_MEAN_SPEED_SHIFT
-        calories *= CALORIES_WEIGHT_MULTIPLIER * weight * duration
+        calories: float = speed + self.CALORIES_MEAN_SPEED_SHIFT
+        calories *= self.CALORIES_WEIGHT_MULTIPLIER * weight * duration
         return calories
 
 
@@ -0,0 +1,205 @@
+"""Прием пакетов: удаление повторов и упорядочивание по времени.
+Устройства пересылают пакеты повторно и доставляют их не по порядку.
+Повторы определяются по паре (устройство, номер пакета): последние
+пакеты хранятся точно, более старые - во вращающихся фильтрах Блума,
+которые проверяются только для номеров не выше уже виденных.
+Опоздавшие пакеты упорядочиваются в пределах водяного знака.
+"""
+import hashlib
+import heapq
+import math
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from homework import Training
+from packages import Package, unpack
+
+
+class BloomFilter:
+    """Фильтр Блума фиксированного размера."""
+
+    def __init__(self,
+                 capacity: int,  # ожидаемое число элементов
+                 hashes: int = 7,  # число хеш-функций
+                 bits_per_item: int = 10,  # бит памяти на элемент
+                 ) -> None:
+        self.size: int = max(8, capacity * bits_per_item)
+        self.hashes = hashes
+        self.bits: bytearray = bytearray((self.size + 7) // 8)
+        self.count: int = 0
+
+    def _positions(self, key: bytes) -> Iterator[int]:
+        digest: bytes = hashlib.blake2b(key, digest_size=16).digest()
+        first: int = int.from_bytes(digest[:8], 'little')
+        second: int = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key: bytes) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    def false_positive_rate(self) -> float:
+        """Ожидаемая доля ложных срабатываний при текущем заполнении."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)
+                ) ** self.hashes
+
+
+class Deduplicator:
+    """Определение повторно присланных пакетов с ограниченной памятью.
+    Последние window ключей хранятся точно. Ключи, вытесненные из окна,
+    попадают в текущий фильтр Блума; когда он заполняется, самый старый
+    из generations фильтров выбрасывается. Для каждого устройства
+    запоминается наибольший номер пакета: номер выше него повтором
+    быть не может, и фильтры для него не проверяются. Ложные
+    срабатывания возможны только для пакетов, пришедших не по порядку
+    и не найденных в точном окне; их ожидаемая доля - в
+    false_positive_rate().
+    """
+
+    def __init__(self,
+                 window: int = 100_000,  # ключей в точном окне
+                 capacity: int = 1_000_000,  # ключей в одном фильтре
+                 generations: int = 2,  # число хранимых фильтров
+                 ) -> None:
+        self.window = window
+        self.capacity = capacity
+        self.generations = generations
+        self.recent: 'OrderedDict[bytes, None]' = OrderedDict()
+        self.filters: List[BloomFilter] = [BloomFilter(capacity)]
+        # наибольший увиденный номер пакета каждого устройства
+        self.high_water: Dict[str, int] = {}
+
+    @staticmethod
+    def key(package: Package) -> bytes:
+        """Ключ пакета: устройство и номер пакета."""
+        return f'{package.device_id}\x00{package.seq}'.encode()
+
+    def seen(self, package: Package) -> bool:
+        """Проверить пакет и запомнить его.
+        Возвращает True, если такой пакет уже встречался.
+        """
+        key: bytes = self.key(package)
+        if key in self.recent:
+            return True
+        high: Optional[int] = self.high_water.get(package.device_id)
+        if high is not None and package.seq <= high:
+            if any(key in bloom for bloom in self.filters):
+                return True
+        else:
+            self.high_water[package.device_id] = package.seq
+        self.recent[key] = None
+        if len(self.recent) > self.window:
+            old, _ = self.recent.popitem(last=False)
+            self._remember(old)
+        return False
+
+    def false_positive_rate(self) -> float:
+        """Ожидаемая доля новых пакетов, ошибочно принятых за повтор,
+        среди пакетов с номером не выше наибольшего для устройства.
+        """
+        return 1 - math.prod(1 - bloom.false_positive_rate()
+                             for bloom in self.filters)
+
+    def _remember(self, key: bytes) -> None:
+        """Перенести ключ из точного окна в фильтры Блума."""
+        current: BloomFilter = self.filters[-1]
+        if current.count >= self.capacity:
+            current = BloomFilter(self.capacity)
+            self.filters.append(current)
+            if len(self.filters) > self.generations:
+                self.filters.pop(0)
+        current.add(key)
+
+
+class IngestMetrics:
+    """Счетчики стадии приема пакетов."""
+
+    def __init__(self) -> None:
+        self.received: int = 0  # получено пакетов
+        self.duplicates: int = 0  # отброшено повторов
+        self.late: int = 0  # отброшено опоздавших за водяной знак
+        self.reordered: int = 0  # пришло не по порядку, но упорядочено
+        self.malformed: int = 0  # отброшено испорченных
+        self.emitted: int = 0  # передано дальше
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class IngestStage:
+    """Стадия приема перед созданием объектов тренировок.
+    Пакеты придерживаются до тех пор, пока водяной знак - наибольшее
+    увиденное время минус lateness - не пройдет их время, и выдаются
+    в порядке времени. Пакеты старше уже выданного водяного знака
+    считаются опоздавшими и отбрасываются.
+    """
+
+    def __init__(self,
+                 lateness: float = 60.0,  # допустимое опоздание, секунд
+                 deduplicator: Optional[Deduplicator] = None,
+                 ) -> None:
+        self.lateness = lateness
+        self.deduplicator = deduplicator or Deduplicator()
+        self.metrics: IngestMetrics = IngestMetrics()
+        self._heap: List[Tuple[float, int, Package]] = []
+        self._counter: int = 0  # для устойчивого порядка в куче
+        self._max_time: float = float('-inf')
+        self._watermark: float = float('-inf')
+
+    def push(self, package: Package) -> List[Tuple[Package, Training]]:
+        """Принять пакет и вернуть пакеты, готовые к обработке."""
+        metrics: IngestMetrics = self.metrics
+        metrics.received += 1
+        if package.timestamp < self._watermark:
+            metrics.late += 1
+            return []
+        if self.deduplicator.seen(package):
+            metrics.duplicates += 1
+            return []
+        if package.timestamp < self._max_time:
+            metrics.reordered += 1
+        else:
+            self._max_time = package.timestamp
+        heapq.heappush(self._heap, (package.timestamp, self._counter,
+                                    package))
+        self._counter += 1
+        return self._release(self._max_time - self.lateness)
+
+    def flush(self) -> List[Tuple[Package, Training]]:
+        """Выдать все придержанные пакеты.
+        Водяной знак после этого равен наибольшему увиденному времени.
+        """
+        ready: List[Tuple[Package, Training]] = self._release(float('inf'))
+        self._watermark = self._max_time
+        return ready
+
+    def _release(self, watermark: float) -> List[Tuple[Package, Training]]:
+        self._watermark = max(self._watermark, watermark)
+        ready: List[Tuple[Package, Training]] = []
+        while self._heap and self._heap[0][0] <= self._watermark:
+            _, _, package = heapq.heappop(self._heap)
+            try:
+                unpack(package.workout_type, package.data)
+                training: Training = package.training()
+            except (IndexError, TypeError, ValueError):
+                self.metrics.malformed += 1
+                continue
+            if training is None:
+                self.metrics.malformed += 1
+                continue
+            ready.append((package, training))
+        self.metrics.emitted += len(ready)
+        return ready
+
+    def process(self, packages: Iterable[Package]
+                ) -> Iterator[Tuple[Package, Training]]:
+        """Обработать поток пакетов целиком."""
+        for package in packages:
+            yield from self.push(package)
+        yield from self.flush()
@@ -0,0 +1,140 @@
+"""Описание пакетов, получаемых от датчиков, и файлов с пакетами."""
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from homework import Training, read_package
+
+# порядок полей в пакете для каждого кода тренировки (как в read_package)
+PACKAGE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'WLK': ('action', 'duration', 'weight', 'height'),
+    'RUN': ('action', 'duration', 'weight'),
+    'SWM': ('action', 'duration', 'weight', 'length_pool', 'count_pool'),
+}
+
+# все входные поля в едином порядке
+INPUT_FIELDS: Tuple[str, ...] = (
+    'action', 'duration', 'weight', 'height', 'length_pool', 'count_pool',
+)
+
+# результаты расчета тренировки (поля InfoMessage, кроме типа и длительности)
+OUTPUT_FIELDS: Tuple[str, ...] = ('distance', 'speed', 'calories')
+
+# альтернативные названия тренировок, которые понимает read_package
+CODE_ALIASES: Dict[str, str] = {
+    'Walking': 'WLK',
+    'Running': 'RUN',
+    'Swimming': 'SWM',
+}
+
+
+def normalize_code(workout_type: str) -> str:
+    """Привести тип тренировки к трехбуквенному коду.
+    Неизвестный тип - ValueError.
+    """
+    code: str = CODE_ALIASES.get(workout_type, workout_type)
+    if code not in PACKAGE_FIELDS:
+        raise ValueError(f'Неизвестный тип тренировки: {workout_type!r}')
+    return code
+
+
+def unpack(workout_type: str, data: list) -> Dict[str, float]:
+    """Разложить данные пакета по именам полей.
+    Проверяет количество полей для типа тренировки.
+    """
+    code: str = normalize_code(workout_type)
+    fields: Tuple[str, ...] = PACKAGE_FIELDS[code]
+    if len(data) != len(fields):
+        raise ValueError(
+            f'Для {code} ожидается полей: {len(fields)}, '
+            f'получено: {len(data)}')
+    return dict(zip(fields, data))
+
+
+class Package:
+    """Пакет от датчика вместе с данными о его источнике."""
+    __slots__ = ('workout_type', 'data', 'user_id', 'device_id', 'seq',
+                 'timestamp')
+
+    def __init__(self,
+                 workout_type: str,  # код тренировки
+                 data: list,  # данные тренировки для read_package
+                 user_id: str = '',  # пользователь
+                 device_id: str = '',  # устройство-отправитель
+                 seq: int = 0,  # порядковый номер пакета на устройстве
+                 timestamp: float = 0.0,  # время тренировки, Unix-время
+                 ) -> None:
+        self.workout_type = workout_type
+        self.data = data
+        self.user_id = user_id
+        self.device_id = device_id
+        self.seq = seq
+        self.timestamp = timestamp
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Package):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (f'Package({self.workout_type!r}, {self.data!r}, '
+                f'user_id={self.user_id!r}, device_id={self.device_id!r}, '
+                f'seq={self.seq!r}, timestamp={self.timestamp!r})')
+
+    def training(self) -> Training:
+        """Создать объект тренировки по данным пакета."""
+        return read_package(self.workout_type, self.data)
+
+
+def _number(text: str) -> float:
+    """Прочитать число из текста: целое, если возможно."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def format_package(package: Package) -> str:
+    """Записать пакет строкой файла пакетов.
+    Формат: пользователь,устройство,номер,время,код,поле1,поле2,...
+    """
+    return ','.join([package.user_id, package.device_id, str(package.seq),
+                     repr(package.timestamp), package.workout_type,
+                     *map(str, package.data)])
+
+
+def parse_package(line: str) -> Package:
+    """Прочитать пакет из строки файла пакетов.
+    Неполные и испорченные строки - ValueError.
+    """
+    parts: List[str] = line.rstrip('\r\n').split(',')
+    if len(parts) < 6:
+        raise ValueError(f'Неполная строка пакета: {line!r}')
+    user_id, device_id, seq, timestamp, workout_type, *values = parts
+    data: list = [_number(value) for value in values]
+    unpack(workout_type, data)
+    return Package(workout_type, data, user_id, device_id, int(seq),
+                   float(timestamp))
+
+
+def read_packages(path: str, skip_errors: bool = False
+                  ) -> Iterator[Package]:
+    """Прочитать пакеты из файла.
+    С skip_errors испорченные строки пропускаются.
+    """
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                yield parse_package(line)
+            except ValueError:
+                if not skip_errors:
+                    raise
+
+
+def write_packages(path: str, packages: Iterable[Package]) -> int:
+    """Записать пакеты в файл, вернуть их количество."""
+    count: int = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        for package in packages:
+            file.write(format_package(package) + '\n')
+            count += 1
+    return count
@@ -0,0 +1,197 @@
+"""Персональные коэффициенты формул для пользователей.
+Длина шага или гребка и коэффициенты расчета калорий (formulas.PERSONAL)
+могут быть откалиброваны для каждого пользователя. Значения хранятся
+в базе SQLite - только отличающиеся от констант классов - и читаются
+через LRU-кеш. Для пачек пакетов коэффициенты присоединяются колонками
+и передаются в formulas.compute, поэтому расчет остается колоночным.
+"""
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from formulas import PERSONAL, compute, default_coefficients
+from homework import Training, read_package
+from packages import OUTPUT_FIELDS, normalize_code
+
+SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS coefficients (
+    user_id TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (user_id, code, name)
+) WITHOUT ROWID
+'''
+SQL_VARIABLES: int = 500  # пользователей в одном запросе IN (...)
+
+
+class CoefficientStore:
+    """Хранилище персональных коэффициентов в базе SQLite."""
+
+    def __init__(self, path: str = ':memory:') -> None:
+        self.path = path
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False)
+        self._connection.execute(SCHEMA)
+
+    def set(self, user_id: str, workout_type: str, **values: float) -> None:
+        """Задать коэффициенты пользователя для типа тренировки."""
+        code: str = normalize_code(workout_type)
+        unknown = set(values) - set(PERSONAL[code])
+        if unknown:
+            raise KeyError(f'У тренировки {code} нельзя задать '
+                           f'коэффициенты {sorted(unknown)}')
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO coefficients VALUES (?, ?, ?, ?)',
+                [(user_id, code, name, float(value))
+                 for name, value in values.items()])
+
+    def get(self, user_id: str, workout_type: str) -> Dict[str, float]:
+        """Заданные коэффициенты пользователя (без значений по умолчанию)."""
+        return self.get_many([user_id], workout_type).get(user_id, {})
+
+    def get_many(self, user_ids: Iterable[str], workout_type: str
+                 ) -> Dict[str, Dict[str, float]]:
+        """Заданные коэффициенты нескольких пользователей за пару запросов.
+        Пользователи без персональных значений в результат не попадают.
+        """
+        code: str = normalize_code(workout_type)
+        users: List[str] = list(dict.fromkeys(user_ids))
+        result: Dict[str, Dict[str, float]] = {}
+        for start in range(0, len(users), SQL_VARIABLES):
+            chunk: List[str] = users[start:start + SQL_VARIABLES]
+            marks: str = ', '.join('?' * len(chunk))
+            rows = self._connection.execute(
+                'SELECT user_id, name, value FROM coefficients '
+                f'WHERE code = ? AND user_id IN ({marks})', [code, *chunk])
+            for user_id, name, value in rows:
+                result.setdefault(user_id, {})[name] = value
+        return result
+
+    def delete(self, user_id: str, workout_type: Optional[str] = None
+               ) -> None:
+        """Удалить коэффициенты пользователя (всех или одного типа)."""
+        with self._connection:
+            if workout_type is None:
+                self._connection.execute(
+                    'DELETE FROM coefficients WHERE user_id = ?', (user_id,))
+            else:
+                self._connection.execute(
+                    'DELETE FROM coefficients WHERE user_id = ? AND code = ?',
+                    (user_id, normalize_code(workout_type)))
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'CoefficientStore':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class PersonalCoefficients:
+    """Персональные коэффициенты с LRU-кешем поверх хранилища.
+    В кеше лежат полные наборы коэффициентов (пользователь, код),
+    включая значения по умолчанию.
+    """
+
+    def __init__(self,
+                 store: CoefficientStore,
+                 cache_size: int = 100000,  # наборов коэффициентов в кеше
+                 ) -> None:
+        self.store = store
+        self.cache_size = cache_size
+        self.defaults: Dict[str, Dict[str, float]] = default_coefficients()
+        self.cache: 'OrderedDict[Tuple[str, str], Dict[str, float]]' = (
+            OrderedDict())
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _remember(self, key: Tuple[str, str],
+                  overrides: Dict[str, float]) -> Dict[str, float]:
+        coefficients: Dict[str, float] = {**self.defaults[key[1]],
+                                          **overrides}
+        self.cache[key] = coefficients
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return coefficients
+
+    def coefficients(self, user_id: str, workout_type: str
+                     ) -> Dict[str, float]:
+        """Полный набор коэффициентов пользователя для типа тренировки."""
+        key: Tuple[str, str] = (user_id, normalize_code(workout_type))
+        coefficients: Optional[Dict[str, float]] = self.cache.get(key)
+        if coefficients is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return coefficients
+        self.misses += 1
+        return self._remember(key, self.store.get(*key))
+
+    def set(self, user_id: str, workout_type: str, **values: float) -> None:
+        """Записать коэффициенты в хранилище и сбросить их в кеше."""
+        self.store.set(user_id, workout_type, **values)
+        self.cache.pop((user_id, normalize_code(workout_type)), None)
+
+    def delete(self, user_id: str, workout_type: Optional[str] = None
+               ) -> None:
+        self.store.delete(user_id, workout_type)
+        for code in PERSONAL:
+            if workout_type is None or code == normalize_code(workout_type):
+                self.cache.pop((user_id, code), None)
+
+    def training(self, user_id: str, workout_type: str, data: list
+                 ) -> Training:
+        """Объект тренировки с коэффициентами пользователя.
+        Коэффициенты задаются атрибутами объекта, константы классов
+        не меняются.
+        """
+        training: Training = read_package(workout_type, data)
+        coefficients: Dict[str, float] = self.coefficients(user_id,
+                                                           workout_type)
+        for name in PERSONAL[normalize_code(workout_type)]:
+            setattr(training, name, coefficients[name])
+        return training
+
+    def columns(self, user_ids: Sequence[str], workout_type: str
+                ) -> Dict[str, List[float]]:
+        """Коэффициенты для строк пачки одного типа тренировки.
+        Отсутствующие в кеше пользователи читаются одним запросом.
+        Колонки строятся только для коэффициентов, которые хотя бы у
+        одного пользователя пачки отличаются от значения по умолчанию.
+        """
+        code: str = normalize_code(workout_type)
+        users: Dict[str, Optional[Dict[str, float]]] = {
+            user_id: self.cache.get((user_id, code)) for user_id in user_ids}
+        missing: List[str] = [user_id for user_id, coefficients
+                              in users.items() if coefficients is None]
+        self.hits += len(users) - len(missing)
+        self.misses += len(missing)
+        for user_id in users:
+            if users[user_id] is not None:
+                self.cache.move_to_end((user_id, code))
+        loaded: Dict[str, Dict[str, float]] = self.store.get_many(missing,
+                                                                  code)
+        for user_id in missing:
+            users[user_id] = self._remember((user_id, code),
+                                            loaded.get(user_id, {}))
+        rows: List[Dict[str, float]] = [users[user_id]
+                                        for user_id in user_ids]
+        defaults: Dict[str, float] = self.defaults[code]
+        return {name: [row[name] for row in rows]
+                for name in PERSONAL[code]
+                if any(row[name] != defaults[name] for row in rows)}
+
+    def compute(self,
+                user_ids: Sequence[str],  # пользователь каждой строки
+                workout_type: str,  # код тренировки
+                columns: Dict[str, list],  # входные колонки пакетов
+                outputs: Iterable[str] = OUTPUT_FIELDS,  # нужные результаты
+                ) -> Dict[str, List[float]]:
+        """Рассчитать пачку пакетов одного типа с учетом пользователей."""
+        personal: Dict[str, List[float]] = self.columns(user_ids,
+                                                        workout_type)
+        return compute(workout_type, {**columns, **personal},
+                       outputs=outputs)
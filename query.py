@@ -0,0 +1,246 @@
+"""Запросы с группировкой и агрегатами к архиву тренировок.
+Условия на хранимые колонки (тип, время, входные данные пакетов)
+проверяются при чтении архива: блоки отбрасываются по статистике
+min/max, строки - до расчета результатов. Если задана версия формул,
+дистанция, скорость и калории вычисляются по ней только для подошедших
+строк, иначе берутся из архива. Агрегаты собираются из частичных
+состояний, поэтому блоки можно сканировать в нескольких процессах.
+"""
+import calendar
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from archive import ArchiveReader, matches
+from formulas import FormulaVersion, compute
+from packages import OUTPUT_FIELDS, PACKAGE_FIELDS, normalize_code
+
+AGGREGATES: Tuple[str, ...] = ('count', 'sum', 'mean', 'min', 'max')
+
+
+def month_range(year: int, month: int) -> Tuple[float, float]:
+    """Условие на колонку timestamp: месяц по UTC, включительно."""
+    start: int = calendar.timegm((year, month, 1, 0, 0, 0))
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    end: int = calendar.timegm((year, month, 1, 0, 0, 0))
+    return float(start), math.nextafter(float(end), -math.inf)
+
+
+def derive(data: Dict[str, list],  # колонки подошедших строк
+           outputs: Sequence[str],  # нужные результаты
+           coefficients: Dict[str, Dict[str, float]],
+           ) -> Dict[str, list]:
+    """Рассчитать результаты строк по типам тренировок."""
+    result: Dict[str, list] = {name: [math.nan] * len(data['type'])
+                               for name in outputs}
+    for code in sorted(set(data['type'])):
+        rows: List[int] = [row for row, value in enumerate(data['type'])
+                           if value == code]
+        inputs: Dict[str, list] = {
+            field: [data[field][row] for row in rows]
+            for field in PACKAGE_FIELDS[code]}
+        computed = compute(code, inputs, coefficients[code], outputs)
+        for name, values in computed.items():
+            column: list = result[name]
+            for row, value in zip(rows, values):
+                column[row] = value
+    return result
+
+
+def _group_value(value):
+    """Значение ключа группы; NaN (поля нет у типа) заменяется на None,
+    иначе каждая такая строка попала бы в свою группу.
+    """
+    return None if value != value else value
+
+
+def _group_order(key: tuple) -> tuple:
+    """Порядок групп: группы без значения поля идут последними."""
+    return tuple((value is None, value) for value in key)
+
+
+def _state(values: list) -> list:
+    """Частичное состояние агрегатов: количество, сумма, min, max."""
+    present: list = [value for value in values if value == value]
+    if not present:
+        return [0, 0.0, math.inf, -math.inf]
+    return [len(present), math.fsum(present), min(present), max(present)]
+
+
+def _merge(state: list, other: list) -> None:
+    state[0] += other[0]
+    state[1] += other[1]
+    state[2] = min(state[2], other[2])
+    state[3] = max(state[3], other[3])
+
+
+def _finish(function: str, state: list) -> float:
+    """Значение агрегата по итоговому состоянию."""
+    count, total, low, high = state
+    if function == 'count':
+        return count
+    if function == 'sum':
+        return total
+    if not count:
+        return math.nan
+    return {'mean': total / count, 'min': low, 'max': high}[function]
+
+
+def _scan_blocks(path: str,  # путь к архиву
+                 blocks: List[int],  # номера блоков для сканирования
+                 where: dict,  # условия, проверяемые при чтении
+                 derived_where: dict,  # условия на рассчитанные результаты
+                 keys: Tuple[str, ...],  # колонки группировки
+                 values: Tuple[str, ...],  # колонки агрегатов
+                 coefficients: Optional[Dict[str, Dict[str, float]]],
+                 ) -> Dict[tuple, Dict[Optional[str], list]]:
+    """Частичные агрегаты групп по части блоков архива.
+    Состояние под ключом None - число строк группы.
+    """
+    used: List[str] = list(dict.fromkeys([*keys, *values, *derived_where]))
+    derived: List[str] = []
+    if coefficients is not None:
+        derived = [name for name in used if name in OUTPUT_FIELDS]
+    stored: List[str] = ['type'] + [name for name in used
+                                    if name not in derived]
+    if derived:
+        codes = where.get('type', PACKAGE_FIELDS)
+        stored += [field for code in sorted(codes)
+                   for field in PACKAGE_FIELDS[code]]
+    partial: Dict[tuple, Dict[Optional[str], list]] = {}
+    with ArchiveReader(path) as reader:
+        for data in reader.iter_blocks(list(dict.fromkeys(stored)), where,
+                                       blocks):
+            if derived:
+                data.update(derive(data, derived, coefficients))
+            groups: Dict[tuple, List[int]] = {}
+            for row in range(len(data['type'])):
+                if all(matches(data[name][row], condition)
+                       for name, condition in derived_where.items()):
+                    key: tuple = tuple(_group_value(data[name][row])
+                                       for name in keys)
+                    groups.setdefault(key, []).append(row)
+            for key, rows in groups.items():
+                states = partial.setdefault(key, {None: _state([])})
+                _merge(states[None], [len(rows), 0.0, math.inf, -math.inf])
+                for name in values:
+                    column: list = data[name]
+                    _merge(states.setdefault(name, _state([])),
+                           _state([column[row] for row in rows]))
+    return partial
+
+
+class Query:
+    """Запрос к архиву: условия, группировка и агрегаты.
+    Условия задаются как в ArchiveReader: для type - код или набор
+    кодов, для числовых колонок - пара (минимум, максимум) включительно.
+    """
+
+    def __init__(self,
+                 path: str,  # путь к архиву
+                 version: Optional[FormulaVersion] = None,  # версия формул
+                 workers: int = 1,  # число процессов для сканирования
+                 ) -> None:
+        self.path = path
+        self.version = version
+        self.workers = workers
+        with ArchiveReader(path) as reader:
+            self.columns: Tuple[str, ...] = reader.columns
+        self.conditions: dict = {}
+        self.keys: Tuple[str, ...] = ()
+        self.aggregates: Dict[str, Tuple[str, Optional[str]]] = {}
+
+    def _check(self, name: str) -> None:
+        if name not in self.columns:
+            raise KeyError(f'Колонка {name!r} отсутствует в архиве')
+
+    def where(self, **conditions) -> 'Query':
+        """Добавить условия на колонки."""
+        for name, condition in conditions.items():
+            self._check(name)
+            if name == 'type':
+                if isinstance(condition, str):
+                    condition = [condition]
+                condition = {normalize_code(code) for code in condition}
+            self.conditions[name] = condition
+        return self
+
+    def group_by(self, *columns: str) -> 'Query':
+        """Сгруппировать строки по значениям колонок."""
+        for name in columns:
+            self._check(name)
+        self.keys = columns
+        return self
+
+    def aggregate(self, **aggregates: Tuple[str, Optional[str]]) -> 'Query':
+        """Добавить агрегаты: имя=(функция, колонка).
+        Для count колонка может быть None - тогда считаются строки.
+        """
+        for name, (function, column) in aggregates.items():
+            if function not in AGGREGATES:
+                raise ValueError(f'Неизвестный агрегат: {function!r}')
+            if column is not None or function != 'count':
+                self._check(column)
+            self.aggregates[name] = (function, column)
+        return self
+
+    def _split(self) -> Tuple[dict, dict]:
+        """Условия, проверяемые при чтении, и условия на результаты."""
+        if self.version is None:
+            return dict(self.conditions), {}
+        stored: dict = {}
+        derived: dict = {}
+        for name, condition in self.conditions.items():
+            target: dict = derived if name in OUTPUT_FIELDS else stored
+            target[name] = condition
+        return stored, derived
+
+    def plan(self) -> List[int]:
+        """Блоки, которые нельзя отбросить по статистике."""
+        where, _ = self._split()
+        with ArchiveReader(self.path) as reader:
+            return [index for index in range(len(reader.blocks))
+                    if not reader.skip_block(index, where)]
+
+    def run(self) -> Dict[tuple, Dict[str, float]]:
+        """Выполнить запрос: группа (кортеж ключей) -> агрегаты.
+        Без группировки результат - единственная группа ().
+        """
+        if not self.aggregates:
+            raise ValueError('Не заданы агрегаты запроса')
+        where, derived_where = self._split()
+        values: Tuple[str, ...] = tuple(dict.fromkeys(
+            column for _, column in self.aggregates.values()
+            if column is not None))
+        coefficients = None if self.version is None else (
+            self.version.coefficients)
+        arguments: tuple = (where, derived_where, self.keys, values,
+                            coefficients)
+        blocks: List[int] = self.plan()
+        if self.workers > 1 and len(blocks) > 1:
+            size: int = math.ceil(len(blocks) / (self.workers * 4))
+            with ProcessPoolExecutor(self.workers) as executor:
+                futures = [executor.submit(_scan_blocks, self.path,
+                                           blocks[start:start + size],
+                                           *arguments)
+                           for start in range(0, len(blocks), size)]
+                partials = [future.result() for future in futures]
+        else:
+            partials = [_scan_blocks(self.path, blocks, *arguments)]
+        return self._combine(partials, values)
+
+    def _combine(self, partials: List[dict], values: Tuple[str, ...]
+                 ) -> Dict[tuple, Dict[str, float]]:
+        """Объединить частичные состояния и вычислить агрегаты."""
+        merged: Dict[tuple, Dict[Optional[str], list]] = {}
+        for partial in partials:
+            for key, states in partial.items():
+                target = merged.setdefault(key, {})
+                for name, state in states.items():
+                    _merge(target.setdefault(name, _state([])), state)
+        if not self.keys and not merged:
+            merged[()] = {name: _state([]) for name in (None, *values)}
+        return {key: {name: _finish(function, merged[key][column])
+                      for name, (function, column)
+                      in self.aggregates.items()}
+                for key in sorted(merged, key=_group_order)}
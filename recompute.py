@@ -0,0 +1,180 @@
+"""Инкрементальный пересчет архива при изменении коэффициентов формул.
+Планировщик определяет, какие результаты каких типов тренировок зависят
+от измененных коэффициентов, и пересчитывает только эти колонки только
+в тех блоках архива, где встречаются затронутые тренировки.
+Каждый пересчитанный блок сохраняется в каталог контрольных точек,
+поэтому прерванное задание продолжается с места остановки.
+"""
+import json
+import os
+import pickle
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from archive import COLUMNS, ArchiveReader, ArchiveWriter
+from formulas import FormulaVersion, compute
+from packages import INPUT_FIELDS, PACKAGE_FIELDS
+
+MANIFEST: str = 'manifest.json'  # описание задания в каталоге точек
+
+
+class RecomputeTask:
+    """Пересчет одного блока архива."""
+
+    def __init__(self,
+                 block: int,  # номер блока архива
+                 outputs: Dict[str, Tuple[str, ...]],  # код -> результаты
+                 ) -> None:
+        self.block = block
+        self.outputs = outputs
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Колонки блока, которые меняются при пересчете."""
+        names: Set[str] = set().union(*self.outputs.values())
+        return tuple(name for name in COLUMNS if name in names)
+
+    def __repr__(self) -> str:
+        return f'RecomputeTask(block={self.block}, outputs={self.outputs})'
+
+
+def recompute_block(data: Dict[str, list],  # колонки блока
+                    outputs: Dict[str, Tuple[str, ...]],
+                    coefficients: Dict[str, Dict[str, float]],
+                    columns: Tuple[str, ...],  # изменяемые колонки
+                    ) -> Dict[str, array]:
+    """Пересчитать затронутые строки блока, остальные оставить как есть."""
+    result: Dict[str, list] = {name: list(data[name]) for name in columns}
+    for code, names in outputs.items():
+        rows: List[int] = [row for row, value in enumerate(data['type'])
+                           if value == code]
+        if not rows:
+            continue
+        inputs: Dict[str, list] = {
+            field: [data[field][row] for row in rows]
+            for field in PACKAGE_FIELDS[code]}
+        computed = compute(code, inputs, coefficients[code], names)
+        for name, values in computed.items():
+            column: list = result[name]
+            for row, value in zip(rows, values):
+                column[row] = value
+    return {name: array('d', values) for name, values in result.items()}
+
+
+class RecomputeJob:
+    """Задание на пересчет архива от версии формул old к версии new."""
+
+    def __init__(self,
+                 reader: ArchiveReader,  # исходный архив
+                 old: FormulaVersion,  # версия, по которой считался архив
+                 new: FormulaVersion,  # новая версия формул
+                 checkpoint_dir: str,  # каталог контрольных точек
+                 workers: int = 1,  # число процессов для пересчета
+                 batch_size: Optional[int] = None,  # блоков в пачке
+                 ) -> None:
+        self.reader = reader
+        self.old = old
+        self.new = new
+        self.checkpoint_dir = checkpoint_dir
+        self.workers = workers
+        self.batch_size = batch_size or workers * 2
+        self.outputs: Dict[str, Tuple[str, ...]] = old.affected_outputs(new)
+        self._init_checkpoint()
+
+    def _init_checkpoint(self) -> None:
+        """Создать каталог точек или проверить, что он от этого задания."""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        # коэффициенты записываются целиком: реестр версий живет в памяти,
+        # и после перезапуска под тем же именем могут быть другие значения
+        manifest: dict = json.loads(json.dumps({
+            'archive': os.path.abspath(self.reader.path),
+            'from': self.old.version,
+            'to': self.new.version,
+            'from_coefficients': self.old.coefficients,
+            'to_coefficients': self.new.coefficients,
+        }))
+        path: str = os.path.join(self.checkpoint_dir, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as file:
+                if json.load(file) != manifest:
+                    raise ValueError(
+                        f'Каталог {self.checkpoint_dir} принадлежит '
+                        'другому заданию пересчета')
+            return
+        with open(path, 'w') as file:
+            json.dump(manifest, file)
+
+    def _block_path(self, block: int) -> str:
+        return os.path.join(self.checkpoint_dir, f'block-{block:08d}.bin')
+
+    def plan(self) -> List[RecomputeTask]:
+        """Составить список блоков, которые нужно пересчитать.
+        Блоки без затронутых тренировок пропускаются по статистике.
+        """
+        tasks: List[RecomputeTask] = []
+        for block in range(len(self.reader.blocks)):
+            present: List[str] = self.reader.block_stats(
+                block, 'type')['values']
+            outputs: Dict[str, Tuple[str, ...]] = {
+                code: names for code, names in self.outputs.items()
+                if code in present}
+            if outputs:
+                tasks.append(RecomputeTask(block, outputs))
+        return tasks
+
+    def pending(self) -> List[RecomputeTask]:
+        """Задачи плана, для которых еще нет контрольной точки."""
+        return [task for task in self.plan()
+                if not os.path.exists(self._block_path(task.block))]
+
+    def _save(self, task: RecomputeTask, result: Dict[str, array]) -> None:
+        """Атомарно сохранить результат пересчета блока."""
+        path: str = self._block_path(task.block)
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump(result, file)
+        os.replace(path + '.tmp', path)
+
+    def _arguments(self, task: RecomputeTask) -> tuple:
+        needed: List[str] = ['type', *INPUT_FIELDS, *task.columns]
+        data: Dict[str, list] = self.reader.read_block(task.block, needed)
+        return (data, task.outputs, self.new.coefficients, task.columns)
+
+    def run(self) -> int:
+        """Выполнить оставшиеся задачи, вернуть число пересчитанных блоков.
+        Задачи выполняются пачками по batch_size блоков.
+        """
+        tasks: List[RecomputeTask] = self.pending()
+        if self.workers <= 1:
+            for task in tasks:
+                self._save(task, recompute_block(*self._arguments(task)))
+            return len(tasks)
+        with ProcessPoolExecutor(self.workers) as executor:
+            for start in range(0, len(tasks), self.batch_size):
+                batch = tasks[start:start + self.batch_size]
+                futures = [executor.submit(recompute_block,
+                                           *self._arguments(task))
+                           for task in batch]
+                for task, future in zip(batch, futures):
+                    self._save(task, future.result())
+        return len(tasks)
+
+    def result(self, block: int) -> Optional[Dict[str, array]]:
+        """Пересчитанные колонки блока или None, если блок не менялся."""
+        path: str = self._block_path(block)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+    def write(self, path: str, codec: Optional[str] = None) -> None:
+        """Записать новый архив с пересчитанными колонками."""
+        if self.pending():
+            raise RuntimeError('Пересчет не завершен, сначала вызовите run()')
+        with ArchiveWriter(path, codec=codec or self.reader.codec) as writer:
+            for block, meta in enumerate(self.reader.blocks):
+                writer.block_size = meta['rows']
+                data: Dict[str, list] = self.reader.read_block(
+                    block, self.reader.columns)
+                data.update(self.result(block) or {})
+                writer.append_columns(data)
@@ -0,0 +1,288 @@
+"""Планировщик расчета тренировок микропачками.
+Пакеты ставятся в одну из двух очередей: интерактивную (ответ ждет
+устройство) и фоновую (загрузка истории). Поток расчета забирает
+интерактивные пакеты первыми и досыпает пачку фоновыми. Размер пачки
+подстраивается: растет, пока фоновая очередь длиннее пачки, уменьшается,
+если интерактивные запросы не укладываются в целевую задержку, и не
+превышает размера, который считается быстрее заданной доли этой цели.
+Пачка считается по колонкам отдельно для каждого типа тренировки.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from formulas import TRAINING_CLASSES, compute
+from homework import InfoMessage
+from packages import PACKAGE_FIELDS, normalize_code, unpack
+
+LANES: Tuple[str, ...] = ('interactive', 'bulk')
+
+
+def _compute_rows(code: str, rows: List[Dict[str, float]]) -> list:
+    """Результаты строк одного типа; ошибка одной строки не портит
+    остальные: при любой ошибке расчета строки считаются по одной.
+    """
+    columns: Dict[str, list] = {field: [row[field] for row in rows]
+                                for field in PACKAGE_FIELDS[code]}
+    try:
+        computed: Dict[str, list] = compute(code, columns)
+    except Exception as error:
+        if len(rows) == 1:
+            return [error]
+        results: list = []
+        for row in rows:
+            results.extend(_compute_rows(code, [row]))
+        return results
+    name: str = TRAINING_CLASSES[code].__name__
+    return [InfoMessage(name, *values) for values in zip(
+        columns['duration'], computed['distance'], computed['speed'],
+        computed['calories'])]
+
+
+def compute_batch(packages: Sequence[Tuple[str, list]]) -> list:
+    """Результаты пачки пакетов (код, данные) по порядку.
+    На месте испорченного пакета возвращается исключение.
+    """
+    results: list = [None] * len(packages)
+    groups: Dict[str, Tuple[List[int], List[Dict[str, float]]]] = {}
+    for index, (workout_type, data) in enumerate(packages):
+        try:
+            code: str = normalize_code(workout_type)
+            fields: Dict[str, float] = unpack(code, data)
+        except (TypeError, ValueError) as error:
+            results[index] = error
+            continue
+        indexes, rows = groups.setdefault(code, ([], []))
+        indexes.append(index)
+        rows.append(fields)
+    for code, (indexes, rows) in groups.items():
+        for index, result in zip(indexes, _compute_rows(code, rows)):
+            results[index] = result
+    return results
+
+
+class _Request:
+    __slots__ = ('package', 'lane', 'submitted', 'future')
+
+    def __init__(self, package: Tuple[str, list], lane: str) -> None:
+        self.package = package
+        self.lane = lane
+        self.submitted: float = time.perf_counter()
+        self.future: Future = Future()
+
+
+class SchedulerStats:
+    """Счетчики и задержки планировщика."""
+
+    def __init__(self, window: int = 10000) -> None:
+        self.submitted: Dict[str, int] = dict.fromkeys(LANES, 0)
+        self.completed: Dict[str, int] = dict.fromkeys(LANES, 0)
+        self.failed: int = 0  # пакетов с ошибкой
+        self.rejected: int = 0  # фоновых пакетов сверх предела очереди
+        self.batches: int = 0
+        self.rows: int = 0  # пакетов во всех пачках
+        self.busy: float = 0.0  # время расчета, секунд
+        # задержки последних window пакетов каждой очереди, секунд
+        self.latencies: Dict[str, Deque[float]] = {
+            lane: deque(maxlen=window) for lane in LANES}
+
+    def percentile(self, lane: str, share: float) -> float:
+        ordered: List[float] = sorted(self.latencies[lane])
+        if not ordered:
+            return math.nan
+        return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+    def as_dict(self) -> dict:
+        result: dict = {
+            'submitted': dict(self.submitted),
+            'completed': dict(self.completed),
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'mean_batch': self.rows / self.batches if self.batches else 0.0,
+            'busy': self.busy,
+        }
+        for lane in LANES:
+            result[f'{lane}_p50'] = self.percentile(lane, 0.5)
+            result[f'{lane}_p99'] = self.percentile(lane, 0.99)
+        return result
+
+
+class MicroBatchScheduler:
+    """Расчет пакетов микропачками в отдельном потоке.
+    Настройки можно менять на ходу через configure().
+    """
+    KNOBS: Tuple[str, ...] = ('target_latency', 'budget_share', 'min_batch',
+                              'max_batch', 'max_wait', 'max_queue')
+    SMOOTHING: float = 0.2  # вес нового замера в средней цене пакета
+
+    def __init__(self,
+                 target_latency: float = 0.05,  # цель для интерактивных, с
+                 budget_share: float = 0.25,  # доля цели на одну пачку
+                 min_batch: int = 1,  # наименьший размер пачки
+                 max_batch: int = 8192,  # наибольший размер пачки
+                 max_wait: float = 0.002,  # ожидание наполнения пачки, с
+                 max_queue: int = 1000000,  # предел фоновой очереди
+                 compute: Callable[[list], list] = compute_batch,
+                 ) -> None:
+        self.target_latency = target_latency
+        self.budget_share = budget_share
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.compute = compute
+        self.batch_size: int = min_batch  # текущий размер пачки
+        self.cost: Optional[float] = None  # средняя цена пакета, секунд
+        self.stats: SchedulerStats = SchedulerStats()
+        self._queues: Dict[str, Deque[_Request]] = {
+            lane: deque() for lane in LANES}
+        self._condition: threading.Condition = threading.Condition()
+        self._closed: bool = False
+        self._thread: threading.Thread = threading.Thread(
+            target=self._loop, daemon=True)
+        self._thread.start()
+
+    def configure(self, **knobs) -> None:
+        """Изменить настройки; действуют со следующей пачки."""
+        unknown = set(knobs) - set(self.KNOBS)
+        if unknown:
+            raise TypeError(f'Неизвестные настройки: {sorted(unknown)}')
+        with self._condition:
+            for name, value in knobs.items():
+                setattr(self, name, value)
+            self.batch_size = max(self.min_batch,
+                                  min(self.batch_size, self.max_batch))
+            self._condition.notify_all()
+
+    def knobs(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in self.KNOBS}
+
+    def snapshot(self) -> dict:
+        """Текущее состояние: настройки, размер пачки, очереди, счетчики."""
+        with self._condition:
+            state: dict = self.knobs()
+            state.update(self.stats.as_dict())
+            state['batch_size'] = self.batch_size
+            state['cost'] = self.cost
+            for lane, queue in self._queues.items():
+                state[f'{lane}_queue'] = len(queue)
+        return state
+
+    def submit(self, workout_type: str, data: list,
+               interactive: bool = False) -> Future:
+        """Поставить пакет в очередь, результат - InfoMessage в Future.
+        Переполнение фоновой очереди завершает Future ошибкой
+        OverflowError, интерактивная очередь не ограничена.
+        """
+        return self.submit_many([(workout_type, data)], interactive)[0]
+
+    def submit_many(self, packages: Sequence[Tuple[str, list]],
+                    interactive: bool = False) -> List[Future]:
+        lane: str = LANES[0] if interactive else LANES[1]
+        requests: List[_Request] = [_Request(package, lane)
+                                    for package in packages]
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Планировщик остановлен')
+            queue: Deque[_Request] = self._queues[lane]
+            free: int = len(requests)
+            if not interactive:
+                free = max(0, self.max_queue - len(queue))
+            queue.extend(requests[:free])
+            self.stats.submitted[lane] += min(free, len(requests))
+            self.stats.rejected += len(requests[free:])
+            self._condition.notify_all()
+        for request in requests[free:]:
+            request.future.set_exception(
+                OverflowError('Очередь фоновых пакетов переполнена'))
+        return [request.future for request in requests]
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        """Дождаться и забрать следующую пачку (None - остановка)."""
+        interactive, bulk = (self._queues[lane] for lane in LANES)
+        with self._condition:
+            while not interactive and not bulk and not self._closed:
+                self._condition.wait()
+            deadline: float = time.perf_counter() + self.max_wait
+            while (not interactive and 0 < len(bulk) < self.batch_size
+                   and not self._closed):
+                remaining: float = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if not interactive and not bulk:
+                return None
+            batch: List[_Request] = []
+            while interactive and len(batch) < self.max_batch:
+                batch.append(interactive.popleft())
+            while bulk and len(batch) < self.batch_size:
+                batch.append(bulk.popleft())
+            return batch
+
+    def _adapt(self, rows: int, elapsed: float, late: bool) -> None:
+        """Подобрать размер следующей пачки по замерам последней."""
+        cost: float = elapsed / rows
+        if self.cost is None:
+            self.cost = cost
+        else:
+            self.cost += self.SMOOTHING * (cost - self.cost)
+        size: int = self.batch_size
+        if late:
+            size //= 2
+        elif len(self._queues['bulk']) > size:
+            size *= 2
+        limit: float = self.target_latency * self.budget_share / max(
+            self.cost, 1e-9)
+        self.batch_size = int(max(self.min_batch,
+                                  min(size, limit, self.max_batch)))
+
+    def _execute(self, batch: List[_Request]) -> None:
+        started: float = time.perf_counter()
+        try:
+            results: list = self.compute([r.package for r in batch])
+        except Exception as error:
+            results = [error] * len(batch)
+        finished: float = time.perf_counter()
+        late: bool = False
+        with self._condition:
+            stats: SchedulerStats = self.stats
+            stats.batches += 1
+            stats.rows += len(batch)
+            stats.busy += finished - started
+            for request in batch:
+                latency: float = finished - request.submitted
+                stats.latencies[request.lane].append(latency)
+                stats.completed[request.lane] += 1
+                if request.lane == 'interactive':
+                    late = late or latency > self.target_latency
+            stats.failed += sum(isinstance(r, Exception) for r in results)
+            self._adapt(len(batch), finished - started, late)
+        for request, result in zip(batch, results):
+            if isinstance(result, Exception):
+                request.future.set_exception(result)
+            else:
+                request.future.set_result(result)
+
+    def _loop(self) -> None:
+        while True:
+            batch: Optional[List[_Request]] = self._next_batch()
+            if batch is None:
+                return
+            self._execute(batch)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Досчитать очереди и остановить поток расчета."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def __enter__(self) -> 'MicroBatchScheduler':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,181 @@
+"""HTTP-сервер пакетной обработки тренировок.
+POST /batch принимает JSON-массив пакетов [код, данные] и возвращает
+результаты InfoMessage: JSON-объектом или, если клиент принимает
+application/x-ndjson, построчно с передачей по частям (chunked).
+Соединения переиспользуются (HTTP/1.1 keep-alive), число одновременно
+обрабатываемых запросов ограничено - лишние получают 503.
+"""
+import argparse
+import json
+import math
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional
+
+from homework import read_package
+from packages import unpack
+
+NDJSON: str = 'application/x-ndjson'
+
+
+def compute(package) -> dict:
+    """Результат одного пакета или описание ошибки.
+    Бесконечности и NaN в JSON недопустимы, такой результат - ошибка.
+    """
+    try:
+        workout_type, data = package
+        unpack(workout_type, data)
+        info = read_package(workout_type, data).show_training_info()
+        result: dict = {
+            'training_type': info.training_type,
+            'duration': info.duration,
+            'distance': info.distance,
+            'speed': info.speed,
+            'calories': info.calories,
+        }
+        if not all(math.isfinite(value) for value in
+                   (info.duration, info.distance, info.speed, info.calories)):
+            raise OverflowError('Результат расчета вне диапазона чисел')
+    except Exception as error:
+        return {'error': str(error) or type(error).__name__}
+    return result
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к серверу тренировок."""
+    protocol_version = 'HTTP/1.1'
+    CHUNK: int = 1000  # результатов в одной части потокового ответа
+
+    def setup(self) -> None:
+        super().setup()
+        # заголовки и тело пишутся отдельно, без задержки Нейгла
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status: int, body: bytes,
+               content_type: str = 'application/json') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            # тело запроса не прочитано, соединение дальше не годится
+            self.send_header('Connection', 'close')
+        if status == 503:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._reply(status, json.dumps({'error': message}).encode())
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self._reply(200, b'{"status": "ok"}')
+        else:
+            self._error(404, 'Не найдено')
+
+    def do_POST(self) -> None:
+        if self.path != '/batch':
+            self._error(404, 'Не найдено')
+            return
+        length: Optional[int] = self._content_length()
+        if length is None:
+            return
+        # тело читается только под ограничением одновременных запросов
+        if not self.server.limiter.acquire(blocking=False):
+            self.close_connection = True
+            self._error(503, 'Сервер перегружен, повторите позже')
+            return
+        try:
+            try:
+                packages = json.loads(self.rfile.read(length))
+                if not isinstance(packages, list):
+                    raise ValueError('Ожидается массив пакетов')
+            except ValueError as error:
+                self._error(400, str(error))
+                return
+            if NDJSON in self.headers.get('Accept', ''):
+                self._stream(packages)
+            else:
+                results: List[dict] = [compute(p) for p in packages]
+                body: str = json.dumps({'results': results},
+                                       allow_nan=False)
+                self._reply(200, body.encode())
+        finally:
+            self.server.limiter.release()
+
+    def _content_length(self) -> Optional[int]:
+        """Длина тела запроса; None, если на запрос уже дан ответ."""
+        try:
+            length: int = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._error(400, 'Неверный заголовок Content-Length')
+            return None
+        if length > self.server.max_body:
+            self.close_connection = True
+            self._error(413, 'Слишком большой запрос')
+            return None
+        return length
+
+    def _lines(self, packages: list) -> Iterator[bytes]:
+        for start in range(0, len(packages), self.CHUNK):
+            yield ''.join(json.dumps(compute(package), allow_nan=False) + '\n'
+                          for package in packages[start:start + self.CHUNK]
+                          ).encode()
+
+    def _stream(self, packages: list) -> None:
+        """Ответ NDJSON частями по мере расчета."""
+        self.send_response(200)
+        self.send_header('Content-Type', NDJSON)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in self._lines(packages):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class BatchServer(ThreadingHTTPServer):
+    """Сервер с ограничением одновременных запросов."""
+    daemon_threads = True
+
+    def __init__(self,
+                 address: tuple,  # (хост, порт); порт 0 - любой свободный
+                 max_concurrent: int = 8,  # одновременных запросов
+                 max_body: int = 64 * 1024 * 1024,  # размер запроса, байт
+                 verbose: bool = False,  # писать журнал запросов
+                 ) -> None:
+        super().__init__(address, BatchHandler)
+        self.limiter: threading.Semaphore = threading.Semaphore(
+            max_concurrent)
+        self.max_body = max_body
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **options
+                 ) -> BatchServer:
+    """Запустить сервер в фоновом потоке (для тестов и нагрузки)."""
+    server: BatchServer = BatchServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrent', type=int, default=8)
+    arguments = parser.parse_args()
+    BatchServer((arguments.host, arguments.port),
+                arguments.max_concurrent, verbose=True).serve_forever()
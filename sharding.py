@@ -0,0 +1,184 @@
+"""Распределенная обработка файлов пакетов.
+Координатор раскладывает пакеты по шардам по хешу пользователя,
+раздает шарды рабочим процессам через multiprocessing.connection
+и объединяет частичные итоги. Если рабочий процесс падает,
+его шард отдается новому процессу.
+"""
+import os
+import tempfile
+import zlib
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aggregates import TotalsTable
+from homework import InfoMessage
+from packages import read_packages
+
+
+def shard_of(user_id: str, shards: int) -> int:
+    """Номер шарда пользователя. Одинаков во всех процессах."""
+    return zlib.crc32(user_id.encode()) % shards
+
+
+def partition(paths: Iterable[str],  # файлы пакетов
+              shards: int,  # количество шардов
+              directory: str,  # каталог для файлов шардов
+              ) -> List[str]:
+    """Разложить строки файлов пакетов по файлам шардов.
+    Строки копируются как есть, без разбора полей кроме пользователя.
+    """
+    shard_paths: List[str] = [
+        os.path.join(directory, f'shard-{shard:05d}.csv')
+        for shard in range(shards)]
+    files = [open(path, 'w', encoding='utf-8') for path in shard_paths]
+    try:
+        for path in paths:
+            with open(path, encoding='utf-8') as source:
+                for line in source:
+                    user_id: str = line.split(',', 1)[0]
+                    files[shard_of(user_id, shards)].write(line)
+    finally:
+        for file in files:
+            file.close()
+    return shard_paths
+
+
+def process_shard(path: str) -> Tuple[TotalsTable, int]:
+    """Посчитать итоги по файлу шарда.
+    Возвращает итоги и количество пропущенных испорченных строк:
+    нечитаемых и тех, что не удалось рассчитать (например, с нулевой
+    длительностью). Падение рабочего процесса означает сбой, а не
+    плохие данные.
+    """
+    table: TotalsTable = TotalsTable()
+    with open(path, encoding='utf-8') as file:
+        lines: int = sum(1 for _ in file)
+    for package in read_packages(path, skip_errors=True):
+        try:
+            info: InfoMessage = package.training().show_training_info()
+        except (AttributeError, IndexError, TypeError, ValueError,
+                ArithmeticError):
+            continue
+        table.add(package.user_id, info)
+    processed: int = sum(totals.count for _, totals in table)
+    return table, lines - processed
+
+
+def worker(connection: Connection) -> None:
+    """Рабочий процесс: получает пути шардов, отправляет итоги.
+    Сообщение None означает завершение работы.
+    """
+    while True:
+        message: Optional[Tuple[int, str]] = connection.recv()
+        if message is None:
+            break
+        shard, path = message
+        connection.send((shard, process_shard(path)))
+    connection.close()
+
+
+class ShardCoordinator:
+    """Координатор обработки пакетов несколькими процессами."""
+    MAX_ATTEMPTS: int = 3  # попыток обработать один шард
+
+    def __init__(self,
+                 paths: Iterable[str],  # файлы пакетов
+                 workers: int = 4,  # количество рабочих процессов
+                 shards: Optional[int] = None,  # количество шардов
+                 worker_target: Callable[[Connection], None] = worker,
+                 ) -> None:
+        self.paths = list(paths)
+        self.workers = workers
+        self.shards = shards or workers * 4
+        self.worker_target = worker_target
+        self.redispatched: int = 0  # шардов, отданных повторно
+        self.errors: int = 0  # пропущенных испорченных строк
+
+    def _spawn(self) -> Tuple[Process, Connection]:
+        parent, child = Pipe()
+        process: Process = Process(target=self.worker_target, args=(child,),
+                                   daemon=True)
+        process.start()
+        child.close()
+        return process, parent
+
+    def run(self) -> TotalsTable:
+        """Обработать все файлы и вернуть объединенные итоги."""
+        result: TotalsTable = TotalsTable()
+        with tempfile.TemporaryDirectory() as directory:
+            shard_paths: List[str] = partition(self.paths, self.shards,
+                                               directory)
+            queue: List[int] = list(range(self.shards))
+            attempts: Dict[int, int] = {}
+            busy: Dict[Connection, int] = {}
+            pool: Dict[Connection, Process] = {}
+            for _ in range(min(self.workers, self.shards)):
+                process, connection = self._spawn()
+                pool[connection] = process
+            try:
+                while queue or busy:
+                    self._dispatch(shard_paths, queue, attempts, busy, pool)
+                    for connection in wait(list(busy)):
+                        try:
+                            shard, (table, errors) = connection.recv()
+                        except (EOFError, ConnectionError):
+                            self._replace(connection, busy, pool, queue,
+                                          attempts)
+                            continue
+                        del busy[connection]
+                        result.merge(table)
+                        self.errors += errors
+            finally:
+                for connection, process in pool.items():
+                    try:
+                        connection.send(None)
+                    except (OSError, ValueError):
+                        pass
+                    process.join(timeout=5)
+                    connection.close()
+        return result
+
+    def _dispatch(self, shard_paths: List[str], queue: List[int],
+                  attempts: Dict[int, int], busy: dict, pool: dict) -> None:
+        """Раздать шарды свободным процессам.
+        Процесс, упавший между шардами, заменяется новым, а шард
+        остается в очереди и попыткой не считается.
+        """
+        idle: List[Connection] = [connection for connection in pool
+                                  if connection not in busy]
+        while queue and idle:
+            connection: Connection = idle.pop()
+            shard: int = queue.pop()
+            if pool[connection].is_alive():
+                try:
+                    connection.send((shard, shard_paths[shard]))
+                except (OSError, ValueError):
+                    pass
+                else:
+                    attempts[shard] = attempts.get(shard, 0) + 1
+                    busy[connection] = shard
+                    continue
+            queue.append(shard)
+            idle.append(self._respawn(connection, pool))
+
+    def _respawn(self, connection: Connection, pool: dict) -> Connection:
+        """Заменить рабочий процесс новым, вернуть его соединение."""
+        pool.pop(connection).join()
+        connection.close()
+        process, new_connection = self._spawn()
+        pool[new_connection] = process
+        return new_connection
+
+    def _replace(self, connection: Connection, busy: dict, pool: dict,
+                 queue: List[int], attempts: Dict[int, int]) -> None:
+        """Заменить упавший рабочий процесс и вернуть шард в очередь."""
+        shard: int = busy.pop(connection)
+        if attempts[shard] >= self.MAX_ATTEMPTS:
+            pool.pop(connection).join()
+            connection.close()
+            raise RuntimeError(
+                f'Шард {shard} не обработан за {self.MAX_ATTEMPTS} попытки')
+        queue.append(shard)
+        self.redispatched += 1
+        self._respawn(connection, pool)
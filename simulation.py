@@ -0,0 +1,127 @@
+"""Моделирование тренировок по сетке параметров.
+Каждый параметр тренировки задается числом или последовательностью
+значений. Числа распространяются на всю сетку, последовательности
+образуют оси декартова произведения. Расчет идет по колонкам формулами
+из formulas.py без создания объектов тренировок.
+"""
+import math
+from array import array
+from itertools import islice, product
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from formulas import compute
+from packages import OUTPUT_FIELDS, PACKAGE_FIELDS, normalize_code
+
+CHUNK_SIZE: int = 65536  # точек сетки в одной порции по умолчанию
+
+
+def _axes(code: str, params: dict) -> Tuple[Dict[str, float],
+                                            Dict[str, Sequence[float]]]:
+    """Разделить параметры на постоянные и оси сетки."""
+    fields: Tuple[str, ...] = PACKAGE_FIELDS[code]
+    unknown: List[str] = [name for name in params if name not in fields]
+    missing: List[str] = [name for name in fields if name not in params]
+    if unknown or missing:
+        raise TypeError(
+            f'Для {code} нужны параметры {", ".join(fields)}; '
+            f'лишние: {unknown}, не заданы: {missing}')
+    scalars: Dict[str, float] = {}
+    axes: Dict[str, Sequence[float]] = {}
+    for name in fields:
+        value = params[name]
+        if isinstance(value, (int, float)):
+            scalars[name] = value
+        else:
+            axes[name] = list(value)
+    return scalars, axes
+
+
+class SimulationResult:
+    """Результаты моделирования в плоских массивах.
+    Порядок точек - как у itertools.product по осям в порядке полей пакета.
+    """
+
+    def __init__(self,
+                 workout_type: str,  # код тренировки
+                 axes: Dict[str, Sequence[float]],  # оси сетки
+                 columns: Dict[str, array],  # результаты по колонкам
+                 ) -> None:
+        self.workout_type = workout_type
+        self.axes = axes
+        self.shape: Tuple[int, ...] = tuple(len(v) for v in axes.values())
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return math.prod(self.shape)
+
+    def __getattr__(self, name: str) -> array:
+        if name in OUTPUT_FIELDS:
+            return self.columns[name]
+        raise AttributeError(name)
+
+    def index(self, **coordinates: int) -> int:
+        """Номер точки в плоских массивах по номерам значений на осях."""
+        flat: int = 0
+        for name, size in zip(self.axes, self.shape):
+            flat = flat * size + coordinates.get(name, 0)
+        return flat
+
+    def point(self, **coordinates: int) -> Dict[str, float]:
+        """Результаты в точке сетки."""
+        flat: int = self.index(**coordinates)
+        return {name: values[flat] for name, values in self.columns.items()}
+
+
+def iter_simulation(workout_type: str,  # код тренировки
+                    chunk_size: int = CHUNK_SIZE,  # точек в порции
+                    coefficients: Optional[Dict[str, float]] = None,
+                    outputs: Sequence[str] = OUTPUT_FIELDS,
+                    **params,  # значения или последовательности значений
+                    ) -> Iterator[Tuple[int, Dict[str, array]]]:
+    """Рассчитать сетку порциями.
+    Возвращает пары (номер первой точки порции, колонки результатов),
+    так что в памяти одновременно находится только одна порция.
+    """
+    code: str = normalize_code(workout_type)
+    scalars, axes = _axes(code, params)
+    points: Iterator[tuple] = product(*axes.values())
+    start: int = 0
+    while True:
+        chunk: List[tuple] = list(islice(points, chunk_size))
+        if not chunk:
+            return
+        size: int = len(chunk)
+        columns: Dict[str, list] = dict(zip(axes, zip(*chunk)))
+        for name, value in scalars.items():
+            columns[name] = [value] * size
+        result = compute(code, columns, coefficients, outputs)
+        yield start, {name: array('d', values)
+                      for name, values in result.items()}
+        start += size
+
+
+def simulate(workout_type: str,  # код тренировки
+             coefficients: Optional[Dict[str, float]] = None,
+             outputs: Sequence[str] = OUTPUT_FIELDS,
+             chunk_size: int = CHUNK_SIZE,  # точек в порции при расчете
+             **params,  # значения или последовательности значений
+             ) -> SimulationResult:
+    """Рассчитать всю сетку параметров.
+    Пример: simulate('RUN', action=[9000, 9450], duration=1,
+    weight=range(70, 80)) - 20 тренировок.
+    """
+    code: str = normalize_code(workout_type)
+    _, axes = _axes(code, params)
+    columns: Dict[str, array] = {name: array('d') for name in outputs}
+    for _, chunk in iter_simulation(code, chunk_size, coefficients,
+                                    outputs, **params):
+        for name, values in chunk.items():
+            columns[name].extend(values)
+    return SimulationResult(code, axes, columns)
+
+
+def scaled(base: float, factors: Sequence[float]) -> List[float]:
+    """Значения параметра, умноженного на каждый из коэффициентов.
+    Пример: scaled(9000, [1, 1.05]) - план на 5% больше шагов.
+    """
+    return [base * factor for factor in factors]
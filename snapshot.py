@@ -0,0 +1,290 @@
+"""Снимки состояния обработки в компактном двоичном файле.
+В снимок попадают итоги пользователей (TotalsTable), состояние удаления
+повторов (Deduplicator), нагрузка и форма (TrendEngine) и статистика
+детектора аномалий (AnomalyDetector). Файл открывается через mmap:
+итоги ищутся двоичным поиском прямо в отображенном файле, остальные
+части разбираются только по запросу. Запись в фоне сначала быстро
+копирует состояние, а кодирует и пишет файл уже в отдельном потоке.
+"""
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aggregates import Totals, TotalsTable
+from anomaly import STATE_SIZE, AnomalyDetector
+from ingest import BloomFilter, Deduplicator
+from trends import TrendEngine, TrendState
+
+MAGIC: bytes = b'WKSNAP2\n'  # сигнатура файла снимка
+SECTION = struct.Struct('<16sQQ')  # имя, смещение, длина раздела
+COUNT = struct.Struct('<I')
+TOTALS_RECORD = struct.Struct('<IIqddd')  # ключ, итоги
+TREND_RECORD = struct.Struct('<IIqdd')  # ключ, день, ATL, CTL
+ANOMALY_RECORD = struct.Struct('<IIQ')  # ключ, смещение в массиве
+DEDUP_HEADER = struct.Struct('<QQII')  # окно, емкость, поколения, ключей
+BLOOM_HEADER = struct.Struct('<QIQ')  # размер, хеш-функций, элементов
+HIGH_WATER = struct.Struct('<q')  # наибольший номер пакета устройства
+
+
+def _key(*parts: str) -> bytes:
+    return '\x00'.join(parts).encode()
+
+
+def _keyed_section(record: struct.Struct, rows: List[Tuple[bytes, tuple]]
+                   ) -> bytes:
+    """Раздел из записей, отсортированных по ключу.
+    Формат: число записей, записи фиксированной длины, строки ключей.
+    """
+    rows = sorted(rows)
+    keys: bytearray = bytearray()
+    records: bytearray = bytearray(COUNT.pack(len(rows)))
+    base: int = COUNT.size + record.size * len(rows)
+    for key, values in rows:
+        records += record.pack(base + len(keys), len(key), *values)
+        keys += key
+    return bytes(records + keys)
+
+
+class _KeyedView:
+    """Записи раздела с ключами поверх буфера без копирования."""
+
+    def __init__(self, buffer: memoryview, record: struct.Struct) -> None:
+        self.buffer = buffer
+        self.record = record
+        (self.count,) = COUNT.unpack_from(buffer, 0)
+
+    def _row(self, index: int) -> tuple:
+        return self.record.unpack_from(
+            self.buffer, COUNT.size + index * self.record.size)
+
+    def _key(self, row: tuple) -> bytes:
+        return bytes(self.buffer[row[0]:row[0] + row[1]])
+
+    def find(self, key: bytes) -> Optional[tuple]:
+        """Значения записи по ключу, двоичный поиск."""
+        low, high = 0, self.count
+        while low < high:
+            middle: int = (low + high) // 2
+            row: tuple = self._row(middle)
+            current: bytes = self._key(row)
+            if current == key:
+                return row[2:]
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __iter__(self):
+        for index in range(self.count):
+            row: tuple = self._row(index)
+            yield self._key(row).decode().split('\x00'), row[2:]
+
+
+class StateCopy:
+    """Копия состояния, снятая для записи снимка."""
+
+    def __init__(self,
+                 totals: Optional[TotalsTable] = None,
+                 deduplicator: Optional[Deduplicator] = None,
+                 trends: Optional[TrendEngine] = None,
+                 anomaly: Optional[AnomalyDetector] = None,
+                 ) -> None:
+        self.totals = None if totals is None else [
+            (_key(*key), value.as_tuple())
+            for key, value in totals.rows.items()]
+        self.deduplicator = None if deduplicator is None else (
+            deduplicator.window, deduplicator.capacity,
+            deduplicator.generations, list(deduplicator.recent),
+            [(f.size, f.hashes, f.count, bytes(f.bits))
+             for f in deduplicator.filters],
+            dict(deduplicator.high_water))
+        self.trends = None if trends is None else [
+            (_key(user_id), (state.day, state.atl, state.ctl))
+            for user_id, state in trends.states.items()]
+        self.anomaly = None if anomaly is None else (
+            dict(anomaly.index), array('d', anomaly.state), anomaly.flagged)
+
+    def sections(self) -> Dict[str, bytes]:
+        """Закодировать скопированное состояние по разделам."""
+        sections: Dict[str, bytes] = {}
+        if self.totals is not None:
+            sections['totals'] = _keyed_section(TOTALS_RECORD, self.totals)
+        if self.trends is not None:
+            sections['trends'] = _keyed_section(TREND_RECORD, self.trends)
+        if self.deduplicator is not None:
+            window, capacity, generations, recent, filters, high_water = \
+                self.deduplicator
+            data: bytearray = bytearray(DEDUP_HEADER.pack(
+                window, capacity, generations, len(recent)))
+            for key in recent:
+                data += COUNT.pack(len(key)) + key
+            data += COUNT.pack(len(filters))
+            for size, hashes, count, bits in filters:
+                data += BLOOM_HEADER.pack(size, hashes, count) + bits
+            data += COUNT.pack(len(high_water))
+            for device_id, seq in high_water.items():
+                device: bytes = device_id.encode()
+                data += COUNT.pack(len(device)) + device + HIGH_WATER.pack(seq)
+            sections['dedup'] = bytes(data)
+        if self.anomaly is not None:
+            index, state, flagged = self.anomaly
+            rows = [(_key(*key), (offset,)) for key, offset in index.items()]
+            keys: bytes = _keyed_section(ANOMALY_RECORD, rows)
+            sections['anomaly'] = (struct.pack('<QQ', flagged, len(keys))
+                                   + keys + state.tobytes())
+        return sections
+
+
+def write_snapshot(path: str, state: StateCopy) -> None:
+    """Записать снимок атомарно: во временный файл и переименованием."""
+    sections: Dict[str, bytes] = state.sections()
+    offset: int = len(MAGIC) + COUNT.size + SECTION.size * len(sections)
+    table: bytearray = bytearray(COUNT.pack(len(sections)))
+    for name, data in sections.items():
+        table += SECTION.pack(name.encode(), offset, len(data))
+        offset += len(data)
+    temporary: str = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC)
+        file.write(table)
+        for data in sections.values():
+            file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def save_snapshot(path: str, **state) -> None:
+    """Сохранить снимок. Аргументы - как у StateCopy."""
+    write_snapshot(path, StateCopy(**state))
+
+
+def save_snapshot_async(path: str, lock: Optional[threading.Lock] = None,
+                        **state) -> threading.Thread:
+    """Сохранить снимок в фоне.
+    Под lock (если передан) состояние только копируется, после чего
+    обработка может продолжаться, пока поток пишет файл.
+    """
+    if lock is None:
+        copy: StateCopy = StateCopy(**state)
+    else:
+        with lock:
+            copy = StateCopy(**state)
+    thread: threading.Thread = threading.Thread(
+        target=write_snapshot, args=(path, copy), daemon=True)
+    thread.start()
+    return thread
+
+
+class Snapshot:
+    """Снимок, открытый через mmap."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0,
+                                             access=mmap.ACCESS_READ)
+        self._buffer: memoryview = memoryview(self._map)
+        if bytes(self._buffer[:len(MAGIC)]) != MAGIC:
+            self.close()
+            raise ValueError(f'{path} не является снимком состояния')
+        (count,) = COUNT.unpack_from(self._buffer, len(MAGIC))
+        self.sections: Dict[str, memoryview] = {}
+        for number in range(count):
+            name, offset, length = SECTION.unpack_from(
+                self._buffer, len(MAGIC) + COUNT.size + number * SECTION.size)
+            self.sections[name.rstrip(b'\x00').decode()] = \
+                self._buffer[offset:offset + length]
+
+    def _section(self, name: str) -> memoryview:
+        if name not in self.sections:
+            raise KeyError(f'В снимке нет раздела {name!r}')
+        return self.sections[name]
+
+    def lookup_totals(self, user_id: str, training_type: str
+                      ) -> Optional[Totals]:
+        """Итоги пользователя прямо из файла, без загрузки таблицы."""
+        view: _KeyedView = _KeyedView(self._section('totals'), TOTALS_RECORD)
+        values: Optional[tuple] = view.find(_key(user_id, training_type))
+        return None if values is None else Totals(*values)
+
+    def totals(self) -> TotalsTable:
+        table: TotalsTable = TotalsTable()
+        for (user_id, training_type), values in _KeyedView(
+                self._section('totals'), TOTALS_RECORD):
+            table.rows[(user_id, training_type)] = Totals(*values)
+        return table
+
+    def trends(self, keep_history: bool = False) -> TrendEngine:
+        engine: TrendEngine = TrendEngine(keep_history)
+        for (user_id,), values in _KeyedView(self._section('trends'),
+                                             TREND_RECORD):
+            engine.states[user_id] = TrendState(*values)
+        return engine
+
+    def deduplicator(self) -> Deduplicator:
+        data: memoryview = self._section('dedup')
+        window, capacity, generations, keys = DEDUP_HEADER.unpack_from(data)
+        dedup: Deduplicator = Deduplicator(window, 1, generations)
+        dedup.capacity = capacity
+        position: int = DEDUP_HEADER.size
+        recent: 'OrderedDict[bytes, None]' = OrderedDict()
+        for _ in range(keys):
+            (length,) = COUNT.unpack_from(data, position)
+            position += COUNT.size
+            recent[bytes(data[position:position + length])] = None
+            position += length
+        dedup.recent = recent
+        (count,) = COUNT.unpack_from(data, position)
+        position += COUNT.size
+        filters: List[BloomFilter] = []
+        for _ in range(count):
+            size, hashes, items = BLOOM_HEADER.unpack_from(data, position)
+            position += BLOOM_HEADER.size
+            bloom: BloomFilter = BloomFilter(1, hashes)
+            bloom.size = size
+            bloom.count = items
+            length = (size + 7) // 8
+            bloom.bits = bytearray(data[position:position + length])
+            position += length
+            filters.append(bloom)
+        dedup.filters = filters
+        (count,) = COUNT.unpack_from(data, position)
+        position += COUNT.size
+        for _ in range(count):
+            (length,) = COUNT.unpack_from(data, position)
+            position += COUNT.size
+            device_id: str = bytes(data[position:position + length]).decode()
+            position += length
+            (dedup.high_water[device_id],) = HIGH_WATER.unpack_from(
+                data, position)
+            position += HIGH_WATER.size
+        return dedup
+
+    def anomaly(self) -> AnomalyDetector:
+        data: memoryview = self._section('anomaly')
+        flagged, length = struct.unpack_from('<QQ', data)
+        detector: AnomalyDetector = AnomalyDetector()
+        detector.flagged = flagged
+        for key, values in _KeyedView(data[16:16 + length], ANOMALY_RECORD):
+            detector.index[tuple(key)] = values[0]
+        detector.state.frombytes(data[16 + length:])
+        if len(detector.state) != STATE_SIZE * len(detector.index):
+            raise ValueError('Поврежден раздел детектора аномалий')
+        return detector
+
+    def close(self) -> None:
+        self.sections = {}
+        self._buffer.release()
+        self._map.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,253 @@
+"""Оконная обработка потока пакетов по времени события.
+Пакеты превращаются в InfoMessage через классы тренировок и сразу
+сворачиваются в агрегат своей панели - отрезка времени длиной в шаг
+окна. Результат окна собирается из панелей,
+поэтому сами пакеты в окнах не хранятся. Окно выдается, как только
+водяной знак (наибольшее время минус допустимое опоздание) проходит
+его конец.
+"""
+import heapq
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from aggregates import Totals
+from homework import InfoMessage
+from packages import Package, normalize_code
+
+
+class WindowAggregate:
+    """Агрегат панели или окна: итоги и активные пользователи."""
+    __slots__ = ('totals', 'users')
+
+    def __init__(self) -> None:
+        self.totals: Totals = Totals()
+        self.users: Set[str] = set()
+
+    def add(self, package: Package, info: InfoMessage) -> None:
+        self.totals.add(info)
+        self.users.add(package.user_id)
+
+    def merge(self, other: 'WindowAggregate') -> None:
+        self.totals.merge(other.totals)
+        self.users |= other.users
+
+
+class WindowResult:
+    """Результат окна [start, end) для ключа."""
+    __slots__ = ('key', 'start', 'end', 'totals', 'active_users')
+
+    def __init__(self, key: str, start: float, end: float,
+                 aggregate: WindowAggregate) -> None:
+        self.key = key
+        self.start = start
+        self.end = end
+        self.totals: Totals = aggregate.totals
+        self.active_users: int = len(aggregate.users)
+
+    def __repr__(self) -> str:
+        return (f'WindowResult({self.key!r}, {self.start}, {self.end}, '
+                f'{self.totals!r}, active_users={self.active_users})')
+
+
+def _info(package: Package) -> Optional[InfoMessage]:
+    """Результат пакета или None, если пакет испорчен."""
+    try:
+        return package.training().show_training_info()
+    except (AttributeError, IndexError, TypeError, ValueError,
+            ArithmeticError):
+        return None
+
+
+def by_type(package: Package) -> str:
+    """Ключ окна - код тренировки."""
+    return normalize_code(package.workout_type)
+
+
+def overall(package: Package) -> str:
+    """Один общий ключ для всех пакетов."""
+    return '*'
+
+
+class SlidingWindows:
+    """Скользящие окна длины size с шагом slide, секунд.
+    Длина окна кратна шагу, поэтому панель - отрезок длиной в шаг,
+    а окно состоит из size / slide панелей. Шаг, равный размеру,
+    дает неперекрывающиеся (tumbling) окна.
+    """
+
+    def __init__(self,
+                 size: float,  # длина окна
+                 slide: Optional[float] = None,  # шаг окна
+                 lateness: float = 0.0,  # допустимое опоздание
+                 key=overall,  # функция ключа пакета
+                 ) -> None:
+        self.size = size
+        self.slide = slide or size
+        if self.size % self.slide:
+            raise ValueError('Длина окна должна быть кратна шагу')
+        self.pane: float = self.slide  # длина панели
+        self.lateness = lateness
+        self.key = key
+        self.panes: Dict[Tuple[str, int], WindowAggregate] = {}
+        self.watermark: float = -math.inf
+        self._max_time: float = -math.inf
+        self._next_end: Optional[float] = None  # конец следующего окна
+        self.dropped: int = 0  # опоздавших пакетов
+        self.malformed: int = 0  # испорченных пакетов
+
+    def push(self, package: Package) -> List[WindowResult]:
+        """Учесть пакет и вернуть окна, закрытые водяным знаком."""
+        if package.timestamp < self.watermark:
+            self.dropped += 1
+            return []
+        info: Optional[InfoMessage] = _info(package)
+        if info is None:
+            self.malformed += 1
+            return []
+        pane: int = int(package.timestamp // self.pane)
+        key: Tuple[str, int] = (self.key(package), pane)
+        aggregate: Optional[WindowAggregate] = self.panes.get(key)
+        if aggregate is None:
+            aggregate = self.panes[key] = WindowAggregate()
+        aggregate.add(package, info)
+        end: float = (pane + 1) * self.pane
+        if self._next_end is None or end < self._next_end:
+            # окна с этой панелью еще не выданы: их конец не раньше
+            # водяного знака, а пакет не старше него
+            self._next_end = end
+        self._max_time = max(self._max_time, package.timestamp)
+        return self._advance(self._max_time - self.lateness)
+
+    def flush(self) -> List[WindowResult]:
+        """Закрыть все окна с данными (конец потока).
+        После этого новые пакеты считаются опоздавшими.
+        """
+        return self._advance(math.inf)
+
+    def _advance(self, watermark: float) -> List[WindowResult]:
+        self.watermark = max(self.watermark, watermark)
+        results: List[WindowResult] = []
+        while self._next_end is not None and self._next_end <= self.watermark:
+            if not self.panes:
+                break
+            end: float = self._next_end
+            start: float = end - self.size
+            windows: Dict[str, WindowAggregate] = {}
+            for (key, pane), aggregate in self.panes.items():
+                if start <= pane * self.pane < end:
+                    merged = windows.get(key)
+                    if merged is None:
+                        merged = windows[key] = WindowAggregate()
+                    merged.merge(aggregate)
+            for key in sorted(windows):
+                results.append(WindowResult(key, start, end, windows[key]))
+            self._next_end = end + self.slide
+            if not windows:
+                # пропустить пустые окна до первой панели с данными
+                earliest: int = min(pane for _, pane in self.panes)
+                self._next_end = max(
+                    self._next_end, (earliest + 1) * self.pane)
+            horizon: float = self._next_end - self.size
+            self.panes = {pane_key: aggregate for pane_key, aggregate
+                          in self.panes.items()
+                          if pane_key[1] * self.pane >= horizon}
+        return results
+
+    def process(self, packages: Iterable[Package]
+                ) -> Iterator[WindowResult]:
+        for package in packages:
+            yield from self.push(package)
+        yield from self.flush()
+
+
+def tumbling(size: float, lateness: float = 0.0, key=overall
+             ) -> SlidingWindows:
+    """Неперекрывающиеся окна длины size."""
+    return SlidingWindows(size, size, lateness, key)
+
+
+class SessionWindows:
+    """Окна-сессии: пакеты ключа, разделенные перерывом меньше gap.
+    Сессия выдается, когда водяной знак уходит дальше ее конца плюс gap.
+    """
+
+    def __init__(self,
+                 gap: float,  # перерыв, завершающий сессию, секунд
+                 lateness: float = 0.0,  # допустимое опоздание
+                 key=lambda package: package.user_id,  # ключ сессии
+                 ) -> None:
+        self.gap = gap
+        self.lateness = lateness
+        self.key = key
+        # открытые сессии ключа: [начало, время последнего пакета, агрегат]
+        self.sessions: Dict[str, List[list]] = {}
+        # сроки закрытия сессий (последний пакет + gap, ключ); после
+        # склейки старые сроки остаются в куче и пропускаются
+        self._expiry: List[Tuple[float, str]] = []
+        self.watermark: float = -math.inf
+        self._max_time: float = -math.inf
+        self.dropped: int = 0
+        self.malformed: int = 0
+
+    def push(self, package: Package) -> List[WindowResult]:
+        """Учесть пакет и вернуть сессии, закрытые водяным знаком.
+        Пакет может склеить несколько открытых сессий ключа в одну.
+        """
+        if package.timestamp < self.watermark:
+            self.dropped += 1
+            return []
+        info: Optional[InfoMessage] = _info(package)
+        if info is None:
+            self.malformed += 1
+            return []
+        time: float = package.timestamp
+        key: str = self.key(package)
+        sessions: List[list] = self.sessions.setdefault(key, [])
+        touching: List[list] = [s for s in sessions
+                                if s[0] - self.gap < time < s[1] + self.gap]
+        session: list = [time, time, WindowAggregate()]
+        for other in touching:
+            sessions.remove(other)
+            session[0] = min(session[0], other[0])
+            session[1] = max(session[1], other[1])
+            session[2].merge(other[2])
+        session[2].add(package, info)
+        sessions.append(session)
+        heapq.heappush(self._expiry, (session[1] + self.gap, key))
+        self._max_time = max(self._max_time, time)
+        return self._advance(self._max_time - self.lateness)
+
+    def flush(self) -> List[WindowResult]:
+        """Закрыть все сессии (конец потока)."""
+        return self._advance(math.inf)
+
+    def _advance(self, watermark: float) -> List[WindowResult]:
+        """Выдать сессии, срок которых прошел; смотрятся только ключи
+        из вершины кучи сроков, а не все открытые сессии.
+        """
+        self.watermark = max(self.watermark, watermark)
+        results: List[WindowResult] = []
+        while self._expiry and self._expiry[0][0] <= self.watermark:
+            _, key = heapq.heappop(self._expiry)
+            sessions: Optional[List[list]] = self.sessions.get(key)
+            if sessions is None:
+                continue
+            open_sessions: List[list] = []
+            for start, last, aggregate in sessions:
+                if last + self.gap <= self.watermark:
+                    results.append(WindowResult(key, start, last + self.gap,
+                                                aggregate))
+                else:
+                    open_sessions.append([start, last, aggregate])
+            if open_sessions:
+                self.sessions[key] = open_sessions
+            else:
+                del self.sessions[key]
+        results.sort(key=lambda result: (result.key, result.start))
+        return results
+
+    def process(self, packages: Iterable[Package]
+                ) -> Iterator[WindowResult]:
+        for package in packages:
+            yield from self.push(package)
+        yield from self.flush()
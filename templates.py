@@ -0,0 +1,95 @@
+"""Локализованные сообщения о тренировках.
+Шаблон для пары (язык, система единиц) собирается один раз в строку
+формата str.format, поэтому вывод каждого сообщения - один вызов
+format без разбора шаблона и поиска переводов.
+"""
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List
+
+from homework import InfoMessage
+
+# шаблоны сообщений; поля: type, duration, distance, speed, calories,
+# а также единицы измерения distance_unit и speed_unit
+LOCALES: Dict[str, dict] = {
+    'ru': {
+        'template': ('Тип тренировки: {type}; '
+                     'Длительность: {duration} ч.; '
+                     'Дистанция: {distance} {distance_unit}; '
+                     'Ср. скорость: {speed} {speed_unit}; '
+                     'Потрачено ккал: {calories}.'),
+        'units': {'metric': ('км', 'км/ч'), 'imperial': ('мили', 'миль/ч')},
+        'types': {},
+    },
+    'en': {
+        'template': ('Workout type: {type}; '
+                     'Duration: {duration} h; '
+                     'Distance: {distance} {distance_unit}; '
+                     'Avg. speed: {speed} {speed_unit}; '
+                     'Calories burned: {calories}.'),
+        'units': {'metric': ('km', 'km/h'), 'imperial': ('mi', 'mph')},
+        'types': {'SportsWalking': 'Race walking'},
+    },
+    'de': {
+        'template': ('Trainingsart: {type}; '
+                     'Dauer: {duration} Std.; '
+                     'Strecke: {distance} {distance_unit}; '
+                     'Durchschn. Tempo: {speed} {speed_unit}; '
+                     'Verbrannte kcal: {calories}.'),
+        'units': {'metric': ('km', 'km/h'), 'imperial': ('mi', 'mph')},
+        'types': {'Running': 'Laufen', 'SportsWalking': 'Gehen',
+                  'Swimming': 'Schwimmen'},
+    },
+}
+
+# множитель перевода километров в единицы системы
+DISTANCE_FACTORS: Dict[str, float] = {'metric': 1.0, 'imperial': 0.621371}
+
+PRECISION: int = 3  # знаков после запятой в числах сообщения
+
+
+@lru_cache(maxsize=None)
+def compile_formatter(locale: str = 'ru', units: str = 'metric'
+                      ) -> Callable[[InfoMessage], str]:
+    """Собрать функцию вывода сообщения для языка и системы единиц."""
+    if locale not in LOCALES:
+        raise ValueError(f'Неизвестный язык: {locale!r}')
+    if units not in DISTANCE_FACTORS:
+        raise ValueError(f'Неизвестная система единиц: {units!r}')
+    spec: dict = LOCALES[locale]
+    distance_unit, speed_unit = spec['units'][units]
+    number: str = f':.{PRECISION}f'
+    template: str = spec['template'].format(
+        type='{0}',
+        duration='{1' + number + '}',
+        distance='{2' + number + '}',
+        speed='{3' + number + '}',
+        calories='{4' + number + '}',
+        distance_unit=distance_unit.replace('{', '{{').replace('}', '}}'),
+        speed_unit=speed_unit.replace('{', '{{').replace('}', '}}'),
+    )
+    fill: Callable[..., str] = template.format
+    types: Dict[str, str] = spec['types']
+    factor: float = DISTANCE_FACTORS[units]
+    if factor == 1.0 and not types:
+        def formatter(info: InfoMessage) -> str:
+            return fill(info.training_type, info.duration, info.distance,
+                        info.speed, info.calories)
+    else:
+        def formatter(info: InfoMessage) -> str:
+            return fill(types.get(info.training_type, info.training_type),
+                        info.duration, info.distance * factor,
+                        info.speed * factor, info.calories)
+    return formatter
+
+
+def render(info: InfoMessage, locale: str = 'ru', units: str = 'metric'
+           ) -> str:
+    """Сообщение о тренировке на нужном языке и в нужных единицах."""
+    return compile_formatter(locale, units)(info)
+
+
+def render_many(infos: Iterable[InfoMessage], locale: str = 'ru',
+                units: str = 'metric') -> List[str]:
+    """Сообщения для многих тренировок с одним собранным шаблоном."""
+    formatter: Callable[[InfoMessage], str] = compile_formatter(locale, units)
+    return [formatter(info) for info in infos]
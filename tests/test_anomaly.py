@@ -0,0 +1,111 @@
+import math
+import statistics
+
+import pytest
+
+import anomaly
+import homework
+
+
+def running(action, weight=75, duration=1):
+    return homework.Running(action, duration, weight).show_training_info()
+
+
+ACTIONS = [9000, 9500, 10000, 8700, 9200, 9900, 10100, 9400]
+
+
+def test_welford_matches_statistics():
+    detector = anomaly.AnomalyDetector()
+    infos = [running(action) for action in ACTIONS]
+    for info in infos:
+        assert not detector.observe('user', info)
+    count, speed_mean, speed_var, cal_mean, cal_var = detector.stats(
+        'user', 'Running')
+    assert count == len(ACTIONS)
+    assert speed_mean == pytest.approx(
+        statistics.mean(i.speed for i in infos))
+    assert speed_var == pytest.approx(
+        statistics.variance(i.speed for i in infos))
+    assert cal_var == pytest.approx(
+        statistics.variance(i.calories for i in infos))
+
+
+def test_detects_glitch():
+    detector = anomaly.AnomalyDetector()
+    for action in ACTIONS:
+        detector.observe('user', running(action))
+    assert detector.observe('user', running(60000)), (
+        'Резкий скачок скорости должен считаться аномалией.'
+    )
+    assert detector.stats('user', 'Running')[0] == len(ACTIONS), (
+        'Аномалии не должны попадать в статистику.'
+    )
+    assert not detector.observe('user', running(9700))
+    assert detector.flagged == 1
+
+
+def test_identical_workouts_do_not_lock_user_out():
+    detector = anomaly.AnomalyDetector()
+    for _ in range(anomaly.AnomalyDetector.MIN_COUNT + 1):
+        assert not detector.observe('user', running(9000))
+    assert not detector.observe('user', running(9001)), (
+        'После одинаковых тренировок почти такая же не должна '
+        'считаться аномалией.'
+    )
+    assert detector.observe('user', running(60000))
+
+
+def test_longer_workout_at_same_pace_is_not_flagged():
+    detector = anomaly.AnomalyDetector()
+    for action in ACTIONS:
+        detector.observe('user', running(action))
+    for _ in range(5):
+        assert not detector.observe('user', running(9400 * 1.5,
+                                                    duration=1.5)), (
+            'Калории растут с длительностью, сравнивать нужно калории в час.'
+        )
+
+
+def test_sustained_change_is_accepted():
+    detector = anomaly.AnomalyDetector()
+    for action in ACTIONS:
+        detector.observe('user', running(action))
+    flags = [detector.observe('user', running(10500 * 1.5))
+             for _ in range(20)]
+    assert flags[0]
+    assert not any(flags[anomaly.AnomalyDetector.ADMIT_AFTER:]), (
+        'Повторяющийся выброс - новый уровень пользователя.'
+    )
+    assert detector.observe('user', running(900000))
+
+
+def test_physical_limit_without_history():
+    detector = anomaly.AnomalyDetector()
+    assert detector.score('new', running(900000)) == math.inf
+    assert detector.observe('new', running(900000))
+    assert detector.score('new', running(9000)) == 0.0
+
+
+def test_batch_fit_and_score_match_streaming():
+    streaming = anomaly.AnomalyDetector()
+    batch = anomaly.AnomalyDetector()
+    infos = [running(action) for action in ACTIONS * 2]
+    users = ['a', 'b'] * len(ACTIONS)
+    for user, info in zip(users, infos):
+        streaming.observe(user, info)
+    half = len(infos) // 2
+    for part in (slice(0, half), slice(half, None)):
+        batch.fit_batch(users[part], ['Running'] * half,
+                        [i.speed for i in infos[part]],
+                        [i.calories for i in infos[part]],
+                        [i.duration for i in infos[part]])
+    for user in 'ab':
+        assert batch.stats(user, 'Running') == pytest.approx(
+            streaming.stats(user, 'Running'))
+    probe = [running(9300), running(60000), running(900000)]
+    scores = batch.score_batch(['a'] * 3, ['Running'] * 3,
+                               [i.speed for i in probe],
+                               [i.calories for i in probe],
+                               [i.duration for i in probe])
+    assert scores[0] < batch.THRESHOLD < scores[1]
+    assert scores[2] == math.inf
@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+import archive
+import homework
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [1206, 12, 6]),
+    ('SWM', [420, 4, 20, 42, 4]),
+]
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / 'workouts.wkar')
+    with archive.ArchiveWriter(path, block_size=2) as writer:
+        writer.extend(PACKAGES)
+    return path
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'lzma'])
+def test_archive_roundtrip(tmp_path, codec):
+    path = str(tmp_path / 'workouts.wkar')
+    with archive.ArchiveWriter(path, block_size=2, codec=codec) as writer:
+        writer.extend(PACKAGES)
+    with archive.ArchiveReader(path) as reader:
+        assert len(reader) == len(PACKAGES)
+        assert len(reader.blocks) == 3
+        assert reader.read_column('type') == [p[0] for p in PACKAGES]
+        assert reader.read_column('action') == [p[1][0] for p in PACKAGES]
+        calories = reader.read_column('calories')
+    for (workout_type, data), value in zip(PACKAGES, calories):
+        training = homework.read_package(workout_type, data)
+        assert value == training.get_spent_calories(), (
+            'Архив должен хранить результаты без потери точности.'
+        )
+
+
+def test_archive_missing_fields_are_nan(archive_path):
+    with archive.ArchiveReader(archive_path) as reader:
+        heights = reader.read_column('height')
+    assert heights[2] == 180
+    assert all(math.isnan(h) for i, h in enumerate(heights) if i != 2)
+
+
+def test_archive_block_skipping(archive_path, monkeypatch):
+    with archive.ArchiveReader(archive_path) as reader:
+        read = []
+        original = reader.read_block
+
+        def spy(index, columns):
+            read.append((index, tuple(columns)))
+            return original(index, columns)
+
+        monkeypatch.setattr(reader, 'read_block', spy)
+        result = reader.read_column('weight', where={'duration': (10, None)})
+    assert result == [6.0]
+    assert [index for index, _ in read] == [1], (
+        'Блоки, не подходящие по статистике, не должны читаться.'
+    )
+    assert read[0][1] == ('weight', 'duration')
+
+
+def test_archive_type_filter(archive_path):
+    with archive.ArchiveReader(archive_path) as reader:
+        pools = reader.read_column('length_pool', where={'type': {'SWM'}})
+    assert pools == [25.0, 42.0]
+
+
+def test_archive_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not an archive at all')
+    with pytest.raises(ValueError):
+        archive.ArchiveReader(str(path))
@@ -0,0 +1,69 @@
+import pytest
+
+import batch
+import homework
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [1206, 12, 6]),
+    ('SWM', [420, 4, 20, 42, 4]),
+]
+INFOS = [homework.read_package(*package).show_training_info()
+         for package in PACKAGES]
+
+
+@pytest.fixture
+def messages():
+    return batch.InfoMessageBatch.from_messages(INFOS)
+
+
+def test_batch_columns(messages):
+    assert len(messages) == 5
+    assert messages.dictionary == ['Swimming', 'Running', 'SportsWalking']
+    assert messages.codes.tolist() == [0, 1, 2, 1, 0]
+    assert messages.calories.tolist() == [info.calories for info in INFOS]
+    assert [m.get_message() for m in messages] == [
+        info.get_message() for info in INFOS]
+
+
+def test_batch_slice_is_a_view(messages):
+    view = messages[1:4]
+    assert isinstance(view, batch.InfoMessageBatch)
+    assert view.training_types == ['Running', 'SportsWalking', 'Running']
+    assert view.calories.obj is messages.calories.obj, (
+        'Срез не должен копировать данные.'
+    )
+    assert view[0].get_message() == INFOS[1].get_message()
+
+
+def test_batch_filter_and_sort(messages):
+    swimming = messages.of_type('Swimming')
+    assert swimming.distance.tolist() == [INFOS[0].distance,
+                                          INFOS[4].distance]
+    long = messages.where('duration', lambda value: value > 1)
+    assert long.training_types == ['Running', 'Swimming']
+    ordered = messages.sort('calories', reverse=True)
+    assert ordered.calories.tolist() == sorted(
+        (info.calories for info in INFOS), reverse=True)
+    assert messages.sort('training_type').training_types == [
+        'Running', 'Running', 'SportsWalking', 'Swimming', 'Swimming']
+
+
+def test_batch_group_by_type(messages):
+    sums = messages.group_by_type()
+    assert sums['Running']['calories'] == pytest.approx(
+        INFOS[1].calories + INFOS[3].calories)
+    means = messages.group_by_type('mean')
+    assert means['Swimming']['speed'] == pytest.approx(
+        (INFOS[0].speed + INFOS[4].speed) / 2)
+    assert messages.sum('duration') == 19
+    assert messages.mean('duration') == pytest.approx(3.8)
+    with pytest.raises(ValueError):
+        messages.group_by_type('median')
+
+
+def test_batch_length_mismatch():
+    with pytest.raises(ValueError):
+        batch.InfoMessageBatch.from_columns(['Running'], [1], [1], [1], [])
@@ -0,0 +1,67 @@
+import math
+
+import pytest
+
+import elevation
+import homework
+
+
+def profile(length=10000, step=1.0, grade=0.0):
+    distances = [i * step for i in range(int(length / step) + 1)]
+    altitudes = [100 + d * grade for d in distances]
+    return distances, altitudes
+
+
+def test_cost_factor():
+    assert elevation.cost_factor(0.0) == 1.0
+    assert elevation.cost_factor(0.1) > 1.0
+    assert elevation.cost_factor(-0.1) < 1.0
+    assert elevation.cost_factor(0.9) == elevation.cost_factor(0.45)
+
+
+def test_flat_route_matches_reference():
+    info, segments = elevation.grade_adjusted_info(
+        'RUN', [15000, 1, 75], *profile())
+    reference = homework.Running(15000, 1, 75).show_training_info()
+    assert info.calories == pytest.approx(reference.calories)
+    assert info.distance == pytest.approx(reference.distance)
+    assert len(segments) == 10
+    assert all(s.grade == 0 for s in segments)
+
+
+def test_uphill_costs_more():
+    flat, _ = elevation.grade_adjusted_info('WLK', [9000, 1, 75, 180],
+                                            *profile(grade=0.0))
+    uphill, segments = elevation.grade_adjusted_info(
+        'WLK', [9000, 1, 75, 180], *profile(grade=0.05))
+    assert uphill.distance > flat.distance
+    assert uphill.calories > flat.calories
+    assert segments[3].grade == pytest.approx(0.05)
+    assert sum(s.climb for s in segments) == pytest.approx(500, rel=1e-3)
+
+
+def test_chunking_does_not_change_result():
+    distances = [i * 2.0 for i in range(5001)]
+    altitudes = [100 + 20 * math.sin(d / 300) for d in distances]
+    whole, whole_segments = elevation.grade_adjusted_info(
+        'RUN', [15000, 1, 75], distances, altitudes, chunk_size=10 ** 6)
+    chunked, chunked_segments = elevation.grade_adjusted_info(
+        'RUN', [15000, 1, 75], distances, altitudes, chunk_size=777)
+    assert chunked.calories == pytest.approx(whole.calories)
+    assert [s.adjusted for s in chunked_segments] == pytest.approx(
+        [s.adjusted for s in whole_segments])
+
+
+def test_smoothing_removes_sensor_noise():
+    distances, altitudes = profile(length=2000)
+    noisy = [a + (3 if i % 2 else -3) for i, a in enumerate(altitudes)]
+    raw = elevation.ElevationProfile('RUN', smoothing=1)
+    raw.feed(distances, noisy)
+    smooth = elevation.ElevationProfile('RUN', smoothing=10)
+    smooth.feed(distances, noisy)
+    assert smooth.climb < raw.climb / 10
+
+
+def test_swimming_is_not_supported():
+    with pytest.raises(ValueError):
+        elevation.ElevationProfile('SWM')
@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+import equivalence
+
+
+@pytest.fixture(scope='module')
+def reports():
+    packages = equivalence.random_packages(3000, seed=2024, edge_share=0.3)
+    return equivalence.compare(packages, repeat=3)
+
+
+def test_random_packages_cover_edge_cases():
+    packages = equivalence.random_packages(2000, seed=1, edge_share=0.3)
+    assert {code for code, data in packages} == {'RUN', 'SWM', 'WLK'}
+    assert min(data[1] for code, data in packages) < 1e-3, (
+        'Среди пакетов должны быть очень короткие тренировки.'
+    )
+    assert max(data[0] for code, data in packages) >= 10 ** 7, (
+        'Среди пакетов должно быть огромное число шагов.'
+    )
+    assert packages == equivalence.random_packages(2000, seed=1,
+                                                   edge_share=0.3)
+
+
+@pytest.mark.parametrize('engine', sorted(equivalence.ENGINES))
+def test_engine_matches_reference(reports, engine):
+    report = reports[engine]
+    assert report.mismatches == [], (
+        f'Путь {engine} расходится с эталоном больше чем на '
+        f'{equivalence.TOLERANCE}: {report.mismatches[:3]}'
+    )
+
+
+@pytest.fixture(scope='module')
+def timed_reports():
+    packages = equivalence.random_packages(50000, seed=2024)
+    return equivalence.compare(packages, repeat=5)
+
+
+@pytest.mark.timing
+@pytest.mark.parametrize('engine', sorted(equivalence.ENGINES))
+def test_engine_speed(timed_reports, engine):
+    slowdown = timed_reports[engine].slowdown(timed_reports['reference'])
+    assert slowdown <= equivalence.MAX_SLOWDOWN[engine], (
+        f'Путь {engine} медленнее эталона в {slowdown:.1f} раз.'
+    )
+
+
+def test_compare_reports_mismatches(monkeypatch):
+    def broken(packages):
+        results = equivalence.run_reference(packages)
+        distance, speed, calories = results[0]
+        results[0] = (distance, speed, calories * (1 + 1e-9))
+        return results
+
+    monkeypatch.setitem(equivalence.ENGINES, 'broken', broken)
+    packages = equivalence.random_packages(10)
+    report = equivalence.compare(packages, ['broken'])['broken']
+    assert [mismatch[0] for mismatch in report.mismatches] == [0]
+    assert report.max_error == pytest.approx(1e-9)
+
+
+def test_relative_error():
+    assert equivalence.relative_error(math.inf, math.inf) == 0
+    assert equivalence.relative_error(math.nan, math.nan) == 0
+    assert equivalence.relative_error(1.0, math.nan) == math.inf
+    assert equivalence.relative_error(-2.0, -2.2) == pytest.approx(0.1)
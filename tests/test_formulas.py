@@ -0,0 +1,31 @@
+import pytest
+
+import formulas
+import homework
+from packages import PACKAGE_FIELDS
+
+
+@pytest.mark.parametrize('code, training, input_data', [
+    ('RUN', homework.Running, [15000, 1, 75]),
+    ('WLK', homework.SportsWalking, [9000, 1, 75, 180]),
+    ('SWM', homework.Swimming, [720, 1, 80, 25, 40]),
+])
+def test_formulas_match_reference(code, training, input_data):
+    info = training(*input_data).show_training_info()
+    columns = {name: [value]
+               for name, value in zip(PACKAGE_FIELDS[code], input_data)}
+    result = formulas.compute(code, columns)
+    assert result == {'distance': [info.distance], 'speed': [info.speed],
+                      'calories': [info.calories]}
+
+
+def test_affected_outputs_only_calories():
+    registry = formulas.FormulaRegistry()
+    registry.register('v2', RUN={'CALORIES_MEAN_SPEED_MULTIPLIER': 20})
+    registry.register('v3', SWM={'LEN_STEP': 1.4})
+    assert registry['baseline'].affected_outputs(registry['v2']) == {
+        'RUN': ('calories',)}
+    assert registry['v2'].affected_outputs(registry['v3']) == {
+        'SWM': ('distance',)}
+    with pytest.raises(KeyError):
+        registry.register('v4', SWM={'MIN_IN_H': 1})
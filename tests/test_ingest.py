@@ -0,0 +1,81 @@
+import ingest
+from packages import Package
+
+
+def make(seq, timestamp, device='watch-1', data=None):
+    return Package('RUN', data or [15000, 1, 75], user_id='user',
+                   device_id=device, seq=seq, timestamp=timestamp)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = ingest.BloomFilter(1000)
+    keys = [f'key-{i}'.encode() for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f'other-{i}'.encode() in bloom
+                          for i in range(1000))
+    assert false_positives < 50
+
+
+def test_deduplicator_exact_window_and_bloom():
+    dedup = ingest.Deduplicator(window=3, capacity=4, generations=2)
+    packages = [make(seq, 0) for seq in range(6)]
+    assert not any(dedup.seen(package) for package in packages)
+    assert len(dedup.recent) == 3
+    assert all(dedup.seen(package) for package in packages), (
+        'Повторы должны находиться и в окне, и в фильтрах Блума.'
+    )
+    assert not dedup.seen(make(1, 0, device='watch-2'))
+
+
+def test_deduplicator_keeps_new_packages():
+    dedup = ingest.Deduplicator(window=10, capacity=1000)
+    seen = [dedup.seen(make(seq, 0, device=f'watch-{seq % 50}'))
+            for seq in range(20000)]
+    assert not any(seen), (
+        'Номер выше уже виденного для устройства не может быть повтором.'
+    )
+    assert 0 < dedup.false_positive_rate() < 0.05
+    assert dedup.seen(make(19990, 0, device='watch-40'))
+
+
+def test_deduplicator_drops_oldest_generation():
+    dedup = ingest.Deduplicator(window=1, capacity=2, generations=2)
+    for seq in range(8):
+        dedup.seen(make(seq, 0))
+    assert len(dedup.filters) == 2
+
+
+def test_ingest_reorders_within_watermark():
+    stage = ingest.IngestStage(lateness=10)
+    arrivals = [make(1, 100), make(3, 105), make(2, 102), make(3, 105),
+                make(4, 120), make(0, 95), make(5, 130)]
+    result = list(stage.process(arrivals))
+    assert [package.seq for package, _ in result] == [1, 2, 3, 4, 5]
+    assert all(training.__class__.__name__ == 'Running'
+               for _, training in result)
+    assert stage.metrics.as_dict() == {
+        'received': 7, 'duplicates': 1, 'late': 1, 'reordered': 1,
+        'malformed': 0, 'emitted': 5,
+    }
+
+
+def test_ingest_holds_packages_until_watermark():
+    stage = ingest.IngestStage(lateness=10)
+    assert stage.push(make(1, 100)) == []
+    released = stage.push(make(2, 111))
+    assert [package.seq for package, _ in released] == [1]
+    assert [package.seq for package, _ in stage.flush()] == [2]
+    assert stage.push(make(3, 105)) == []
+    assert stage.metrics.late == 1
+
+
+def test_ingest_counts_malformed():
+    stage = ingest.IngestStage(lateness=0)
+    stage.push(make(1, 1, data=[1, 2]))
+    assert stage.push(make(2, 2, data=[1, 1, 1, 999, 999])) == [], (
+        'Лишние поля пакета - испорченный пакет.'
+    )
+    assert stage.metrics.malformed == 2
+    assert stage.metrics.emitted == 0
@@ -0,0 +1,40 @@
+import pytest
+
+import homework
+import packages
+
+
+def test_package_file_roundtrip(tmp_path):
+    path = str(tmp_path / 'packages.csv')
+    original = [packages.Package('SWM', [720, 1.5, 80, 25, 40], 'u', 'd',
+                                 3, 1.25)]
+    assert packages.write_packages(path, original) == 1
+    assert list(packages.read_packages(path)) == original
+    with pytest.raises(ValueError):
+        packages.parse_package('u,d,1,0.0,RUN,1,2\n')
+
+
+@pytest.mark.parametrize('workout_type, data', [
+    ('RUN', [15000, 1]),
+    ('WLK', [9000, 1, 75, 180, 1]),
+    ('BOX', [1, 2, 3]),
+])
+def test_unpack_rejects_bad_packages(workout_type, data):
+    with pytest.raises(ValueError):
+        packages.unpack(workout_type, data)
+
+
+def test_normalize_code_aliases():
+    assert packages.normalize_code('Walking') == 'WLK'
+    assert packages.normalize_code('SWM') == 'SWM'
+    with pytest.raises(ValueError):
+        packages.normalize_code('SportsWalking')
+
+
+@pytest.mark.parametrize('alias, code', sorted(packages.CODE_ALIASES.items()))
+def test_aliases_are_understood_by_read_package(alias, code):
+    data = [9000, 1, 75, 180, 40][:len(packages.PACKAGE_FIELDS[code])]
+    assert type(homework.read_package(alias, data)) is type(
+        homework.read_package(code, data)), (
+        'Псевдоним должен пониматься read_package.'
+    )
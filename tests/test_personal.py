@@ -0,0 +1,85 @@
+import pytest
+
+import formulas
+import homework
+import personal
+from packages import PACKAGE_FIELDS
+
+PACKAGES = [
+    ('alice', [15000, 1, 75]),
+    ('bob', [9000, 1.5, 80]),
+    ('carol', [12000, 1.2, 60]),
+    ('alice', [1206, 12, 6]),
+]
+
+
+@pytest.fixture
+def coefficients():
+    with personal.CoefficientStore() as store:
+        yield personal.PersonalCoefficients(store, cache_size=2)
+
+
+def test_store_roundtrip(tmp_path):
+    path = str(tmp_path / 'coefficients.db')
+    with personal.CoefficientStore(path) as store:
+        store.set('alice', 'RUN', LEN_STEP=0.8)
+        store.set('alice', 'Swimming', LEN_STEP=1.5)
+        with pytest.raises(KeyError):
+            store.set('alice', 'RUN', M_IN_KM=100)
+    with personal.CoefficientStore(path) as store:
+        assert store.get('alice', 'RUN') == {'LEN_STEP': 0.8}
+        assert store.get('bob', 'RUN') == {}
+        store.delete('alice', 'RUN')
+        assert store.get_many(['alice', 'bob'], 'SWM') == {
+            'alice': {'LEN_STEP': 1.5}}
+        assert store.get('alice', 'RUN') == {}
+
+
+def test_cache_lru_and_invalidation(coefficients):
+    coefficients.set('alice', 'RUN', LEN_STEP=0.8)
+    assert coefficients.coefficients('alice', 'RUN')['LEN_STEP'] == 0.8
+    assert coefficients.coefficients('bob', 'RUN')['LEN_STEP'] == 0.65
+    coefficients.coefficients('alice', 'RUN')
+    coefficients.coefficients('carol', 'RUN')
+    assert list(coefficients.cache) == [('alice', 'RUN'), ('carol', 'RUN')]
+    assert (coefficients.hits, coefficients.misses) == (1, 3)
+    coefficients.set('alice', 'RUN', LEN_STEP=0.9)
+    assert coefficients.coefficients('alice', 'RUN')['LEN_STEP'] == 0.9
+
+
+def test_training_uses_personal_coefficients(coefficients):
+    coefficients.set('alice', 'SWM', LEN_STEP=1.5,
+                     CALORIES_WEIGHT_MULTIPLIER=2.5)
+    training = coefficients.training('alice', 'SWM', [720, 1, 80, 25, 40])
+    assert training.get_distance() == 720 * 1.5 / 1000
+    assert training.get_spent_calories() == (1.0 + 1.1) * 2.5 * 80 * 1
+    assert homework.Swimming.LEN_STEP == 1.38, (
+        'Константы класса не должны меняться.'
+    )
+
+
+def test_batch_columns_match_objects(coefficients):
+    coefficients.set('alice', 'RUN', LEN_STEP=0.8,
+                     CALORIES_MEAN_SPEED_SHIFT=2.0)
+    coefficients.set('carol', 'RUN', CALORIES_MEAN_SPEED_MULTIPLIER=17.5)
+    users = [user for user, data in PACKAGES]
+    joined = coefficients.columns(users, 'RUN')
+    assert sorted(joined) == ['CALORIES_MEAN_SPEED_MULTIPLIER',
+                              'CALORIES_MEAN_SPEED_SHIFT', 'LEN_STEP']
+    assert joined['LEN_STEP'] == [0.8, 0.65, 0.65, 0.8]
+    columns = {name: [data[i] for user, data in PACKAGES]
+               for i, name in enumerate(PACKAGE_FIELDS['RUN'])}
+    result = coefficients.compute(users, 'RUN', columns)
+    for row, (user, data) in enumerate(PACKAGES):
+        info = coefficients.training(user, 'RUN', data).show_training_info()
+        assert (result['distance'][row], result['speed'][row],
+                result['calories'][row]) == (
+            info.distance, info.speed, info.calories), (
+            'Расчет пачки должен совпадать с расчетом объектов.'
+        )
+
+
+def test_compute_rejects_fixed_coefficient_columns():
+    with pytest.raises(ValueError):
+        formulas.compute('RUN', {'action': [1], 'duration': [1],
+                                 'weight': [1], 'M_IN_KM': [100]})
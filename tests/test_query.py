@@ -0,0 +1,129 @@
+import calendar
+import math
+
+import pytest
+
+import archive
+import formulas
+import homework
+import query
+
+MARCH = calendar.timegm((2024, 3, 10, 12, 0, 0))
+APRIL = calendar.timegm((2024, 4, 2, 8, 0, 0))
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 50, 40], MARCH),
+    ('SWM', [900, 1.5, 70, 50, 30], APRIL),
+    ('SWM', [420, 4, 20, 25, 4], MARCH),
+    ('RUN', [15000, 1, 75], MARCH),
+    ('WLK', [9000, 1, 75, 180], APRIL),
+    ('SWM', [1000, 2, 65, 50, 35], MARCH),
+]
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / 'workouts.wkar')
+    with archive.ArchiveWriter(path, block_size=2) as writer:
+        for workout_type, data, timestamp in PACKAGES:
+            writer.append(workout_type, data, timestamp=timestamp)
+    return path
+
+
+def speed(workout_type, data):
+    return homework.read_package(workout_type, data).get_mean_speed()
+
+
+def test_month_range():
+    low, high = query.month_range(2024, 12)
+    assert low == calendar.timegm((2024, 12, 1, 0, 0, 0))
+    assert high < calendar.timegm((2025, 1, 1, 0, 0, 0))
+    assert high > calendar.timegm((2024, 12, 31, 23, 59, 59))
+
+
+def test_query_mean_speed_with_pushdown(archive_path):
+    request = query.Query(archive_path).where(
+        type='SWM', length_pool=(50, None),
+        timestamp=query.month_range(2024, 3),
+    ).aggregate(speed=('mean', 'speed'), count=('count', None))
+    assert request.plan() == [0, 2], (
+        'Блок только с бассейном 25 м и бегом нужно пропустить.'
+    )
+    expected = [speed(code, data) for code, data, timestamp in PACKAGES
+                if code == 'SWM' and data[3] >= 50 and timestamp == MARCH]
+    result = request.run()
+    assert list(result) == [()]
+    assert result[()]['count'] == 2
+    assert result[()]['speed'] == pytest.approx(sum(expected) / 2)
+
+
+def test_query_group_by(archive_path):
+    result = query.Query(archive_path).group_by('type').aggregate(
+        total=('sum', 'duration'), rows=('count', None),
+        top=('max', 'weight')).run()
+    assert list(result) == [('RUN',), ('SWM',), ('WLK',)]
+    assert result[('SWM',)] == {'total': 8.5, 'rows': 4, 'top': 80}
+    assert result[('RUN',)]['rows'] == 1
+
+
+def test_query_empty_result(archive_path):
+    result = query.Query(archive_path).where(weight=(500, None)).aggregate(
+        rows=('count', None), speed=('mean', 'speed')).run()
+    assert result[()]['rows'] == 0
+    assert math.isnan(result[()]['speed'])
+
+
+def test_query_version_computes_matching_rows(archive_path, monkeypatch):
+    registry = formulas.FormulaRegistry()
+    new = registry.register('v2', SWM={'LEN_STEP': 2.0})
+    computed = []
+    original = query.compute
+
+    def spy(code, columns, *args):
+        computed.append((code, len(columns['action'])))
+        return original(code, columns, *args)
+
+    monkeypatch.setattr(query, 'compute', spy)
+    result = query.Query(archive_path, version=new).where(
+        type='SWM', length_pool=(50, None), distance=(1.5, None),
+    ).aggregate(distance=('sum', 'distance'), rows=('count', None)).run()
+    assert computed == [('SWM', 2), ('SWM', 1)], (
+        'Результаты нужно считать только для строк, прошедших фильтр.'
+    )
+    assert result[()]['rows'] == 2
+    assert result[()]['distance'] == pytest.approx(
+        900 * 2.0 / 1000 + 1000 * 2.0 / 1000)
+
+
+def test_query_parallel_matches_serial(archive_path):
+    def request(workers):
+        return query.Query(archive_path, workers=workers).group_by(
+            'type').aggregate(calories=('sum', 'calories'),
+                              speed=('min', 'speed')).run()
+
+    serial = request(1)
+    parallel = request(2)
+    assert list(parallel) == list(serial)
+    for key, values in serial.items():
+        assert parallel[key] == pytest.approx(values)
+
+
+def test_query_rejects_unknown(archive_path):
+    with pytest.raises(KeyError):
+        query.Query(archive_path).where(pulse=(0, 100))
+    with pytest.raises(ValueError):
+        query.Query(archive_path).aggregate(x=('median', 'speed'))
+    with pytest.raises(ValueError):
+        query.Query(archive_path).run()
+
+
+def test_query_group_by_missing_field(archive_path):
+    result = query.Query(archive_path).group_by('length_pool').aggregate(
+        rows=('count', None)).run()
+    assert list(result) == [(25,), (50,), (None,)], (
+        'Строки без поля должны собираться в одну группу (None,).'
+    )
+    assert result[(None,)]['rows'] == 2
+    result = query.Query(archive_path).where(type='RUN').group_by(
+        'length_pool').aggregate(rows=('count', None)).run()
+    assert list(result) == [(None,)]
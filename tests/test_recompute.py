@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import archive
+import formulas
+import homework
+import recompute
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [1206, 12, 6, 12]),
+    ('RUN', [1206, 12, 6]),
+    ('SWM', [420, 4, 20, 42, 4]),
+]
+
+
+@pytest.fixture
+def reader(tmp_path):
+    path = str(tmp_path / 'workouts.wkar')
+    with archive.ArchiveWriter(path, block_size=2) as writer:
+        writer.extend(PACKAGES)
+    with archive.ArchiveReader(path) as reader:
+        yield reader
+
+
+def test_recompute_plan_and_resume(reader, tmp_path):
+    registry = formulas.FormulaRegistry()
+    new = registry.register('v2', RUN={'CALORIES_MEAN_SPEED_MULTIPLIER': 20})
+    checkpoint = str(tmp_path / 'checkpoint')
+    job = recompute.RecomputeJob(reader, registry['baseline'], new,
+                                 checkpoint)
+    plan = job.plan()
+    assert [task.block for task in plan] == [1, 2], (
+        'Блоки без пробежек пересчитывать не нужно.'
+    )
+    assert all(task.columns == ('calories',) for task in plan)
+    assert job.run() == 2
+    assert job.run() == 0, 'Готовые блоки не должны пересчитываться.'
+    os.remove(job._block_path(2))
+    assert job.run() == 1
+
+    result_path = str(tmp_path / 'v2.wkar')
+    job.write(result_path)
+    with archive.ArchiveReader(result_path) as updated:
+        calories = updated.read_column('calories')
+        assert updated.read_column('speed') == reader.read_column('speed')
+    old = reader.read_column('calories')
+    for (code, data), before, after in zip(PACKAGES, old, calories):
+        if code != 'RUN':
+            assert after == before
+            continue
+        running = homework.Running(*data)
+        running.CALORIES_MEAN_SPEED_MULTIPLIER = 20
+        assert after == running.get_spent_calories()
+
+
+def test_recompute_parallel(reader, tmp_path):
+    registry = formulas.FormulaRegistry()
+    new = registry.register('v2', WLK={'CALORIES_WEIGHT_MULTIPLIER': 0.04})
+    job = recompute.RecomputeJob(reader, registry['baseline'], new,
+                                 str(tmp_path / 'checkpoint'), workers=2)
+    assert job.run() == 2
+    serial = recompute.RecomputeJob(reader, registry['baseline'], new,
+                                    str(tmp_path / 'serial'))
+    serial.run()
+    for task in job.plan():
+        assert job.result(task.block) == serial.result(task.block)
+
+
+def test_recompute_rejects_foreign_checkpoint(reader, tmp_path):
+    registry = formulas.FormulaRegistry()
+    v2 = registry.register('v2', RUN={'MIN_IN_H': 61})
+    v3 = registry.register('v3', RUN={'MIN_IN_H': 62})
+    checkpoint = str(tmp_path / 'checkpoint')
+    recompute.RecomputeJob(reader, registry['baseline'], v2, checkpoint)
+    with pytest.raises(ValueError):
+        recompute.RecomputeJob(reader, registry['baseline'], v3, checkpoint)
+
+
+def test_recompute_rejects_changed_coefficients(reader, tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint')
+    registry = formulas.FormulaRegistry()
+    v2 = registry.register('v2', RUN={'CALORIES_MEAN_SPEED_MULTIPLIER': 20})
+    recompute.RecomputeJob(reader, registry['baseline'], v2, checkpoint)
+    recompute.RecomputeJob(reader, registry['baseline'], v2, checkpoint)
+    registry = formulas.FormulaRegistry()
+    v2 = registry.register('v2', RUN={'CALORIES_MEAN_SPEED_MULTIPLIER': 25})
+    with pytest.raises(ValueError):
+        recompute.RecomputeJob(reader, registry['baseline'], v2, checkpoint)
@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+
+import homework
+import scheduler
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [1206, 12, 6]),
+]
+
+
+def reference(workout_type, data):
+    return vars(homework.read_package(workout_type, data
+                                      ).show_training_info())
+
+
+def test_compute_batch_matches_reference():
+    results = scheduler.compute_batch(PACKAGES * 3)
+    assert [vars(info) for info in results] == [
+        reference(*package) for package in PACKAGES * 3]
+
+
+def test_compute_batch_isolates_errors():
+    results = scheduler.compute_batch([
+        ('RUN', [15000, 1, 75]),
+        ('RUN', [100, 0, 75]),
+        ('SWM', [720, 1, 80]),
+        ('XXX', [1, 2, 3]),
+        ('RUN', [1206, 12, 6]),
+    ])
+    assert isinstance(results[1], ZeroDivisionError)
+    assert isinstance(results[2], ValueError)
+    assert isinstance(results[3], ValueError)
+    assert vars(results[0]) == reference('RUN', [15000, 1, 75])
+    assert vars(results[4]) == reference('RUN', [1206, 12, 6])
+
+
+def test_scheduler_isolates_non_numeric_fields():
+    valid = [('RUN', [15000, 1, 75]), ('RUN', [1206, 12, 6]),
+             ('RUN', [9000, 1.5, 80])]
+    with scheduler.MicroBatchScheduler(max_wait=0.05,
+                                       min_batch=4) as planner:
+        futures = planner.submit_many(valid + [('RUN', [15000, 'x', 75])])
+        with pytest.raises(TypeError):
+            futures[-1].result(5)
+        assert [vars(f.result(5)) for f in futures[:3]] == [
+            reference(*package) for package in valid], (
+            'Ошибка одного пакета не должна портить остальные.'
+        )
+    results = scheduler.compute_batch([('SWM', [720, 1, 'NaN?', 25, 40]),
+                                       ('SWM', [720, 1, 80, 25, 40])])
+    assert isinstance(results[0], TypeError)
+    assert vars(results[1]) == reference('SWM', [720, 1, 80, 25, 40])
+
+
+def test_scheduler_results():
+    with scheduler.MicroBatchScheduler() as planner:
+        futures = planner.submit_many(PACKAGES * 50)
+        interactive = planner.submit('WLK', [9000, 1, 75, 180],
+                                     interactive=True)
+        broken = planner.submit('RUN', [1, 2], interactive=True)
+        assert vars(interactive.result(5)) == reference(
+            'WLK', [9000, 1, 75, 180])
+        assert [vars(f.result(5)) for f in futures] == [
+            reference(*package) for package in PACKAGES * 50]
+        with pytest.raises(ValueError):
+            broken.result(5)
+    stats = planner.snapshot()
+    assert stats['completed'] == {'interactive': 2, 'bulk': 200}
+    assert stats['failed'] == 1
+    with pytest.raises(RuntimeError):
+        planner.submit(*PACKAGES[0])
+
+
+def test_scheduler_priority_lane():
+    release = threading.Event()
+    order = []
+
+    def compute(packages):
+        release.wait(5)
+        order.append([package[0] for package in packages])
+        return scheduler.compute_batch(packages)
+
+    with scheduler.MicroBatchScheduler(compute=compute, max_wait=0,
+                                       min_batch=2, max_batch=2) as planner:
+        first = planner.submit('RUN', [15000, 1, 75])
+        while not order and planner.snapshot()['bulk_queue']:
+            pass
+        planner.submit_many([('RUN', [15000, 1, 75])] * 4)
+        planner.submit('SWM', [720, 1, 80, 25, 40], interactive=True)
+        release.set()
+        first.result(5)
+    assert order[1] == ['SWM', 'RUN'], (
+        'Интерактивные пакеты должны обгонять фоновую очередь.'
+    )
+
+
+def test_scheduler_adapts_batch_size():
+    planner = scheduler.MicroBatchScheduler()
+    planner.close()
+    planner._queues['bulk'].extend([None] * 1000)
+    planner._adapt(1, 1e-6, late=False)
+    planner._adapt(2, 2e-6, late=False)
+    assert planner.batch_size == 4, 'При длинной очереди пачка растет.'
+    planner._adapt(4, 4e-6, late=True)
+    assert planner.batch_size == 2, 'При опоздании пачка уменьшается.'
+    planner.configure(budget_share=0.1, target_latency=0.01)
+    planner.batch_size = 1000
+    planner._adapt(1000, 0.1, late=False)
+    assert planner.batch_size == int(0.01 * 0.1 / planner.cost) < 1000, (
+        'Пачка не должна считаться дольше доли целевой задержки.'
+    )
+    with pytest.raises(TypeError):
+        planner.configure(speed=1)
+
+
+def test_scheduler_bulk_overflow():
+    release = threading.Event()
+
+    def compute(packages):
+        release.wait(5)
+        return scheduler.compute_batch(packages)
+
+    with scheduler.MicroBatchScheduler(compute=compute,
+                                       max_queue=3) as planner:
+        futures = planner.submit_many(PACKAGES * 2)
+        rejected = [f for f in futures if f.done()]
+        assert rejected and all(
+            isinstance(f.exception(), OverflowError) for f in rejected)
+        assert planner.snapshot()['rejected'] == len(rejected)
+        release.set()
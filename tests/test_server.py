@@ -0,0 +1,128 @@
+import http.client
+import json
+
+import pytest
+
+import homework
+import server
+
+
+@pytest.fixture
+def batch_server():
+    instance = server.start_server(max_concurrent=2)
+    yield instance
+    instance.shutdown()
+    instance.server_close()
+
+
+def post(connection, packages, accept=None):
+    headers = {'Content-Type': 'application/json'}
+    if accept:
+        headers['Accept'] = accept
+    connection.request('POST', '/batch', json.dumps(packages), headers)
+    response = connection.getresponse()
+    return response, response.read()
+
+
+PACKAGES = [['SWM', [720, 1, 80, 25, 40]], ['RUN', [15000, 1, 75]]]
+
+
+def expected(workout_type, data):
+    info = homework.read_package(workout_type, data).show_training_info()
+    return {'training_type': info.training_type, 'duration': info.duration,
+            'distance': info.distance, 'speed': info.speed,
+            'calories': info.calories}
+
+
+def test_batch_json_over_keep_alive(batch_server):
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    for _ in range(2):
+        response, body = post(connection, PACKAGES)
+        assert response.status == 200
+        assert json.loads(body) == {
+            'results': [expected(*package) for package in PACKAGES]}
+    assert connection.sock is not None, 'Соединение должно сохраняться.'
+    connection.close()
+
+
+def test_batch_ndjson_streaming(batch_server, monkeypatch):
+    monkeypatch.setattr(server.BatchHandler, 'CHUNK', 2)
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    packages = PACKAGES * 3 + [['RUN', [1, 2]]]
+    response, body = post(connection, packages, accept=server.NDJSON)
+    assert response.status == 200
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert lines[:-1] == [expected(*package) for package in PACKAGES * 3]
+    assert 'error' in lines[-1], 'Ошибка пакета не должна ломать ответ.'
+
+
+def test_batch_concurrency_limit(batch_server):
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    batch_server.limiter.acquire()
+    batch_server.limiter.acquire()
+    try:
+        response, _ = post(connection, PACKAGES)
+        assert response.status == 503
+        assert response.getheader('Retry-After') == '1'
+        assert response.getheader('Connection') == 'close', (
+            'Непрочитанное тело нельзя оставлять в соединении.'
+        )
+    finally:
+        batch_server.limiter.release()
+        batch_server.limiter.release()
+    response, _ = post(connection, PACKAGES)
+    assert response.status == 200
+
+
+@pytest.mark.parametrize('body, status', [
+    (b'{"not": "a list"}', 400),
+    (b'not json', 400),
+])
+def test_batch_bad_requests(batch_server, body, status):
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    connection.request('POST', '/batch', body)
+    assert connection.getresponse().status == status
+
+
+@pytest.mark.parametrize('length', ['many', '-5'])
+def test_batch_bad_content_length(batch_server, length):
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    connection.request('POST', '/batch', b'[]', {'Content-Length': length})
+    response = connection.getresponse()
+    assert response.status == 400
+    assert response.getheader('Connection') == 'close'
+
+
+def test_health_and_unknown_path(batch_server):
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    connection.request('GET', '/health')
+    response = connection.getresponse()
+    assert response.status == 200
+    response.read()
+    connection.request('GET', '/nope')
+    assert connection.getresponse().status == 404
+
+
+def strict(constant):
+    raise ValueError(f'Недопустимое в JSON значение {constant}')
+
+
+@pytest.mark.parametrize('accept', [None, server.NDJSON])
+def test_bad_packages_become_error_entries(batch_server, accept):
+    connection = http.client.HTTPConnection(*batch_server.server_address)
+    packages = [['RUN', [10 ** 400, 1, 75]], ['RUN', [1e308, 1e-308, 75]],
+                ['RUN', [15000, 'x', 75]], 5, ['SportsWalking', [1, 1, 1, 1]],
+                ['RUN', [15000, 1, 75]]]
+    response, body = post(connection, packages, accept=accept)
+    assert response.status == 200
+    if accept:
+        results = [json.loads(line, parse_constant=strict)
+                   for line in body.decode().splitlines()]
+    else:
+        results = json.loads(body, parse_constant=strict)['results']
+    assert all('error' in result for result in results[:-1]), (
+        'Ошибка пакета должна попадать в ответ, а не обрывать соединение.'
+    )
+    assert results[-1] == expected('RUN', [15000, 1, 75])
+    connection.close()
@@ -0,0 +1,125 @@
+import functools
+import os
+
+import pytest
+
+import packages
+import sharding
+from aggregates import TotalsTable
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [15000, 1, 75]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('RUN', [1206, 12, 6]),
+]
+
+
+@pytest.fixture
+def package_files(tmp_path):
+    paths = []
+    for day in range(3):
+        path = str(tmp_path / f'day-{day}.csv')
+        packages.write_packages(path, (
+            packages.Package(code, data, user_id=f'user-{user}',
+                             seq=day, timestamp=day * 86400.0)
+            for user in range(10)
+            for code, data in PACKAGES))
+        paths.append(path)
+    with open(paths[0], 'a', encoding='utf-8') as file:
+        file.write('user-1,,0,0.0,RUN,15000,1\n')
+    return paths
+
+
+def expected_totals(paths):
+    table = TotalsTable()
+    for path in paths:
+        for package in packages.read_packages(path, skip_errors=True):
+            table.add(package.user_id,
+                      package.training().show_training_info())
+    return table
+
+
+def crashing_worker(marker, connection):
+    """Падает на первом полученном шарде, дальше работает как обычно."""
+    if not os.path.exists(marker):
+        connection.recv()
+        open(marker, 'w').close()
+        os._exit(1)
+    sharding.worker(connection)
+
+
+def test_shard_of_is_stable():
+    assert sharding.shard_of('user-1', 8) == sharding.shard_of('user-1', 8)
+    assert {sharding.shard_of(f'user-{i}', 4) for i in range(100)} == {
+        0, 1, 2, 3}
+
+
+def test_coordinator_matches_sequential(package_files):
+    coordinator = sharding.ShardCoordinator(package_files, workers=3)
+    result = coordinator.run()
+    expected = expected_totals(package_files)
+    assert len(result) == 30
+    for key, totals in expected:
+        assert result.rows[key].count == totals.count
+        assert result.rows[key].calories == pytest.approx(totals.calories)
+    assert coordinator.errors == 1
+    assert coordinator.redispatched == 0
+
+
+def test_coordinator_redispatches_dead_worker(package_files, tmp_path):
+    target = functools.partial(crashing_worker, str(tmp_path / 'crashed'))
+    coordinator = sharding.ShardCoordinator(
+        package_files, workers=2, shards=4, worker_target=target)
+    result = coordinator.run()
+    assert coordinator.redispatched >= 1, (
+        'Шард упавшего процесса должен быть отдан повторно.'
+    )
+    expected = expected_totals(package_files)
+    assert sum(t.count for _, t in result) == sum(
+        t.count for _, t in expected)
+
+
+def one_shard_worker(connection):
+    """Отвечает на один шард и падает, не дожидаясь следующего."""
+    shard, path = connection.recv()
+    connection.send((shard, sharding.process_shard(path)))
+    os._exit(1)
+
+
+def test_coordinator_replaces_idle_dead_worker(package_files):
+    coordinator = sharding.ShardCoordinator(
+        package_files, workers=2, shards=12, worker_target=one_shard_worker)
+    result = coordinator.run()
+    expected = expected_totals(package_files)
+    assert sum(t.count for _, t in result) == sum(
+        t.count for _, t in expected), (
+        'Свободный процесс, упавший между шардами, нужно заменить.'
+    )
+
+
+def always_crashing_worker(connection):
+    connection.recv()
+    os._exit(1)
+
+
+def test_coordinator_gives_up(package_files):
+    coordinator = sharding.ShardCoordinator(
+        package_files, workers=1, shards=1,
+        worker_target=always_crashing_worker)
+    with pytest.raises(RuntimeError):
+        coordinator.run()
+
+
+def test_uncomputable_package_counts_as_error(tmp_path):
+    path = tmp_path / 'zero.csv'
+    path.write_text('u1,d1,1,0,RUN,15000,0,75\n'
+                    'u1,d1,2,0,RUN,15000,1,75\n', encoding='utf-8')
+    table, errors = sharding.process_shard(str(path))
+    assert errors == 1
+    assert table.get('u1', 'Running').count == 1
+    coordinator = sharding.ShardCoordinator([str(path)], workers=1)
+    assert len(coordinator.run()) == 1
+    assert coordinator.errors == 1, (
+        'Нулевая длительность - плохие данные, а не падение процесса.'
+    )
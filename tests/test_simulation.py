@@ -0,0 +1,59 @@
+import pytest
+
+import homework
+import simulation
+
+
+def test_simulate_matches_reference():
+    actions = simulation.scaled(9000, [1, 1.05, 1.1])
+    weights = [70, 75]
+    result = simulation.simulate('RUN', action=actions, duration=1,
+                                 weight=weights)
+    assert result.shape == (3, 2)
+    assert len(result) == 6
+    for i, action in enumerate(actions):
+        for j, weight in enumerate(weights):
+            info = homework.Running(action, 1, weight).show_training_info()
+            assert result.point(action=i, weight=j) == {
+                'distance': info.distance,
+                'speed': info.speed,
+                'calories': info.calories,
+            }
+
+
+def test_simulate_chunks_cover_grid():
+    params = dict(action=range(100, 110), duration=[1, 2, 3], weight=80,
+                  length_pool=25, count_pool=range(10, 14))
+    chunks = list(simulation.iter_simulation('SWM', chunk_size=7, **params))
+    assert [start for start, _ in chunks] == list(range(0, 120, 7))
+    whole = simulation.simulate('SWM', **params)
+    calories = [v for _, chunk in chunks for v in chunk['calories']]
+    assert calories == whole.calories.tolist()
+    info = homework.Swimming(103, 2, 80, 25, 12).show_training_info()
+    assert whole.calories[whole.index(action=3, duration=1,
+                                      count_pool=2)] == info.calories
+
+
+def test_simulate_selected_outputs():
+    result = simulation.simulate('WLK', outputs=['calories'],
+                                 action=9000, duration=[1], weight=75,
+                                 height=[170, 180])
+    assert set(result.columns) == {'calories'}
+    assert result.calories[1] == homework.SportsWalking(
+        9000, 1, 75, 180).get_spent_calories()
+
+
+def test_simulate_length_without_calories():
+    result = simulation.simulate('RUN', outputs=['distance'],
+                                 action=[9000, 9450, 9900], duration=1,
+                                 weight=[70, 75])
+    assert len(result) == 6
+    assert len(result.distance) == len(result)
+
+
+def test_simulate_requires_package_fields():
+    with pytest.raises(TypeError):
+        simulation.simulate('RUN', action=9000, duration=1)
+    with pytest.raises(TypeError):
+        simulation.simulate('RUN', action=9000, duration=1, weight=75,
+                            height=180)
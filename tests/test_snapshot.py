@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+import snapshot
+from aggregates import TotalsTable
+from anomaly import AnomalyDetector
+from ingest import Deduplicator
+from trends import TrendEngine
+from workload import WorkloadGenerator
+
+
+@pytest.fixture
+def state():
+    totals = TotalsTable()
+    dedup = Deduplicator(window=50, capacity=100)
+    trends = TrendEngine()
+    detector = AnomalyDetector()
+    for package in WorkloadGenerator(seed=5, users=30).packages(500):
+        info = package.training().show_training_info()
+        dedup.seen(package)
+        totals.add(package.user_id, info)
+        trends.add_load(package.user_id, info.calories,
+                        int(package.timestamp // 86400))
+        detector.observe(package.user_id, info)
+    return dict(totals=totals, deduplicator=dedup, trends=trends,
+                anomaly=detector)
+
+
+def test_snapshot_roundtrip(tmp_path, state):
+    path = str(tmp_path / 'state.snap')
+    snapshot.save_snapshot(path, **state)
+    with snapshot.Snapshot(path) as restored:
+        assert restored.totals() == state['totals']
+        trends = restored.trends()
+        for user_id, original in state['trends'].states.items():
+            copy = trends.states[user_id]
+            assert (copy.day, copy.atl, copy.ctl) == (
+                original.day, original.atl, original.ctl)
+        dedup = restored.deduplicator()
+        assert dedup.recent == state['deduplicator'].recent
+        assert [f.bits for f in dedup.filters] == [
+            f.bits for f in state['deduplicator'].filters]
+        assert dedup.high_water == state['deduplicator'].high_water
+        detector = restored.anomaly()
+        assert detector.index == state['anomaly'].index
+        assert detector.state == state['anomaly'].state
+        assert detector.flagged == state['anomaly'].flagged
+
+
+def test_snapshot_lookup_without_loading(tmp_path, state):
+    path = str(tmp_path / 'state.snap')
+    snapshot.save_snapshot(path, totals=state['totals'])
+    with snapshot.Snapshot(path) as restored:
+        for (user_id, training_type), totals in state['totals']:
+            assert restored.lookup_totals(user_id, training_type) == totals
+        assert restored.lookup_totals('nobody', 'Running') is None
+        with pytest.raises(KeyError):
+            restored.deduplicator()
+
+
+def test_snapshot_in_background(tmp_path, state):
+    path = str(tmp_path / 'state.snap')
+    lock = threading.Lock()
+    expected = TotalsTable()
+    expected.merge(state['totals'])
+    thread = snapshot.save_snapshot_async(path, lock,
+                                          totals=state['totals'])
+    for package in WorkloadGenerator(seed=6, users=3).packages(50):
+        with lock:
+            state['totals'].add(package.user_id,
+                                package.training().show_training_info())
+    thread.join()
+    with snapshot.Snapshot(path) as restored:
+        assert restored.totals() == expected, (
+            'Снимок должен содержать состояние на момент копирования.'
+        )
+
+
+def test_snapshot_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'definitely not a snapshot')
+    with pytest.raises(ValueError):
+        snapshot.Snapshot(str(path))
@@ -0,0 +1,116 @@
+import pytest
+
+import homework
+import streaming
+from packages import Package
+
+
+def run(timestamp, user='runner', action=15000):
+    return Package('RUN', [action, 1, 75], user_id=user, timestamp=timestamp)
+
+
+def swim(timestamp, user='swimmer'):
+    return Package('SWM', [720, 1, 80, 25, 40], user_id=user,
+                   timestamp=timestamp)
+
+
+RUN_CALORIES = homework.Running(15000, 1, 75).get_spent_calories()
+
+
+def test_tumbling_windows():
+    windows = streaming.tumbling(900)
+    results = list(windows.process([
+        run(10), run(100, 'other'), run(950), run(2000), run(2100)]))
+    assert [(r.start, r.end, r.totals.count) for r in results] == [
+        (0, 900, 2), (900, 1800, 1), (1800, 2700, 2)]
+    assert results[0].active_users == 2
+    assert results[0].totals.calories == pytest.approx(2 * RUN_CALORIES)
+
+
+def test_windows_are_emitted_incrementally():
+    windows = streaming.tumbling(900)
+    assert windows.push(run(10)) == []
+    assert windows.push(run(899)) == []
+    emitted = windows.push(run(901))
+    assert [(r.start, r.totals.count) for r in emitted] == [(0, 2)]
+    assert len(windows.panes) == 1, 'Закрытые панели не должны храниться.'
+
+
+def test_sliding_windows_reuse_panes():
+    windows = streaming.SlidingWindows(900, 300, key=streaming.by_type)
+    results = list(windows.process([
+        run(0), swim(100), run(400), swim(700), run(1000)]))
+    counts = [(r.key, r.start, r.end, r.totals.count, r.active_users)
+              for r in results]
+    assert counts == [
+        ('RUN', -600, 300, 1, 1), ('SWM', -600, 300, 1, 1),
+        ('RUN', -300, 600, 2, 1), ('SWM', -300, 600, 1, 1),
+        ('RUN', 0, 900, 2, 1), ('SWM', 0, 900, 2, 1),
+        ('RUN', 300, 1200, 2, 1), ('SWM', 300, 1200, 1, 1),
+        ('RUN', 600, 1500, 1, 1), ('SWM', 600, 1500, 1, 1),
+        ('RUN', 900, 1800, 1, 1),
+    ]
+
+
+def test_late_packages_are_dropped():
+    windows = streaming.tumbling(100, lateness=50)
+    windows.push(run(10))
+    windows.push(run(170))
+    assert windows.push(run(130)) == [], 'Опоздание в пределах допуска.'
+    windows.push(run(260))
+    windows.push(run(50))
+    assert windows.dropped == 1
+
+
+def test_session_windows_merge():
+    sessions = streaming.SessionWindows(gap=600, lateness=2500)
+    results = list(sessions.process([
+        run(0), run(500), run(3000), run(1000, 'other'), run(1050)]))
+    summary = [(r.key, r.start, r.end, r.totals.count) for r in results]
+    assert summary == [
+        ('other', 1000, 1600, 1),
+        ('runner', 0, 1650, 3),
+        ('runner', 3000, 3600, 1),
+    ]
+
+
+def test_session_windows_close_incrementally():
+    sessions = streaming.SessionWindows(gap=600)
+    for user in range(50):
+        assert sessions.push(run(user, f'user{user:02d}')) == []
+    assert sessions.push(run(300, 'user07')) == []
+    closed = sessions.push(run(620, 'late'))
+    assert [r.key for r in closed] == [
+        f'user{user:02d}' for user in range(21) if user != 7], (
+        'Сессии выдаются, как только водяной знак проходит их срок.'
+    )
+    assert [r.key for r in sessions.push(run(901, 'late'))] == ['user07'] + [
+        f'user{user:02d}' for user in range(21, 50)]
+    assert sorted(sessions.sessions) == ['late']
+
+
+def test_sliding_window_size_must_be_multiple():
+    with pytest.raises(ValueError):
+        streaming.SlidingWindows(900, 400)
+
+
+def test_late_package_in_earlier_pane_is_emitted():
+    windows = streaming.tumbling(900, lateness=600)
+    results = list(windows.process([run(1000), run(500), run(2000)]))
+    assert [(r.start, r.end, r.totals.count) for r in results] == [
+        (0, 900, 1), (900, 1800, 1), (1800, 2700, 1)], (
+        'Опоздание в пределах lateness не должно терять пакет.'
+    )
+    assert windows.dropped == 0
+
+
+def test_malformed_packages_are_counted():
+    windows = streaming.tumbling(900)
+    broken = Package('RUN', [15000, 1], timestamp=10)
+    assert windows.push(broken) == []
+    assert windows.malformed == 1
+    assert windows.panes == {}, 'Испорченный пакет не оставляет панель.'
+    sessions = streaming.SessionWindows(600)
+    assert sessions.push(Package('XXX', [1, 2, 3], timestamp=10)) == []
+    assert sessions.malformed == 1
+    assert sessions.sessions == {}
@@ -0,0 +1,38 @@
+import pytest
+
+import homework
+import templates
+
+INFOS = [
+    homework.read_package('SWM', [720, 1, 80, 25, 40]).show_training_info(),
+    homework.read_package('RUN', [15000, 1, 75]).show_training_info(),
+    homework.InfoMessage('SportsWalking', 12, 6, 12, 6),
+]
+
+
+def test_ru_metric_matches_get_message():
+    assert templates.render_many(INFOS) == [
+        info.get_message() for info in INFOS]
+
+
+def test_other_locales_and_units():
+    walking = INFOS[2]
+    assert templates.render(walking, 'en') == (
+        'Workout type: Race walking; Duration: 12.000 h; '
+        'Distance: 6.000 km; Avg. speed: 12.000 km/h; '
+        'Calories burned: 6.000.')
+    assert templates.render(walking, 'de', 'imperial') == (
+        'Trainingsart: Gehen; Dauer: 12.000 Std.; '
+        'Strecke: 3.728 mi; Durchschn. Tempo: 7.456 mph; '
+        'Verbrannte kcal: 6.000.')
+
+
+def test_formatter_is_compiled_once():
+    assert (templates.compile_formatter('en', 'imperial')
+            is templates.compile_formatter('en', 'imperial'))
+
+
+@pytest.mark.parametrize('locale, units', [('xx', 'metric'), ('ru', 'si')])
+def test_unknown_locale_or_units(locale, units):
+    with pytest.raises(ValueError):
+        templates.compile_formatter(locale, units)
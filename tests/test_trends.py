@@ -0,0 +1,64 @@
+import pytest
+
+import homework
+import trends
+
+
+def running(action):
+    return homework.Running(action, 1, 75).show_training_info()
+
+
+def test_incremental_update_matches_backfill():
+    workouts = [(0, 9000), (0, 3000), (2, 15000), (9, 12000), (10, 8000)]
+    engine = trends.TrendEngine(keep_history=True)
+    for day, action in workouts:
+        engine.update('user', running(action), day)
+    days = [day for day, _ in workouts]
+    loads = [running(action).calories for _, action in workouts]
+    series = trends.trend_series(days, loads)
+    atl, ctl, tsb = engine.trend('user')
+    assert atl == pytest.approx(series['atl'][-1])
+    assert ctl == pytest.approx(series['ctl'][-1])
+    assert tsb == pytest.approx(ctl - atl)
+    assert len(series['day']) == 11, 'Дни без тренировок тоже входят в ряд.'
+
+    chart = engine.series('user', start=5)
+    assert chart['day'].tolist() == list(range(5, 11))
+    assert chart['atl'].tolist() == pytest.approx(series['atl'][5:].tolist())
+
+
+def test_series_ending_before_first_workout_is_empty():
+    engine = trends.TrendEngine(keep_history=True)
+    engine.update('user', running(9000), 10)
+    chart = engine.series('user', end=5)
+    assert all(len(values) == 0 for values in chart.values())
+    assert len(trends.trend_series([10], [1.0], start=12)['day']) == 0
+
+
+def test_trend_decays_without_workouts():
+    engine = trends.TrendEngine()
+    engine.add_load('user', 100.0, 0)
+    atl, ctl, _ = engine.trend('user')
+    later_atl, later_ctl, later_tsb = engine.trend('user', 21)
+    assert later_atl < atl and later_ctl < ctl
+    assert later_tsb > 0, 'После отдыха форма становится положительной.'
+    assert engine.trend('stranger') == (0.0, 0.0, 0.0)
+
+
+def test_backfill_then_update():
+    engine = trends.TrendEngine()
+    days = list(range(0, 100, 3))
+    loads = [500.0] * len(days)
+    series = engine.backfill('user', days, loads)
+    assert engine.trend('user')[0] == series['atl'][-1]
+    with pytest.raises(ValueError):
+        engine.add_load('user', 100.0, days[-1] - 1)
+    engine.add_load('user', 100.0, days[-1] + 1)
+    with pytest.raises(RuntimeError):
+        engine.series('user')
+
+
+def test_day_of():
+    assert trends.day_of(0) == 0
+    assert trends.day_of(86399.9) == 0
+    assert trends.day_of(86400) == 1
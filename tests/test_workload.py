@@ -0,0 +1,61 @@
+from collections import Counter
+
+import pytest
+
+import homework
+import packages
+import workload
+
+
+def test_generator_is_reproducible():
+    first = list(workload.WorkloadGenerator(seed=7, users=20).packages(500))
+    second = list(workload.WorkloadGenerator(seed=7, users=20).packages(500))
+    other = list(workload.WorkloadGenerator(seed=8, users=20).packages(500))
+    assert first == second
+    assert first != other
+
+
+def test_generated_packages_are_valid():
+    generator = workload.WorkloadGenerator(seed=1, users=50)
+    count = Counter()
+    for workout_type, data in generator.tuples(3000):
+        training = homework.read_package(workout_type, data)
+        info = training.show_training_info()
+        low, high = workload.SPEEDS[workout_type]
+        assert low * 0.9 <= info.speed <= high * 1.1
+        count[workout_type] += 1
+    assert count['RUN'] > count['WLK'] > count['SWM'] > 0
+
+
+def test_user_timelines_are_increasing():
+    generator = workload.WorkloadGenerator(seed=2, users=5)
+    last = {}
+    for package in generator.packages(1000):
+        assert package.seq == last.get(package.device_id, (0, 0))[0] + 1
+        assert package.timestamp > last.get(package.device_id, (0, 0))[1]
+        last[package.device_id] = (package.seq, package.timestamp)
+
+
+def test_duplicates_and_malformed(tmp_path):
+    generator = workload.WorkloadGenerator(
+        seed=3, users=100, mix={'SWM': 1.0}, duplicate_rate=0.1,
+        malformed_rate=0.05)
+    paths = generator.write(str(tmp_path), 5000, files=3)
+    assert len(paths) == 3
+    lines = [line for path in paths for line in open(path, encoding='utf-8')]
+    assert len(lines) == 5000
+    keys = Counter(tuple(line.split(',')[1:3]) for line in lines)
+    duplicates = sum(n - 1 for n in keys.values())
+    assert 300 < duplicates < 700
+    malformed = 0
+    for line in lines:
+        try:
+            packages.parse_package(line)
+        except ValueError:
+            malformed += 1
+    assert 100 < malformed < 400
+
+
+def test_unknown_type_in_mix():
+    with pytest.raises(ValueError):
+        workload.WorkloadGenerator(mix={'BOX': 1.0})
@@ -0,0 +1,169 @@
+"""Тренировочная нагрузка и форма (ATL/CTL/TSB).
+Нагрузка дня - сумма калорий тренировок дня. Острая (ATL) и хроническая
+(CTL) нагрузки - экспоненциальные средние дневной нагрузки за 7 и 42 дня,
+форма (TSB) - их разность CTL - ATL. Для каждого пользователя хранится
+только состояние на последний день, поэтому новая тренировка
+учитывается за O(1), а не пересчетом всей истории.
+"""
+import math
+from array import array
+from typing import Dict, Optional, Sequence, Tuple
+
+from homework import InfoMessage
+
+SECONDS_IN_DAY: int = 86400  # секунд в сутках
+
+
+def day_of(timestamp: float) -> int:
+    """Номер дня (UTC) от начала эпохи Unix."""
+    return int(timestamp // SECONDS_IN_DAY)
+
+
+class TrendState:
+    """Состояние пользователя на конец дня day."""
+    __slots__ = ('day', 'atl', 'ctl')
+
+    def __init__(self, day: int, atl: float = 0.0, ctl: float = 0.0) -> None:
+        self.day = day
+        self.atl = atl
+        self.ctl = ctl
+
+    @property
+    def tsb(self) -> float:
+        return self.ctl - self.atl
+
+
+def trend_series(days: Sequence[int],  # дни тренировок по возрастанию
+                 loads: Sequence[float],  # нагрузки тренировок
+                 start: Optional[int] = None,  # первый день ряда
+                 end: Optional[int] = None,  # последний день ряда
+                 atl_days: int = 7,  # период острой нагрузки
+                 ctl_days: int = 42,  # период хронической нагрузки
+                 ) -> Dict[str, array]:
+    """Посчитать дневные ряды ATL, CTL и TSB по колонкам тренировок.
+    В ряд попадает каждый день от start до end, включая дни без тренировок;
+    если end раньше start, ряд пуст.
+    """
+    start = days[0] if start is None and days else start
+    end = days[-1] if end is None and days else end
+    if not days or end < start:
+        return {name: array('d') for name in ('day', 'atl', 'ctl', 'tsb')}
+    daily: array = array('d', bytes(8 * (end - start + 1)))
+    for day, load in zip(days, loads):
+        if start <= day <= end:
+            daily[day - start] += load
+    atl_decay: float = math.exp(-1 / atl_days)
+    ctl_decay: float = math.exp(-1 / ctl_days)
+    atl_values: array = array('d')
+    ctl_values: array = array('d')
+    atl: float = 0.0
+    ctl: float = 0.0
+    for load in daily:
+        atl = atl * atl_decay + load * (1 - atl_decay)
+        ctl = ctl * ctl_decay + load * (1 - ctl_decay)
+        atl_values.append(atl)
+        ctl_values.append(ctl)
+    return {
+        'day': array('d', range(start, end + 1)),
+        'atl': atl_values,
+        'ctl': ctl_values,
+        'tsb': array('d', (c - a for a, c in zip(atl_values, ctl_values))),
+    }
+
+
+class TrendEngine:
+    """Нагрузка и форма по всем пользователям."""
+    ATL_DAYS: int = 7  # период острой нагрузки, дней
+    CTL_DAYS: int = 42  # период хронической нагрузки, дней
+
+    def __init__(self, keep_history: bool = False) -> None:
+        self.states: Dict[str, TrendState] = {}
+        self.keep_history = keep_history
+        # дневные нагрузки пользователей, только при keep_history
+        self.history: Dict[str, Dict[int, float]] = {}
+        self._atl_decay: float = math.exp(-1 / self.ATL_DAYS)
+        self._ctl_decay: float = math.exp(-1 / self.CTL_DAYS)
+
+    def _advance(self, state: TrendState, day: int) -> None:
+        """Перевести состояние на день day без новых тренировок."""
+        gap: int = day - state.day
+        if gap:
+            state.atl *= self._atl_decay ** gap
+            state.ctl *= self._ctl_decay ** gap
+            state.day = day
+
+    def update(self, user_id: str, info: InfoMessage, day: int) -> None:
+        """Учесть тренировку пользователя, прошедшую в день day."""
+        self.add_load(user_id, info.calories, day)
+
+    def add_load(self, user_id: str, load: float, day: int) -> None:
+        """Учесть нагрузку пользователя за день day.
+        Дни должны идти по неубыванию, прошлое загружается через backfill.
+        """
+        state: Optional[TrendState] = self.states.get(user_id)
+        if state is None:
+            state = self.states[user_id] = TrendState(day)
+        elif day < state.day:
+            raise ValueError(
+                f'День {day} раньше последнего учтенного {state.day}, '
+                'используйте backfill')
+        self._advance(state, day)
+        state.atl += load * (1 - self._atl_decay)
+        state.ctl += load * (1 - self._ctl_decay)
+        if self.keep_history:
+            daily: Dict[int, float] = self.history.setdefault(user_id, {})
+            daily[day] = daily.get(day, 0.0) + load
+
+    def backfill(self,
+                 user_id: str,  # пользователь
+                 days: Sequence[int],  # дни тренировок по возрастанию
+                 loads: Sequence[float],  # нагрузки тренировок
+                 ) -> Dict[str, array]:
+        """Загрузить историю пользователя целиком и вернуть дневные ряды.
+        Заменяет накопленное состояние пользователя.
+        """
+        series: Dict[str, array] = trend_series(
+            days, loads, atl_days=self.ATL_DAYS, ctl_days=self.CTL_DAYS)
+        if not days:
+            return series
+        self.states[user_id] = TrendState(
+            days[-1], series['atl'][-1], series['ctl'][-1])
+        if self.keep_history:
+            daily: Dict[int, float] = {}
+            for day, load in zip(days, loads):
+                daily[day] = daily.get(day, 0.0) + load
+            self.history[user_id] = daily
+        return series
+
+    def trend(self, user_id: str, day: Optional[int] = None
+              ) -> Tuple[float, float, float]:
+        """ATL, CTL и TSB пользователя на день day.
+        По умолчанию - на последний день с тренировкой.
+        """
+        state: Optional[TrendState] = self.states.get(user_id)
+        if state is None:
+            return 0.0, 0.0, 0.0
+        current: TrendState = TrendState(state.day, state.atl, state.ctl)
+        if day is not None:
+            if day < state.day:
+                raise ValueError('Прошлые дни доступны только через series')
+            self._advance(current, day)
+        return current.atl, current.ctl, current.tsb
+
+    def series(self, user_id: str, start: Optional[int] = None,
+               end: Optional[int] = None) -> Dict[str, array]:
+        """Дневные ряды пользователя для графиков.
+        Нужна история, то есть engine с keep_history=True.
+        """
+        if not self.keep_history:
+            raise RuntimeError('История не хранится: keep_history=False')
+        daily: Dict[int, float] = self.history.get(user_id, {})
+        days = sorted(daily)
+        series: Dict[str, array] = trend_series(
+            days, [daily[day] for day in days], atl_days=self.ATL_DAYS,
+            ctl_days=self.CTL_DAYS, end=end)
+        if start is not None and series['day']:
+            offset: int = max(0, start - int(series['day'][0]))
+            series = {name: values[offset:]
+                      for name, values in series.items()}
+        return series
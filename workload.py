@@ -0,0 +1,146 @@
+"""Воспроизводимый генератор нагрузки: пакеты в формате read_package.
+Пакеты генерируются порциями для набора пользователей со своими
+устройствами, весом, ростом и временной шкалой тренировок. Доля типов,
+повторно присланных и испорченных пакетов настраивается. Одинаковые
+параметры и seed дают одинаковый поток.
+"""
+import os
+import random
+from typing import Dict, Iterator, List, Optional
+
+from formulas import TRAINING_CLASSES
+from packages import Package, format_package
+
+# средняя скорость тренировки, км/ч: (минимум, максимум)
+SPEEDS: Dict[str, tuple] = {
+    'RUN': (7.0, 15.0),
+    'WLK': (4.0, 7.5),
+    'SWM': (1.5, 4.0),
+}
+POOLS: tuple = (25, 50)  # длины бассейнов, м
+# длина шага или гребка, м - из классов тренировок
+STEP: Dict[str, float] = {code: training.LEN_STEP
+                          for code, training in TRAINING_CLASSES.items()}
+
+
+class User:
+    """Постоянные параметры и временная шкала пользователя."""
+    __slots__ = ('user_id', 'device_id', 'weight', 'height', 'seq', 'time')
+
+    def __init__(self, number: int, rng: random.Random, start: float
+                 ) -> None:
+        self.user_id: str = f'user-{number:07d}'
+        self.device_id: str = f'dev-{number:07d}'
+        self.weight: float = round(min(max(rng.gauss(75, 12), 40), 160), 1)
+        self.height: float = round(min(max(rng.gauss(175, 9), 140), 210))
+        self.seq: int = 0
+        self.time: float = start + rng.uniform(0, 86400)
+
+
+class WorkloadGenerator:
+    """Генератор потока пакетов."""
+    CHUNK: int = 10000  # пакетов в порции
+
+    def __init__(self,
+                 seed: int = 0,  # зерно генератора случайных чисел
+                 users: int = 1000,  # количество пользователей
+                 mix: Optional[Dict[str, float]] = None,  # доли типов
+                 duplicate_rate: float = 0.0,  # доля повторных пакетов
+                 malformed_rate: float = 0.0,  # доля испорченных пакетов
+                 start: float = 1_600_000_000.0,  # начало шкалы времени
+                 mean_gap: float = 86400.0,  # средний перерыв, секунд
+                 ) -> None:
+        self.rng: random.Random = random.Random(seed)
+        self.mix: Dict[str, float] = mix or {'RUN': 0.5, 'WLK': 0.3,
+                                             'SWM': 0.2}
+        unknown = set(self.mix) - set(SPEEDS)
+        if unknown:
+            raise ValueError(f'Неизвестные типы тренировок: {unknown}')
+        self.duplicate_rate = duplicate_rate
+        self.malformed_rate = malformed_rate
+        self.mean_gap = mean_gap
+        self.users: List[User] = [User(number, self.rng, start)
+                                  for number in range(users)]
+        self._recent: List[Package] = []  # кандидаты на повторную отправку
+
+    def _workout(self, user: User, code: str) -> list:
+        """Данные тренировки в порядке полей read_package."""
+        rng: random.Random = self.rng
+        low, high = SPEEDS[code]
+        duration: float = round(min(max(rng.lognormvariate(-0.3, 0.4),
+                                        0.1), 4.0), 3)
+        distance: float = rng.uniform(low, high) * duration * 1000
+        if code == 'RUN':
+            return [round(distance / STEP[code]), duration, user.weight]
+        if code == 'WLK':
+            return [round(distance / STEP[code]), duration, user.weight,
+                    user.height]
+        length_pool: int = rng.choice(POOLS)
+        count_pool: int = max(1, round(distance / length_pool))
+        strokes: int = round(count_pool * length_pool / STEP[code])
+        return [strokes, duration, user.weight, length_pool, count_pool]
+
+    def _malform(self, package: Package) -> Package:
+        """Испортить пакет: потерять или исказить поле."""
+        data: list = list(package.data)
+        if self.rng.random() < 0.5:
+            data.pop(self.rng.randrange(len(data)))
+        else:
+            data[self.rng.randrange(len(data))] = 'NaN?'
+        return Package(package.workout_type, data, package.user_id,
+                       package.device_id, package.seq, package.timestamp)
+
+    def chunk(self, size: int) -> List[Package]:
+        """Сгенерировать очередную порцию пакетов."""
+        rng: random.Random = self.rng
+        codes: List[str] = rng.choices(list(self.mix),
+                                       list(self.mix.values()), k=size)
+        owners: List[User] = rng.choices(self.users, k=size)
+        result: List[Package] = []
+        for code, user in zip(codes, owners):
+            if self._recent and rng.random() < self.duplicate_rate:
+                result.append(rng.choice(self._recent))
+                continue
+            user.seq += 1
+            user.time += rng.expovariate(1 / self.mean_gap)
+            package: Package = Package(code, self._workout(user, code),
+                                       user.user_id, user.device_id,
+                                       user.seq, round(user.time, 3))
+            if rng.random() < self.malformed_rate:
+                package = self._malform(package)
+            result.append(package)
+            if len(self._recent) < 1024:
+                self._recent.append(package)
+            else:
+                self._recent[rng.randrange(1024)] = package
+        return result
+
+    def packages(self, count: int) -> Iterator[Package]:
+        """Поток из count пакетов."""
+        while count > 0:
+            size: int = min(count, self.CHUNK)
+            yield from self.chunk(size)
+            count -= size
+
+    def tuples(self, count: int) -> Iterator[tuple]:
+        """Поток пакетов в виде (код, данные) для read_package."""
+        for package in self.packages(count):
+            yield package.workout_type, package.data
+
+    def write(self, directory: str, count: int, files: int = 1
+              ) -> List[str]:
+        """Записать count пакетов в files файлов, вернуть пути."""
+        os.makedirs(directory, exist_ok=True)
+        paths: List[str] = []
+        per_file: int = -(-count // files)
+        for number in range(files):
+            path: str = os.path.join(directory, f'packages-{number:05d}.csv')
+            size: int = min(per_file, count - number * per_file)
+            with open(path, 'w', encoding='utf-8') as file:
+                for start in range(0, size, self.CHUNK):
+                    file.write(''.join(
+                        format_package(package) + '\n'
+                        for package in self.chunk(min(self.CHUNK,
+                                                      size - start))))
+            paths.append(path)
+        return paths